@@ -6,11 +6,15 @@ Forecast: 12% YES
 """
 
 import json
-import urllib.request
+import os
 import re
+import sys
 from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import webfetch
+
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
@@ -104,6 +108,15 @@ def update_forecast(new_forecast: float, reason: str):
 # NEWS CHECK
 # =============================================================================
 
+def parse_feed_titles(body: bytes) -> list:
+    """Titles of the first 15 items in an RSS feed."""
+    items = re.findall(r'<item>(.*?)</item>', body.decode('utf-8'), re.DOTALL)
+    titles = []
+    for item in items[:15]:
+        title = re.search(r'<title>(.*?)</title>', item)
+        titles.append(title.group(1) if title else '')
+    return titles
+
 def check_news():
     """Check tech news for X/Grok algorithm announcements."""
     print("\n📰 CHECKING NEWS...")
@@ -118,15 +131,8 @@ def check_news():
     
     for name, url in feeds:
         try:
-            req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-            with urllib.request.urlopen(req, timeout=10) as resp:
-                content = resp.read().decode('utf-8')
-            
-            items = re.findall(r'<item>(.*?)</item>', content, re.DOTALL)
-            
-            for item in items[:15]:
-                title = re.search(r'<title>(.*?)</title>', item)
-                title = title.group(1) if title else ''
+            # Cached with conditional GET; an unchanged feed is not re-parsed
+            for title in webfetch.fetch(url, parse=parse_feed_titles, timeout=10):
                 title_lower = title.lower()
                 
                 if any(term in title_lower for term in search_terms):
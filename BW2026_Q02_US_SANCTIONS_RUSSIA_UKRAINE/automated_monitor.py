@@ -39,7 +39,10 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import hashlib
-import time
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import keywords, llmscore, seenstore, webfetch
 
 # Try to load environment variables
 try:
@@ -59,6 +62,7 @@ CONFIG = {
         "resolution_date": "2026-03-14"
     },
     "anthropic_api_key": os.getenv("ANTHROPIC_API_KEY", ""),
+    "offline": False,  # score with local keyword rules only (--offline)
     "news_api_key": os.getenv("NEWS_API_KEY", ""),
     "email": {
         "smtp_server": os.getenv("SMTP_SERVER", "smtp.gmail.com"),
@@ -67,7 +71,8 @@ CONFIG = {
         "password": os.getenv("EMAIL_PASSWORD", ""),
         "to": os.getenv("EMAIL_TO", "")
     },
-    "state_file": "monitor_state.json"
+    "state_file": "monitor_state.json",
+    "seen_namespace": "q02_russia_sanctions"
 }
 
 # Keywords for filtering
@@ -81,6 +86,10 @@ SANCTIONS_KEYWORDS = [
     "sdn list", "entity list", "executive order", "asset freeze"
 ]
 
+# Compiled once; one pass over the text per list
+RESOLUTION_MATCHER = keywords.KeywordMatcher(RESOLUTION_KEYWORDS)
+SANCTIONS_MATCHER = keywords.KeywordMatcher(SANCTIONS_KEYWORDS)
+
 # =============================================================================
 # STATE MANAGEMENT (avoid duplicate alerts)
 # =============================================================================
@@ -91,7 +100,7 @@ def load_state() -> dict:
         with open(CONFIG["state_file"], "r") as f:
             return json.load(f)
     except FileNotFoundError:
-        return {"seen_hashes": [], "last_run": None, "alerts_sent": []}
+        return {"last_run": None, "alerts_sent": []}
 
 def save_state(state: dict):
     """Save state to file."""
@@ -107,40 +116,37 @@ def get_content_hash(content: str) -> str:
 # WEB SCRAPING - OFAC RECENT ACTIONS
 # =============================================================================
 
+def parse_ofac_recent_actions(body: bytes) -> List[Dict]:
+    """Extract Russia-related links from the OFAC Recent Actions page."""
+    results = []
+    soup = BeautifulSoup(body, 'html.parser')
+    
+    # Search for any text containing Russia
+    all_text = soup.get_text()
+    if 'russia' in all_text.lower():
+        # Find links to recent Russia-related actions
+        for link in soup.find_all('a', href=True):
+            href = link.get('href', '')
+            text = link.get_text().strip()
+            if 'russia' in text.lower() or 'russia' in href.lower():
+                results.append({
+                    "source": "OFAC Recent Actions",
+                    "title": text[:200],
+                    "url": f"https://ofac.treasury.gov{href}" if href.startswith('/') else href,
+                    "date": datetime.now().strftime("%Y-%m-%d"),
+                    "type": "official"
+                })
+    
+    return results
+
 def scrape_ofac_recent_actions() -> List[Dict]:
     """Scrape OFAC Recent Actions page for Russia-related entries."""
     url = "https://ofac.treasury.gov/recent-actions"
     results = []
     
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find all action entries (structure may vary)
-        entries = soup.find_all(['div', 'tr', 'li'], class_=lambda x: x and 'action' in x.lower()) or \
-                  soup.find_all('a', href=lambda x: x and 'recent-actions' in x)
-        
-        # Also search for any text containing Russia
-        all_text = soup.get_text()
-        if 'russia' in all_text.lower():
-            # Find links to recent Russia-related actions
-            for link in soup.find_all('a', href=True):
-                href = link.get('href', '')
-                text = link.get_text().strip()
-                if 'russia' in text.lower() or 'russia' in href.lower():
-                    results.append({
-                        "source": "OFAC Recent Actions",
-                        "title": text[:200],
-                        "url": f"https://ofac.treasury.gov{href}" if href.startswith('/') else href,
-                        "date": datetime.now().strftime("%Y-%m-%d"),
-                        "type": "official"
-                    })
-        
+        # Cached with conditional GET; an unchanged page is not re-parsed
+        results = webfetch.fetch(url, parse=parse_ofac_recent_actions)
         print(f"✓ OFAC scrape complete: found {len(results)} Russia-related items")
         
     except Exception as e:
@@ -148,36 +154,36 @@ def scrape_ofac_recent_actions() -> List[Dict]:
     
     return results
 
+def parse_treasury_press(body: bytes) -> List[Dict]:
+    """Extract Russia/sanctions press releases from the Treasury listing."""
+    results = []
+    soup = BeautifulSoup(body, 'html.parser')
+    
+    # Find press release entries
+    for article in soup.find_all(['article', 'div'], class_=lambda x: x and ('press' in str(x).lower() or 'release' in str(x).lower())):
+        text = article.get_text().lower()
+        if 'russia' in text or 'sanctions' in text:
+            title_elem = article.find(['h2', 'h3', 'a'])
+            if title_elem:
+                link = title_elem.find('a') or title_elem
+                href = link.get('href', '') if link.name == 'a' else ''
+                results.append({
+                    "source": "Treasury Press Release",
+                    "title": title_elem.get_text().strip()[:200],
+                    "url": f"https://home.treasury.gov{href}" if href.startswith('/') else href,
+                    "date": datetime.now().strftime("%Y-%m-%d"),
+                    "type": "official"
+                })
+    
+    return results
+
 def scrape_treasury_press() -> List[Dict]:
     """Scrape Treasury press releases for Russia sanctions news."""
     url = "https://home.treasury.gov/news/press-releases"
     results = []
     
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find press release entries
-        for article in soup.find_all(['article', 'div'], class_=lambda x: x and ('press' in str(x).lower() or 'release' in str(x).lower())):
-            text = article.get_text().lower()
-            if 'russia' in text or 'sanctions' in text:
-                title_elem = article.find(['h2', 'h3', 'a'])
-                if title_elem:
-                    link = title_elem.find('a') or title_elem
-                    href = link.get('href', '') if link.name == 'a' else ''
-                    results.append({
-                        "source": "Treasury Press Release",
-                        "title": title_elem.get_text().strip()[:200],
-                        "url": f"https://home.treasury.gov{href}" if href.startswith('/') else href,
-                        "date": datetime.now().strftime("%Y-%m-%d"),
-                        "type": "official"
-                    })
-        
+        results = webfetch.fetch(url, parse=parse_treasury_press)
         print(f"✓ Treasury scrape complete: found {len(results)} relevant items")
         
     except Exception as e:
@@ -209,7 +215,7 @@ def search_news_api(query: str, days_back: int = 3) -> List[Dict]:
     }
     
     try:
-        response = requests.get(url, params=params, timeout=30)
+        response = webfetch.get(url, params=params, timeout=30)
         response.raise_for_status()
         data = response.json()
         
@@ -230,6 +236,18 @@ def search_news_api(query: str, days_back: int = 3) -> List[Dict]:
     
     return results
 
+def parse_google_news_rss(body: bytes) -> List[Dict]:
+    """Convert a Google News RSS feed into news items."""
+    feed = feedparser.parse(body)
+    return [{
+        "source": f"Google News - {entry.get('source', {}).get('title', 'Unknown')}",
+        "title": entry.get("title", "")[:200],
+        "description": entry.get("summary", "")[:500],
+        "url": entry.get("link", ""),
+        "date": entry.get("published", "")[:10],
+        "type": "news"
+    } for entry in feed.entries[:15]]  # Limit to 15 results
+
 def search_google_news_rss(query: str) -> List[Dict]:
     """Search Google News RSS feed (no API key needed)."""
     results = []
@@ -239,18 +257,7 @@ def search_google_news_rss(query: str) -> List[Dict]:
     url = f"https://news.google.com/rss/search?q={encoded_query}&hl=en-US&gl=US&ceid=US:en"
     
     try:
-        feed = feedparser.parse(url)
-        
-        for entry in feed.entries[:15]:  # Limit to 15 results
-            results.append({
-                "source": f"Google News - {entry.get('source', {}).get('title', 'Unknown')}",
-                "title": entry.get("title", "")[:200],
-                "description": entry.get("summary", "")[:500],
-                "url": entry.get("link", ""),
-                "date": entry.get("published", "")[:10],
-                "type": "news"
-            })
-        
+        results = webfetch.fetch(url, parse=parse_google_news_rss)
         print(f"✓ Google News RSS '{query}': found {len(results)} articles")
         
     except Exception as e:
@@ -264,19 +271,8 @@ def search_congress_gov() -> List[Dict]:
     url = "https://www.congress.gov/bill/119th-congress/senate-bill/1241/all-actions"
     
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Look for action items
-        actions = soup.find_all(['tr', 'li'], class_=lambda x: x and 'action' in str(x).lower())
-        
-        # Get the page text to check for status
-        text = soup.get_text()
+        # Get the page text to check for status (cached until the page changes)
+        text = webfetch.fetch(url, parse=lambda body: BeautifulSoup(body, 'html.parser').get_text(), name="congress.page_text")
         
         # Check for key status indicators
         status_keywords = ['passed senate', 'passed house', 'signed', 'enrolled', 'became law', 'cloture']
@@ -303,25 +299,7 @@ def search_congress_gov() -> List[Dict]:
 # CLAUDE API ANALYSIS
 # =============================================================================
 
-def analyze_with_claude(items: List[Dict]) -> List[Dict]:
-    """Use Claude API to analyze if items meet resolution criteria."""
-    if not CONFIG["anthropic_api_key"]:
-        print("⚠ ANTHROPIC_API_KEY not set, skipping AI analysis")
-        # Fall back to keyword matching
-        return keyword_analysis(items)
-    
-    analyzed = []
-    
-    # Batch items for efficiency
-    batch_text = "\n\n".join([
-        f"ITEM {i+1}:\nSource: {item['source']}\nTitle: {item['title']}\nDescription: {item.get('description', 'N/A')}"
-        for i, item in enumerate(items[:10])  # Limit to 10 items per call
-    ])
-    
-    if not batch_text.strip():
-        return []
-    
-    prompt = f"""You are analyzing news items for a forecasting question:
+ANALYSIS_PROMPT = """You are analyzing news items for a forecasting question:
 
 QUESTION: "Will the US impose additional sanctions on Russia related to the Ukraine war before March 14, 2026?"
 
@@ -339,94 +317,79 @@ Analyze these news items and for each one, respond with:
 5. ACTION_NEEDED: What the user should do
 
 NEWS ITEMS TO ANALYZE:
-{batch_text}
+{items}
 
 Respond in JSON format:
-{{"analyses": [
-  {{"item": 1, "relevance": "HIGH", "likely_resolves": "POSSIBLY", "reasoning": "...", "action": "..."}},
+{"analyses": [
+  {"item": 1, "relevance": "HIGH", "likely_resolves": "POSSIBLY", "reasoning": "...", "action": "..."},
   ...
-]}}"""
-
-    try:
-        import anthropic
-        client = anthropic.Anthropic(api_key=CONFIG["anthropic_api_key"])
-        
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=2000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        # Parse response
-        response_text = response.content[0].text
-        
-        # Try to extract JSON
-        import re
-        json_match = re.search(r'\{[\s\S]*\}', response_text)
-        if json_match:
-            analysis_data = json.loads(json_match.group())
-            
-            for analysis in analysis_data.get("analyses", []):
-                item_idx = analysis.get("item", 1) - 1
-                if 0 <= item_idx < len(items):
-                    items[item_idx]["ai_analysis"] = {
-                        "relevance": analysis.get("relevance", "UNKNOWN"),
-                        "likely_resolves": analysis.get("likely_resolves", "UNKNOWN"),
-                        "reasoning": analysis.get("reasoning", ""),
-                        "action": analysis.get("action", "")
-                    }
-                    
-                    if analysis.get("relevance") in ["HIGH", "MEDIUM"]:
-                        analyzed.append(items[item_idx])
-        
-        print(f"✓ Claude analysis complete: {len(analyzed)} high/medium relevance items")
-        
-    except ImportError:
-        print("⚠ anthropic package not installed, using keyword analysis")
-        return keyword_analysis(items)
-    except Exception as e:
-        print(f"✗ Claude analysis failed: {e}")
-        return keyword_analysis(items)
-    
-    return analyzed
+]}"""
+
+def make_scorer() -> llmscore.Scorer:
+    """Claude scorer with keyword fallback; keyword-only when Claude is unavailable."""
+    keyword_backend = llmscore.StubBackend(keyword_verdict, name="keywords")
+    backend = keyword_backend
+    if CONFIG["offline"]:
+        print("⚠ Offline run, using keyword analysis")
+    elif not CONFIG["anthropic_api_key"]:
+        print("⚠ ANTHROPIC_API_KEY not set, using keyword analysis")
+    else:
+        try:
+            backend = llmscore.AnthropicBackend(CONFIG["anthropic_api_key"])
+        except ImportError:
+            print("⚠ anthropic package not installed, using keyword analysis")
+    return llmscore.Scorer(backend, ANALYSIS_PROMPT, fallback=keyword_backend)
 
-def keyword_analysis(items: List[Dict]) -> List[Dict]:
-    """Fallback keyword-based analysis."""
+def analyze_with_claude(items: List[Dict]) -> List[Dict]:
+    """Use Claude API to analyze if items meet resolution criteria."""
+    scorer = make_scorer()
     analyzed = []
     
-    for item in items:
-        text = f"{item.get('title', '')} {item.get('description', '')}".lower()
-        
-        has_sanctions = any(kw in text for kw in SANCTIONS_KEYWORDS)
-        has_ukraine = any(kw in text for kw in RESOLUTION_KEYWORDS)
-        
-        if has_sanctions and has_ukraine:
-            relevance = "HIGH"
-            likely_resolves = "POSSIBLY"
-            reasoning = "Contains both sanctions and Ukraine war keywords"
-        elif has_sanctions:
-            relevance = "MEDIUM"
-            likely_resolves = "NO"
-            reasoning = "Sanctions mentioned but no explicit Ukraine link"
-        else:
-            relevance = "LOW"
-            likely_resolves = "NO"
-            reasoning = "No relevant keywords found"
-            continue  # Skip low relevance
-        
+    # All items are scored, in concurrent batches; verdicts are cached by content
+    for item, analysis in zip(items, scorer.score(items)):
+        if not analysis:
+            continue
         item["ai_analysis"] = {
-            "relevance": relevance,
-            "likely_resolves": likely_resolves,
-            "reasoning": reasoning,
-            "action": "Check official source for exact language" if relevance == "HIGH" else "Monitor"
+            "relevance": analysis.get("relevance", "UNKNOWN"),
+            "likely_resolves": analysis.get("likely_resolves", "UNKNOWN"),
+            "reasoning": analysis.get("reasoning", ""),
+            "action": analysis.get("action", "")
         }
-        
-        if relevance in ["HIGH", "MEDIUM"]:
+        if analysis.get("relevance") in ["HIGH", "MEDIUM"]:
             analyzed.append(item)
     
-    print(f"✓ Keyword analysis complete: {len(analyzed)} relevant items")
+    stats = scorer.stats
+    print(f"✓ {scorer.backend.name} analysis complete: {len(analyzed)} high/medium relevance items "
+          f"({stats['scored']} scored in {stats['batches']} batches, {stats['cached']} cached)")
     return analyzed
 
+def keyword_verdict(item: Dict) -> Dict:
+    """Fallback keyword-based verdict for one item."""
+    text = f"{item.get('title', '')} {item.get('description', '')}"
+    
+    has_sanctions = SANCTIONS_MATCHER.matches(text)
+    has_ukraine = RESOLUTION_MATCHER.matches(text)
+    
+    if has_sanctions and has_ukraine:
+        relevance = "HIGH"
+        likely_resolves = "POSSIBLY"
+        reasoning = "Contains both sanctions and Ukraine war keywords"
+    elif has_sanctions:
+        relevance = "MEDIUM"
+        likely_resolves = "NO"
+        reasoning = "Sanctions mentioned but no explicit Ukraine link"
+    else:
+        relevance = "LOW"
+        likely_resolves = "NO"
+        reasoning = "No relevant keywords found"
+    
+    return {
+        "relevance": relevance,
+        "likely_resolves": likely_resolves,
+        "reasoning": reasoning,
+        "action": "Check official source for exact language" if relevance == "HIGH" else "Monitor"
+    }
+
 # =============================================================================
 # EMAIL ALERTS
 # =============================================================================
@@ -513,14 +476,8 @@ def run_monitor():
     state = load_state()
     all_items = []
     
-    # 1. Scrape official sources
-    print("\n[1/4] Checking official sources...")
-    all_items.extend(scrape_ofac_recent_actions())
-    all_items.extend(scrape_treasury_press())
-    all_items.extend(search_congress_gov())
-    
-    # 2. Search news
-    print("\n[2/4] Searching news sources...")
+    # 1. Query official sources and news concurrently (rate limited per host)
+    print("\n[1/3] Checking official sources and news...")
     news_queries = [
         "OFAC Russia sanctions",
         "US Russia sanctions Ukraine",
@@ -529,35 +486,36 @@ def run_monitor():
         "Graham Blumenthal Russia bill"
     ]
     
-    for query in news_queries:
-        all_items.extend(search_google_news_rss(query))
-        time.sleep(1)  # Rate limiting
+    sources = [
+        ("OFAC scrape", scrape_ofac_recent_actions),
+        ("Treasury scrape", scrape_treasury_press),
+        ("Congress.gov check", search_congress_gov),
+    ]
+    sources += [(f"Google News RSS '{query}'", search_google_news_rss, query) for query in news_queries]
     
     # Also try NewsAPI if configured
     if CONFIG["news_api_key"]:
-        all_items.extend(search_news_api("US Russia sanctions Ukraine", days_back=2))
+        sources.append(("NewsAPI search", search_news_api, "US Russia sanctions Ukraine", 2))
     
-    # 3. Deduplicate
-    print("\n[3/4] Deduplicating results...")
-    seen_hashes = set(state.get("seen_hashes", []))
-    unique_items = []
+    for items in webfetch.fan_out(sources):
+        all_items.extend(items)
     
-    for item in all_items:
-        content_hash = get_content_hash(item.get("title", "") + item.get("url", ""))
-        if content_hash not in seen_hashes:
-            unique_items.append(item)
-            seen_hashes.add(content_hash)
+    # 2. Deduplicate
+    print("\n[2/3] Deduplicating results...")
+    seen = seenstore.SeenStore(CONFIG["seen_namespace"])
+    seen.import_keys(state.pop("seen_hashes", []))  # one-off migration of the old list
+    unique_items = seen.filter_new(all_items, key=lambda item: get_content_hash(item.get("title", "") + item.get("url", "")))
     
     print(f"   {len(all_items)} total items, {len(unique_items)} new items")
     
-    # 4. Analyze with AI
-    print("\n[4/4] Analyzing relevance...")
+    # 3. Analyze with AI
+    print("\n[3/3] Analyzing relevance...")
     if unique_items:
         relevant_items = analyze_with_claude(unique_items)
     else:
         relevant_items = []
     
-    # 5. Send alerts if needed
+    # 4. Send alerts if needed
     high_priority = [item for item in relevant_items 
                      if item.get("ai_analysis", {}).get("relevance") == "HIGH"]
     
@@ -575,11 +533,13 @@ def run_monitor():
     else:
         print("\n✓ No relevant items found this run")
     
-    # 6. Save state
-    state["seen_hashes"] = list(seen_hashes)[-1000:]  # Keep last 1000
+    # 5. Save state
+    seen.expire()
+    seen.commit()
+    seen.close()
     save_state(state)
     
-    # 7. Print summary
+    # 6. Print summary
     print("\n" + "=" * 60)
     print("SUMMARY")
     print("=" * 60)
@@ -610,7 +570,9 @@ if __name__ == "__main__":
     parser.add_argument("--test-email", action="store_true", help="Send test email")
     parser.add_argument("--test-claude", action="store_true", help="Test Claude API")
     parser.add_argument("--dry-run", action="store_true", help="Run without sending alerts")
+    parser.add_argument("--offline", action="store_true", help="Score items with the local keyword backend instead of Claude")
     args = parser.parse_args()
+    CONFIG["offline"] = args.offline
     
     if args.test_email:
         send_email_alert(
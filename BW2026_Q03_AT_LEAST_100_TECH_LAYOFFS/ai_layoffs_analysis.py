@@ -10,9 +10,15 @@ Key insight: This is about layoffs IN the AI industry (companies like xAI, OpenA
 NOT layoffs CAUSED BY AI at other companies.
 """
 
+import json
+import os
+import sys
+
 import numpy as np
 from scipy import stats
-import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import sweep
 
 # =============================================================================
 # HISTORICAL DATA (from research)
@@ -77,29 +83,99 @@ print(f"Poisson (lambda={lambda_ex:.1f}): P(>=100) = {p_ge_100_ex:.1%}")
 
 print("\n### METHOD 3: Monte Carlo with Lumpy Events ###")
 
-def simulate_ai_layoffs(n_simulations=100000):
-    results = []
-    
-    for _ in range(n_simulations):
-        total_layoffs = 0
-        
+def draw_shared_inputs(n_simulations, jump_mean=4.5, jump_sigma=0.7, rng=np.random):
+    """Random inputs shared by every scenario: base-count uniforms, big-event trigger, jump size."""
+    return {
+        "base": rng.random(n_simulations),
+        "trigger": rng.random((n_simulations, 1)),
+        "jump": rng.lognormal(mean=jump_mean, sigma=jump_sigma, size=(n_simulations, 1)).astype(int),
+    }
+
+
+def poisson_inverse_cdf(u, lam):
+    """Poisson(lam) counts for uniforms u, one column per rate: the smallest k with CDF(k) >= u."""
+    lam = np.atleast_1d(lam)
+    ks = np.arange(int(stats.poisson.ppf(1 - 1e-12, lam.max())) + 1)
+    cdf = stats.poisson.cdf(ks[:, None], lam)
+    out = np.empty((len(u), lam.size), dtype=np.int64)
+    for j in range(lam.size):
+        out[:, j] = np.minimum(np.searchsorted(cdf[:, j], u, side="left"), ks[-1])
+    return out
+
+
+def simulate_compound_poisson_jump(p_big_event, base_rate_monthly, n_simulations=100000,
+                                   months=2, jump_mean=4.5, jump_sigma=0.7,
+                                   jump_min=None, jump_max=None, rng=np.random, draws=None):
+    """
+    Compound Poisson base layoffs plus an optional lognormal "big event" jump.
+
+    p_big_event and base_rate_monthly may be scalars or arrays of scenario
+    parameters; they are broadcast against each other and every scenario is
+    simulated from one batched draw. The big-event trigger and jump size draws
+    are shared across scenarios (common random numbers), so differences between
+    scenarios reflect the parameters rather than sampling noise. rng is a
+    Generator, or the global np.random state by default.
+
+    With draws from draw_shared_inputs(), the base counts are shared as well:
+    they come from the same uniforms through the Poisson inverse CDF, so the
+    totals move monotonically with the base rate.
+
+    Returns an (n_simulations, n_scenarios) integer array of total layoffs.
+    """
+    p_big_event, base_rate_monthly = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(p_big_event, dtype=float)),
+        np.atleast_1d(np.asarray(base_rate_monthly, dtype=float)),
+    )
+
+    if draws is None:
         # 1. Base steady-state layoffs (small events)
-        base_rate_monthly = 25
-        base_layoffs = np.random.poisson(base_rate_monthly * 2)
-        total_layoffs += base_layoffs
-        
+        base_layoffs = rng.poisson(base_rate_monthly * months, size=(n_simulations, p_big_event.size))
+
         # 2. Probability of "big event" (50+ people)
-        p_big_event = 0.20
-        
-        if np.random.random() < p_big_event:
-            big_event_size = int(np.random.lognormal(mean=4.5, sigma=0.7))
-            big_event_size = min(big_event_size, 600)
-            big_event_size = max(big_event_size, 50)
-            total_layoffs += big_event_size
-        
-        results.append(total_layoffs)
-    
-    return np.array(results)
+        trigger = rng.random((n_simulations, 1))
+        big_event_size = rng.lognormal(mean=jump_mean, sigma=jump_sigma, size=(n_simulations, 1)).astype(int)
+    else:
+        base_layoffs = poisson_inverse_cdf(draws["base"], base_rate_monthly * months)
+        trigger = draws["trigger"]
+        big_event_size = draws["jump"]
+    if jump_min is not None or jump_max is not None:
+        big_event_size = np.clip(big_event_size, jump_min, jump_max)
+
+    return base_layoffs + np.where(trigger < p_big_event, big_event_size, 0)
+
+
+def scenario_threshold_probabilities(p_big_event, base_rate_monthly, threshold=THRESHOLD,
+                                     n_simulations=50000, chunk_size=256, months=2,
+                                     jump_mean=4.5, jump_sigma=0.7, rng=np.random):
+    """
+    P(total >= threshold) for every scenario, simulated chunk_size scenarios
+    at a time from one set of shared draws.
+    """
+    p_big_event, base_rate_monthly = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(p_big_event, dtype=float)),
+        np.atleast_1d(np.asarray(base_rate_monthly, dtype=float)),
+    )
+    draws = draw_shared_inputs(n_simulations, jump_mean, jump_sigma, rng)
+    probs = np.empty(p_big_event.size)
+    for start in range(0, p_big_event.size, chunk_size):
+        stop = start + chunk_size
+        totals = simulate_compound_poisson_jump(
+            p_big_event[start:stop], base_rate_monthly[start:stop], n_simulations, months=months, draws=draws
+        )
+        probs[start:stop] = np.mean(totals >= threshold, axis=0)
+    return probs
+
+
+def layoffs_scenarios(params, rng):
+    """Every scenario of the sweep in one batched simulation."""
+    return {"p_ge_threshold": scenario_threshold_probabilities(
+        params["p_big_event"], params["base_rate_monthly"], params["threshold"],
+        months=params["months"], jump_mean=params["jump_mean"], jump_sigma=params["jump_sigma"], rng=rng,
+    )}
+
+
+def simulate_ai_layoffs(n_simulations=100000):
+    return simulate_compound_poisson_jump(0.20, 25, n_simulations, jump_min=50, jump_max=600)[:, 0]
 
 np.random.seed(42)
 sim_results = simulate_ai_layoffs(100000)
@@ -129,15 +205,14 @@ scenarios = [
 ]
 
 print("\nScenario Analysis:")
-for name, p_big, base_monthly in scenarios:
-    sim = []
-    for _ in range(50000):
-        total = np.random.poisson(base_monthly * 2)
-        if np.random.random() < p_big:
-            total += int(np.random.lognormal(4.5, 0.7))
-        sim.append(total)
-    prob = np.mean(np.array(sim) >= 100)
-    print(f"  {name}: P(>=100) = {prob:.1%}")
+scenario_rows = sweep.run_batched(
+    layoffs_scenarios,
+    [{"scenario": name, "p_big_event": p_big, "base_rate_monthly": base_monthly} for name, p_big, base_monthly in scenarios],
+    draws=lambda rng: rng,
+    base={"months": 2, "jump_mean": 4.5, "jump_sigma": 0.7, "threshold": THRESHOLD},
+)
+for row in scenario_rows:
+    print(f"  {row['scenario']}: P(>=100) = {row['p_ge_threshold']:.1%}")
 
 # =============================================================================
 # COMMUNITY FORECASTS
@@ -210,6 +285,7 @@ summary = {
         "mean": round(mean_layoffs, 1),
         "median": round(median_layoffs, 1),
     },
+    "scenario_analysis": {row["scenario"]: round(row["p_ge_threshold"] * 100, 1) for row in scenario_rows},
     "community_forecasts": {name: f"{p:.0%}" for name, p in community.items()},
 }
 
@@ -35,6 +35,11 @@ import feedparser
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict
 import hashlib
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import keywords, llmscore, seenstore, webfetch
 
 # Try to load environment variables
 try:
@@ -62,7 +67,9 @@ CONFIG = {
         "confirmed_events": []
     },
     "anthropic_api_key": os.getenv("ANTHROPIC_API_KEY", ""),
-    "state_file": "ai_layoffs_state.json"
+    "offline": False,  # score with local keyword rules only (--offline)
+    "state_file": "ai_layoffs_state.json",
+    "seen_namespace": "q03_ai_layoffs"
 }
 
 # AI companies to watch (high-risk for layoffs)
@@ -91,6 +98,11 @@ AI_INDUSTRY_KEYWORDS = [
     "machine learning", "ML company", "AI lab", "AI firm"
 ]
 
+# Compiled once (case-insensitive, whole words); one pass over the text per list
+COMPANY_MATCHER = keywords.KeywordMatcher(AI_COMPANIES_WATCHLIST)
+LAYOFF_MATCHER = keywords.KeywordMatcher(LAYOFF_KEYWORDS)
+AI_INDUSTRY_MATCHER = keywords.KeywordMatcher(AI_INDUSTRY_KEYWORDS)
+
 # =============================================================================
 # STATE MANAGEMENT
 # =============================================================================
@@ -104,7 +116,6 @@ def load_state() -> dict:
         return {
             "cumulative_count": 0,
             "confirmed_events": [],
-            "seen_hashes": [],
             "last_run": None,
             "forecast_history": []
         }
@@ -123,6 +134,18 @@ def get_content_hash(content: str) -> str:
 # NEWS SEARCH FUNCTIONS
 # =============================================================================
 
+def parse_google_news(body: bytes) -> List[Dict]:
+    """Convert a Google News RSS feed into news items."""
+    feed = feedparser.parse(body)
+    return [{
+        "source": f"Google News - {entry.get('source', {}).get('title', 'Unknown')}",
+        "title": entry.get("title", "")[:200],
+        "description": entry.get("summary", "")[:500],
+        "url": entry.get("link", ""),
+        "date": entry.get("published", "")[:25],
+        "type": "news"
+    } for entry in feed.entries[:10]]
+
 def search_google_news(query: str, days_back: int = 3) -> List[Dict]:
     """Search Google News RSS for relevant articles."""
     results = []
@@ -130,16 +153,8 @@ def search_google_news(query: str, days_back: int = 3) -> List[Dict]:
     url = f"https://news.google.com/rss/search?q={encoded_query}+when:{days_back}d&hl=en-US&gl=US&ceid=US:en"
     
     try:
-        feed = feedparser.parse(url)
-        for entry in feed.entries[:10]:
-            results.append({
-                "source": f"Google News - {entry.get('source', {}).get('title', 'Unknown')}",
-                "title": entry.get("title", "")[:200],
-                "description": entry.get("summary", "")[:500],
-                "url": entry.get("link", ""),
-                "date": entry.get("published", "")[:25],
-                "type": "news"
-            })
+        # Cached with conditional GET; an unchanged feed is not re-parsed
+        results = webfetch.fetch(url, parse=parse_google_news)
         print(f"✓ Google News '{query}': {len(results)} results")
     except Exception as e:
         print(f"✗ Google News search failed: {e}")
@@ -177,27 +192,21 @@ def check_trueup_layoffs() -> List[Dict]:
     
     try:
         from bs4 import BeautifulSoup
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers, timeout=30)
+        text = webfetch.fetch(url, parse=lambda body: BeautifulSoup(body, 'html.parser').get_text(), name="trueup.page_text")
         
-        if response.ok:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            text = soup.get_text().lower()
-            
-            # Check for AI-related layoffs
-            for company in AI_COMPANIES_WATCHLIST:
-                if company.lower() in text:
-                    results.append({
-                        "source": "TrueUp Layoffs",
-                        "title": f"Potential layoff mention: {company}",
-                        "description": f"Found mention of {company} on TrueUp layoffs tracker",
-                        "url": url,
-                        "date": datetime.now().strftime("%Y-%m-%d"),
-                        "type": "tracker",
-                        "company": company
-                    })
-            
-            print(f"✓ TrueUp check complete: {len(results)} AI company mentions")
+        # Check for AI-related layoffs
+        for company in COMPANY_MATCHER.findall(text):
+            results.append({
+                "source": "TrueUp Layoffs",
+                "title": f"Potential layoff mention: {company}",
+                "description": f"Found mention of {company} on TrueUp layoffs tracker",
+                "url": url,
+                "date": datetime.now().strftime("%Y-%m-%d"),
+                "type": "tracker",
+                "company": company
+            })
+        
+        print(f"✓ TrueUp check complete: {len(results)} AI company mentions")
     except Exception as e:
         print(f"✗ TrueUp check failed: {e}")
     
@@ -207,137 +216,103 @@ def check_trueup_layoffs() -> List[Dict]:
 # CLAUDE API ANALYSIS
 # =============================================================================
 
-def analyze_with_claude(items: List[Dict], state: dict) -> Dict:
-    """Use Claude API to analyze news items and update forecast."""
-    if not CONFIG["anthropic_api_key"]:
-        print("⚠ ANTHROPIC_API_KEY not set, using keyword analysis")
-        return keyword_analysis(items, state)
-    
-    # Prepare items for analysis
-    items_text = "\n\n".join([
-        f"ITEM {i+1}:\nSource: {item['source']}\nTitle: {item['title']}\nDescription: {item.get('description', 'N/A')}"
-        for i, item in enumerate(items[:15])
-    ])
-    
-    if not items_text.strip():
-        return {"relevant_items": [], "forecast_update": None}
-    
-    prompt = f"""You are analyzing news for a forecasting question about AI INDUSTRY layoffs.
+# Per-item prompt; kept free of run state (counts, forecast) so cached verdicts stay valid
+ANALYSIS_PROMPT = """You are analyzing news for a forecasting question about AI INDUSTRY layoffs.
 
 QUESTION: "Will layoffs.fyi report at least 100 AI industry layoffs between Jan 12 - Mar 13, 2026?"
 
 CRITICAL DISTINCTION: This is about layoffs AT AI companies (like OpenAI, Stability AI, xAI), 
 NOT about layoffs CAUSED BY AI at other companies.
 
-Current tracking:
-- Cumulative AI industry layoffs so far: {state.get('cumulative_count', 0)}
-- Threshold needed: 100
-- Current forecast: {CONFIG['forecast']['current_probability']}%
-
-AI companies to watch: {', '.join(AI_COMPANIES_WATCHLIST[:15])}
+AI companies to watch: """ + ', '.join(AI_COMPANIES_WATCHLIST[:15]) + """
 
 Analyze these news items:
-{items_text}
+{items}
 
 For EACH item, determine:
 1. Is this about an AI COMPANY having layoffs? (not AI causing layoffs elsewhere)
 2. If yes, which company and how many people?
 3. Relevance: HIGH (confirmed AI company layoff) / MEDIUM (possible/rumored) / LOW (not relevant)
 
-Then provide:
-- List of relevant items with company name and estimated layoff count
-- Whether the forecast should change and why
-
 Respond in JSON:
-{{
+{
   "analyses": [
-    {{"item": 1, "is_ai_company_layoff": true/false, "company": "name or null", 
-      "estimated_count": number or null, "relevance": "HIGH/MEDIUM/LOW", "reasoning": "..."}}
-  ],
-  "total_new_layoffs": number,
-  "forecast_recommendation": {{
-    "direction": "UP/DOWN/UNCHANGED",
-    "new_probability": number or null,
-    "reasoning": "..."
-  }}
-}}"""
-
-    try:
-        import anthropic
-        client = anthropic.Anthropic(api_key=CONFIG["anthropic_api_key"])
-        
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=2000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        response_text = response.content[0].text
-        
-        # Extract JSON
-        import re
-        json_match = re.search(r'\{[\s\S]*\}', response_text)
-        if json_match:
-            analysis = json.loads(json_match.group())
-            
-            relevant_items = []
-            for i, item_analysis in enumerate(analysis.get("analyses", [])):
-                if item_analysis.get("relevance") in ["HIGH", "MEDIUM"]:
-                    if i < len(items):
-                        items[i]["analysis"] = item_analysis
-                        relevant_items.append(items[i])
-            
-            return {
-                "relevant_items": relevant_items,
-                "total_new_layoffs": analysis.get("total_new_layoffs", 0),
-                "forecast_update": analysis.get("forecast_recommendation")
-            }
-        
-        print("✓ Claude analysis complete")
-        
-    except ImportError:
-        print("⚠ anthropic package not installed")
-        return keyword_analysis(items, state)
-    except Exception as e:
-        print(f"✗ Claude analysis failed: {e}")
-        return keyword_analysis(items, state)
-    
-    return {"relevant_items": [], "forecast_update": None}
+    {"item": 1, "is_ai_company_layoff": true/false, "company": "name or null", 
+      "estimated_count": number or null, "relevance": "HIGH/MEDIUM/LOW", "reasoning": "..."}
+  ]
+}"""
+
+def make_scorer() -> llmscore.Scorer:
+    """Claude scorer with keyword fallback; keyword-only when Claude is unavailable."""
+    keyword_backend = llmscore.StubBackend(keyword_verdict, name="keywords")
+    backend = keyword_backend
+    if CONFIG["offline"]:
+        print("⚠ Offline run, using keyword analysis")
+    elif not CONFIG["anthropic_api_key"]:
+        print("⚠ ANTHROPIC_API_KEY not set, using keyword analysis")
+    else:
+        try:
+            backend = llmscore.AnthropicBackend(CONFIG["anthropic_api_key"])
+        except ImportError:
+            print("⚠ anthropic package not installed, using keyword analysis")
+    return llmscore.Scorer(backend, ANALYSIS_PROMPT, fallback=keyword_backend)
+
+def parse_count(value) -> int:
+    """Layoff count from a free-form model value ("50", "50+", "~200", "1,200"); 0 when there is none."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return max(0, int(value))
+    match = re.search(r"\d[\d,]*", str(value or ""))
+    return int(match.group().replace(",", "")) if match else 0
 
-def keyword_analysis(items: List[Dict], state: dict) -> Dict:
-    """Fallback keyword-based analysis."""
+def analyze_with_claude(items: List[Dict], state: dict) -> Dict:
+    """Use Claude API to analyze news items and update forecast."""
+    scorer = make_scorer()
     relevant_items = []
+    confirmed = {}
+    
+    # All items are scored, in concurrent batches; verdicts are cached by content
+    for item, analysis in zip(items, scorer.score(items)):
+        if not analysis or analysis.get("relevance") not in ["HIGH", "MEDIUM"]:
+            continue
+        item["analysis"] = analysis
+        relevant_items.append(item)
+        # Several headlines often report the same event: count each company once
+        if analysis.get("is_ai_company_layoff") and analysis.get("relevance") == "HIGH":
+            company = (analysis.get("company") or "unknown").lower()
+            confirmed[company] = max(confirmed.get(company, 0), parse_count(analysis.get("estimated_count")))
+    
+    stats = scorer.stats
+    print(f"✓ {scorer.backend.name} analysis complete: {len(relevant_items)} relevant items "
+          f"({stats['scored']} scored in {stats['batches']} batches, {stats['cached']} cached)")
+    return {
+        "relevant_items": relevant_items,
+        "total_new_layoffs": sum(confirmed.values()),
+        "forecast_update": None
+    }
+
+def keyword_verdict(item: Dict) -> Dict:
+    """Fallback keyword-based verdict for one item."""
+    text = f"{item.get('title', '')} {item.get('description', '')}"
     
-    for item in items:
-        text = f"{item.get('title', '')} {item.get('description', '')}".lower()
-        
-        # Check if it mentions an AI company
-        mentioned_company = None
-        for company in AI_COMPANIES_WATCHLIST:
-            if company.lower() in text:
-                mentioned_company = company
-                break
-        
-        # Check if it mentions layoffs
-        has_layoff = any(kw in text for kw in LAYOFF_KEYWORDS)
-        
-        if mentioned_company and has_layoff:
-            item["analysis"] = {
-                "company": mentioned_company,
-                "relevance": "HIGH",
-                "reasoning": f"Mentions {mentioned_company} and layoff keywords"
-            }
-            relevant_items.append(item)
-        elif has_layoff and any(kw in text for kw in AI_INDUSTRY_KEYWORDS):
-            item["analysis"] = {
-                "company": "Unknown AI company",
-                "relevance": "MEDIUM",
-                "reasoning": "Mentions AI industry and layoff keywords"
-            }
-            relevant_items.append(item)
-    
-    print(f"✓ Keyword analysis: {len(relevant_items)} relevant items")
-    return {"relevant_items": relevant_items, "forecast_update": None}
+    # Check if it mentions an AI company (first one mentioned)
+    mentioned_company = COMPANY_MATCHER.search(text)
+    
+    # Check if it mentions layoffs
+    has_layoff = LAYOFF_MATCHER.matches(text)
+    
+    if mentioned_company and has_layoff:
+        return {
+            "company": mentioned_company,
+            "relevance": "HIGH",
+            "reasoning": f"Mentions {mentioned_company} and layoff keywords"
+        }
+    elif has_layoff and AI_INDUSTRY_MATCHER.matches(text):
+        return {
+            "company": "Unknown AI company",
+            "relevance": "MEDIUM",
+            "reasoning": "Mentions AI industry and layoff keywords"
+        }
+    return {"company": None, "relevance": "LOW", "reasoning": "No AI company layoff keywords"}
 
 # =============================================================================
 # FORECAST UPDATE LOGIC
@@ -463,13 +438,9 @@ def run_monitor():
     all_items.extend(check_trueup_layoffs())
     
     # 3. Deduplicate
-    seen_hashes = set(state.get("seen_hashes", []))
-    unique_items = []
-    for item in all_items:
-        h = get_content_hash(item.get("title", "") + item.get("url", ""))
-        if h not in seen_hashes:
-            unique_items.append(item)
-            seen_hashes.add(h)
+    seen = seenstore.SeenStore(CONFIG["seen_namespace"])
+    seen.import_keys(state.pop("seen_hashes", []))  # one-off migration of the old list
+    unique_items = seen.filter_new(all_items, key=lambda item: get_content_hash(item.get("title", "") + item.get("url", "")))
     
     print(f"\n   Total items: {len(all_items)}, New items: {len(unique_items)}")
     
@@ -490,7 +461,9 @@ def run_monitor():
     print("\n" + alert_text)
     
     # 7. Update and save state
-    state["seen_hashes"] = list(seen_hashes)[-500:]
+    seen.expire()
+    seen.commit()
+    seen.close()
     state["cumulative_count"] = forecast_info["cumulative_count"]
     if relevant_items:
         state["forecast_history"].append({
@@ -585,7 +558,9 @@ if __name__ == "__main__":
     parser.add_argument("--quick", action="store_true", help="Quick check with Claude")
     parser.add_argument("--update-count", type=int, help="Manually update cumulative count")
     parser.add_argument("--status", action="store_true", help="Show current status")
+    parser.add_argument("--offline", action="store_true", help="Score items with the local keyword backend instead of Claude")
     args = parser.parse_args()
+    CONFIG["offline"] = args.offline
     
     if args.quick:
         quick_check()
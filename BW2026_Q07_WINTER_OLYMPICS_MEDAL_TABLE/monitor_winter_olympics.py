@@ -1,7 +1,10 @@
-import requests, feedparser, json, time
+import requests, feedparser, json, os, sys
 from datetime import datetime, timedelta
 from urllib.parse import quote
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import webfetch
+
 NEWS_KEYWORDS = [
     "Norway ski team injury",
     "biathlon Germany World Cup",
@@ -44,11 +47,10 @@ def fetch_polymarket():
     except Exception as e:
         return [{"error": str(e)}]
 
-def fetch_google_news(query, days=7, limit=10):
-    url = f"https://news.google.com/rss/search?q={quote(query)}+when:{days}d&hl=en-US&gl=US&ceid=US:en"
-    feed = feedparser.parse(url)
+def parse_news_feed(body):
+    feed = feedparser.parse(body)
     items = []
-    for entry in feed.entries[:limit]:
+    for entry in feed.entries:
         items.append({
             "title": entry.get("title", ""),
             "link": entry.get("link", ""),
@@ -56,6 +58,14 @@ def fetch_google_news(query, days=7, limit=10):
         })
     return items
 
+def fetch_google_news(query, days=7, limit=10):
+    url = f"https://news.google.com/rss/search?q={quote(query)}+when:{days}d&hl=en-US&gl=US&ceid=US:en"
+    # conditional GET through the shared cache; spacing comes from the per-host limiter
+    try:
+        return webfetch.fetch(url, parse=parse_news_feed)[:limit]
+    except requests.RequestException:
+        return []
+
 def run_once():
     report = {"timestamp": datetime.utcnow().isoformat()}
     report["polymarket"] = fetch_polymarket()
@@ -64,7 +74,6 @@ def run_once():
         hits = fetch_google_news(kw, days=7, limit=5)
         if hits:
             news_hits.append({"keyword": kw, "results": hits})
-        time.sleep(0.5)
     report["news"] = news_hits
     print(json.dumps(report, indent=2))
 
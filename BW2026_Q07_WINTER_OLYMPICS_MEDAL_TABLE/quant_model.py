@@ -1,10 +1,15 @@
+import argparse
+import os
+import sys
+
 import numpy as np
-import matplotlib.pyplot as plt
 
-rng = np.random.default_rng(42)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import plotting
+
 n = 100000
 
-def sample_trunc_norm(mu, sigma, size):
+def sample_trunc_norm(rng, mu, sigma, size):
     x = rng.normal(mu, sigma, size)
     return np.clip(x, 0, None)
 
@@ -24,42 +29,66 @@ sigmas = {
     "Italy":1.5,
     "Other":3
 }
-
-samples = {k: sample_trunc_norm(mus[k], sigmas[k], n) for k in mus}
 countries = list(mus.keys())
 
-gold_matrix = np.vstack([samples[c] for c in countries]).T
-winners = []
-for row in gold_matrix:
-    top = np.max(row)
-    idxs = np.where(row == top)[0]
-    if len(idxs) == 1:
-        winners.append(countries[idxs[0]])
-    else:
-        subset = [countries[i] for i in idxs]
-        winners.append(sorted(subset)[0])
-win_counts = {c:0 for c in countries}
-for w in winners:
-    win_counts[w] += 1
-win_probs = {k: v/n for k,v in win_counts.items()}
-
-print("Winner probabilities:")
-for k,v in win_probs.items():
-    print(f"{k}: {v*100:.1f}%")
-
-fig, ax = plt.subplots(figsize=(10,6))
-for c in countries:
-    ax.hist(samples[c], bins=40, alpha=0.4, label=c, density=True)
-ax.set_xlabel("Gold medals")
-ax.set_ylabel("Density")
-ax.set_title("Gold Medal Distribution Samples")
-ax.legend()
-plt.tight_layout()
-plt.savefig("gold_distribution.png", dpi=150)
-
-fig2, ax2 = plt.subplots(figsize=(8,5))
-ax2.bar(win_probs.keys(), [win_probs[c]*100 for c in win_probs.keys()], color="steelblue")
-ax2.set_ylabel("Win Probability (%)")
-ax2.set_title("Simulated Medal-Table Win Probabilities")
-plt.tight_layout()
-plt.savefig("winner_share.png", dpi=150)
+def rank_distribution(gold_matrix, countries):
+    # Stable sort of alphabetically ordered columns breaks ties alphabetically
+    alpha = np.array(sorted(range(len(countries)), key=countries.__getitem__))
+    order = alpha[np.argsort(-gold_matrix[:, alpha], axis=1, kind="stable")]
+    n_draws, n_countries = gold_matrix.shape
+    rank_probs = np.empty((n_countries, n_countries))
+    for k in range(n_countries):
+        rank_probs[:, k] = np.bincount(order[:, k], minlength=n_countries) / n_draws
+    return order, rank_probs
+
+def plot_distributions(hists, countries, win_probs):
+    plt = plotting.pyplot()
+    fig, ax = plt.subplots(figsize=(10,6))
+    for c in countries:
+        hists[c].draw(ax, density=True, alpha=0.4, label=c)
+    ax.set_xlabel("Gold medals")
+    ax.set_ylabel("Density")
+    ax.set_title("Gold Medal Distribution Samples")
+    ax.legend()
+    plt.tight_layout()
+    plt.savefig("gold_distribution.png", dpi=150)
+
+    fig2, ax2 = plt.subplots(figsize=(8,5))
+    ax2.bar(win_probs.keys(), [win_probs[c]*100 for c in win_probs.keys()], color="steelblue")
+    ax2.set_ylabel("Win Probability (%)")
+    ax2.set_title("Simulated Medal-Table Win Probabilities")
+    plt.tight_layout()
+    plt.savefig("winner_share.png", dpi=150)
+    plt.close("all")
+
+def run():
+    rng = np.random.default_rng(42)
+    samples = {k: sample_trunc_norm(rng, mus[k], sigmas[k], n) for k in mus}
+    gold_matrix = np.vstack([samples[c] for c in countries]).T
+    order, rank_probs = rank_distribution(gold_matrix, countries)
+    win_probs = {c: rank_probs[i, 0] for i, c in enumerate(countries)}
+
+    print("Winner probabilities:")
+    for k,v in win_probs.items():
+        print(f"{k}: {v*100:.1f}%")
+
+    print("\nRank probabilities (%):")
+    print(f"{'':15}" + "".join(f"{'#' + str(k + 1):>8}" for k in range(len(countries))))
+    for i, c in enumerate(countries):
+        print(f"{c:15}" + "".join(f"{p * 100:8.1f}" for p in rank_probs[i]))
+
+    hists = {c: plotting.Histogram.of(samples[c], 40) for c in countries}
+    plotting.render(plot_distributions, hists, countries, win_probs)
+    return win_probs, rank_probs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Q07 model: Winter Olympics gold-medal table")
+    plotting.add_arguments(parser)
+    plotting.configure(parser.parse_args())
+
+    run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,16 @@
-import csv
+import argparse
 import json
 import os
 import re
+import sys
 from datetime import datetime
 
 import numpy as np
-import matplotlib.pyplot as plt
-from pypdf import PdfReader
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import pdf_text, plotting, quantiles, tsstore
+
+ISM_ID = "ISM/MANUFACTURING_PMI"
 
 MONTH_FULL = {
     1: "January",
@@ -24,24 +28,16 @@ MONTH_FULL = {
 }
 
 
-def load_ism_series(path, start_year=2000):
-    rows = []
-    with open(path) as f:
-        r = csv.DictReader(f)
-        for row in r:
-            y = int(row["ref_year"])
-            if y < start_year:
-                continue
-            rows.append((y, int(row["ref_month"]), float(row["value"])))
-    rows.sort()
-    return rows
+def load_ism_series(folder, start_year=2000):
+    dates, values = tsstore.load_or_import(ISM_ID, os.path.join(folder, "ism_pmi_history.csv"), tsstore.parse_ref_month_csv)
+    keep = dates >= np.datetime64(f"{start_year:04d}-01-01")
+    months = dates[keep].astype("datetime64[M]").astype(np.int64)
+    return list(zip((months // 12 + 1970).tolist(), (months % 12 + 1).tolist(), values[keep].tolist()))
 
 
 def extract_spglobal_value_for_month(pdf_path, ref_month):
     month_name = MONTH_FULL[ref_month]
-    reader = PdfReader(pdf_path)
-    text = "\n".join([(p.extract_text() or "") for p in reader.pages])
-    m = re.search(rf"(?:registered|recorded)\s+(\d{{2}}\.\d)\s+in\s+{month_name}", text, flags=re.I)
+    m, text = pdf_text.search_text(pdf_path, rf"(?:registered|recorded)\s+(\d{{2}}\.\d)\s+in\s+{month_name}", flags=re.I)
     if m:
         return float(m.group(1))
     idx = text.lower().find(month_name.lower())
@@ -55,9 +51,44 @@ def extract_spglobal_value_for_month(pdf_path, ref_month):
     return None
 
 
-def main():
-    folder = os.path.dirname(__file__)
-    ism_rows = load_ism_series(os.path.join(folder, "ism_pmi_history.csv"), start_year=2000)
+def plot_base_rate(folder, base_hist, cond_hist, out):
+    plt = plotting.pyplot()
+    plt.figure(figsize=(9, 5))
+    base_hist.draw(plt, density=True, color="teal", alpha=0.85)
+    for x in [out["spglobal_feb_base_rate"]["p25"], out["spglobal_feb_base_rate"]["p50"], out["spglobal_feb_base_rate"]["p75"]]:
+        plt.axvline(x, color="black", linestyle="--", linewidth=1)
+    plt.title("Base Rate (Proxy): S&P Global US Manufacturing PMI (Feb)")
+    plt.xlabel("PMI")
+    plt.ylabel("Density")
+    plt.tight_layout()
+    plt.savefig(os.path.join(folder, "base_rate_distribution.png"), dpi=150)
+    plt.close()
+
+    if cond_hist is not None:
+        plt.figure(figsize=(9, 5))
+        cond_hist.draw(plt, density=True, color="darkslateblue", alpha=0.85)
+        for x in [out["conditional_2m_ahead_base_rate"]["p25"], out["conditional_2m_ahead_base_rate"]["p50"], out["conditional_2m_ahead_base_rate"]["p75"]]:
+            plt.axvline(x, color="black", linestyle="--", linewidth=1)
+        plt.title("Conditional Base Rate (Proxy): 2 Months Ahead")
+        plt.xlabel("PMI")
+        plt.ylabel("Density")
+        plt.tight_layout()
+        plt.savefig(os.path.join(folder, "conditional_base_rate_distribution.png"), dpi=150)
+        plt.close()
+
+
+def load_inputs(folder):
+    return {
+        "ism_rows": load_ism_series(folder, start_year=2000),
+        "sp_nov": extract_spglobal_value_for_month(os.path.join(folder, "spglobal_us_mfg_pmi_2025_11_final.pdf"), 11),
+        "sp_dec": extract_spglobal_value_for_month(os.path.join(folder, "spglobal_us_mfg_pmi_2025_12_final.pdf"), 12),
+    }
+
+
+def run(folder=None, inputs=None, write=True):
+    folder = folder or os.path.dirname(__file__)
+    inputs = inputs or load_inputs(folder)
+    ism_rows = inputs["ism_rows"]
     ism_vals = np.array([v for _, _, v in ism_rows], dtype=float)
     ism_last = float(ism_vals[-1])
     feb_vals = np.array([v for y, m, v in ism_rows if m == 2], dtype=float)
@@ -65,8 +96,8 @@ def main():
         feb_vals = ism_vals
 
     ism_map = {(y, m): v for y, m, v in ism_rows}
-    sp_nov = extract_spglobal_value_for_month(os.path.join(folder, "spglobal_us_mfg_pmi_2025_11_final.pdf"), 11)
-    sp_dec = extract_spglobal_value_for_month(os.path.join(folder, "spglobal_us_mfg_pmi_2025_12_final.pdf"), 12)
+    sp_nov = inputs["sp_nov"]
+    sp_dec = inputs["sp_dec"]
     offsets = []
     if sp_nov is not None and (2025, 11) in ism_map:
         offsets.append(sp_nov - ism_map[(2025, 11)])
@@ -107,17 +138,11 @@ def main():
             "n": int(len(feb_vals)),
             "mean": float(feb_vals.mean()),
             "sd": float(feb_vals.std()),
-            "p10": float(np.percentile(feb_vals, 10)),
-            "p50": float(np.percentile(feb_vals, 50)),
-            "p90": float(np.percentile(feb_vals, 90)),
+            **quantiles.percentiles(feb_vals, (10, 50, 90)),
         },
         "spglobal_feb_base_rate": {
             "mean": float(base.mean()),
-            "p5": float(np.percentile(base, 5)),
-            "p25": float(np.percentile(base, 25)),
-            "p50": float(np.percentile(base, 50)),
-            "p75": float(np.percentile(base, 75)),
-            "p95": float(np.percentile(base, 95)),
+            **quantiles.percentiles(base),
         },
         "conditional_2m_ahead_base_rate": None,
     }
@@ -126,39 +151,25 @@ def main():
             "proxy_filter": {"abs_ism_current_minus_history_leq": band, "ism_current": ism_last},
             "n_hist_points": int(len(future_2m)),
             "mean": float(cond.mean()),
-            "p5": float(np.percentile(cond, 5)),
-            "p25": float(np.percentile(cond, 25)),
-            "p50": float(np.percentile(cond, 50)),
-            "p75": float(np.percentile(cond, 75)),
-            "p95": float(np.percentile(cond, 95)),
+            **quantiles.percentiles(cond),
         }
 
-    with open(os.path.join(folder, "base_rate_output.json"), "w") as f:
-        json.dump(out, f, indent=2)
+    if write:
+        with open(os.path.join(folder, "base_rate_output.json"), "w") as f:
+            json.dump(out, f, indent=2)
 
-    plt.figure(figsize=(9, 5))
-    plt.hist(base, bins=70, color="teal", alpha=0.85, density=True)
-    for x in [out["spglobal_feb_base_rate"]["p25"], out["spglobal_feb_base_rate"]["p50"], out["spglobal_feb_base_rate"]["p75"]]:
-        plt.axvline(x, color="black", linestyle="--", linewidth=1)
-    plt.title("Base Rate (Proxy): S&P Global US Manufacturing PMI (Feb)")
-    plt.xlabel("PMI")
-    plt.ylabel("Density")
-    plt.tight_layout()
-    plt.savefig(os.path.join(folder, "base_rate_distribution.png"), dpi=150)
-    plt.close()
+        cond_hist = plotting.Histogram.of(cond, 70) if cond is not None else None
+        plotting.render(plot_base_rate, folder, plotting.Histogram.of(base, 70), cond_hist, out)
 
-    if cond is not None:
-        plt.figure(figsize=(9, 5))
-        plt.hist(cond, bins=70, color="darkslateblue", alpha=0.85, density=True)
-        for x in [out["conditional_2m_ahead_base_rate"]["p25"], out["conditional_2m_ahead_base_rate"]["p50"], out["conditional_2m_ahead_base_rate"]["p75"]]:
-            plt.axvline(x, color="black", linestyle="--", linewidth=1)
-        plt.title("Conditional Base Rate (Proxy): 2 Months Ahead")
-        plt.xlabel("PMI")
-        plt.ylabel("Density")
-        plt.tight_layout()
-        plt.savefig(os.path.join(folder, "conditional_base_rate_distribution.png"), dpi=150)
-        plt.close()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Q09 base rates: S&P Global US manufacturing PMI (Feb)")
+    plotting.add_arguments(parser)
+    plotting.configure(parser.parse_args())
 
+    out = run()
     print(json.dumps(out, indent=2))
 
 
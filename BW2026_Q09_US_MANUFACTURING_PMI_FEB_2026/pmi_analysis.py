@@ -1,12 +1,46 @@
+import argparse
+import json
 import os
 import subprocess
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import plotting
+
+STAGES = ["base_rate_calc.py", "quant_model.py"]
+
+
+def run_subprocess(folder):
+    for name in STAGES:
+        subprocess.check_call([sys.executable, os.path.join(folder, name)])
+
+
+def run_in_process(folder, checkpoint=True):
+    # Both stages read the same ISM series and S&P Global PDFs; load them once
+    import base_rate_calc
+    import quant_model
+
+    inputs = quant_model.load_inputs(folder)
+    base = base_rate_calc.run(folder, inputs=inputs, write=checkpoint)
+    print(json.dumps(base, indent=2))
+    out = quant_model.run(folder, inputs=inputs)
+    print(json.dumps(out, indent=2))
+    return out
+
 
 def main():
-    folder = os.path.dirname(__file__)
-    subprocess.check_call([sys.executable, os.path.join(folder, "base_rate_calc.py")])
-    subprocess.check_call([sys.executable, os.path.join(folder, "quant_model.py")])
+    parser = argparse.ArgumentParser(description="Run the Q09 base-rate and model stages")
+    parser.add_argument("--subprocess", action="store_true", help="run each stage as a separate script")
+    parser.add_argument("--no-checkpoint", action="store_true", help="do not write base_rate_output.json and its plots")
+    plotting.add_arguments(parser)
+    args = parser.parse_args()
+    plotting.configure(args)
+
+    folder = os.path.dirname(os.path.abspath(__file__))
+    if args.subprocess:
+        run_subprocess(folder)
+    else:
+        run_in_process(folder, checkpoint=not args.no_checkpoint)
 
 
 if __name__ == "__main__":
@@ -1,12 +1,19 @@
 import csv
+import os
 import re
+import sys
 import time
 import io
 from datetime import datetime
 
+import numpy as np
 import requests
 from bs4 import BeautifulSoup
-from pypdf import PdfReader
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import pdf_text, tsstore
+
+ISM_ID = "ISM/MANUFACTURING_PMI"
 
 UA = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 MONTH_MAP = {"Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6, "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12}
@@ -39,9 +46,7 @@ def fetch_spglobal_pdfs(out_dir):
 
 
 def extract_spglobal_values(pdf_path):
-    reader = PdfReader(pdf_path)
-    text = "\n".join([(p.extract_text() or "") for p in reader.pages])
-    m = re.search(r"recorded\s+(\d{2}\.\d)\s+in\s+December", text, flags=re.I)
+    m, text = pdf_text.search_text(pdf_path, r"recorded\s+(\d{2}\.\d)\s+in\s+December", flags=re.I)
     if m:
         return {"ref_year": 2025, "ref_month": 12, "value": float(m.group(1)), "source": pdf_path}
     m = re.search(r"recorded\s+(\d{2}\.\d)\s+in\s+November", text, flags=re.I)
@@ -184,6 +189,10 @@ def main():
         w.writeheader()
         w.writerows(ism_series)
 
+    ism_dates = np.array([f"{r['ref_year']:04d}-{r['ref_month']:02d}-01" for r in ism_series], dtype="datetime64[D]")
+    ism_vals = np.array([r["value"] for r in ism_series], dtype=float)
+    tsstore.append_series(ISM_ID, ism_dates, ism_vals, source="investing.com event 173")
+
 
 if __name__ == "__main__":
     main()
@@ -1,12 +1,20 @@
+import argparse
 import csv
 import json
 import os
 import re
+import sys
 from datetime import datetime
 
 import numpy as np
-import matplotlib.pyplot as plt
-from pypdf import PdfReader
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import ar1, montecarlo, pdf_text, plotting, quantiles, tsstore, variance
+
+ISM_ID = "ISM/MANUFACTURING_PMI"
+TAILS_LT = (49.0, 50.0)
+TAILS_GT = (56.0,)
+TAIL_KEYS = [f"p_lt_{t:g}" for t in TAILS_LT] + [f"p_gt_{t:g}" for t in TAILS_GT]
 
 MONTH_FULL = {
     1: "January",
@@ -24,24 +32,16 @@ MONTH_FULL = {
 }
 
 
-def load_ism_series(path, start_year=2000):
-    rows = []
-    with open(path) as f:
-        r = csv.DictReader(f)
-        for row in r:
-            y = int(row["ref_year"])
-            if y < start_year:
-                continue
-            rows.append((y, int(row["ref_month"]), float(row["value"])))
-    rows.sort()
-    return rows
+def load_ism_series(folder, start_year=2000):
+    dates, values = tsstore.load_or_import(ISM_ID, os.path.join(folder, "ism_pmi_history.csv"), tsstore.parse_ref_month_csv)
+    keep = dates >= np.datetime64(f"{start_year:04d}-01-01")
+    months = dates[keep].astype("datetime64[M]").astype(np.int64)
+    return list(zip((months // 12 + 1970).tolist(), (months % 12 + 1).tolist(), values[keep].tolist()))
 
 
 def extract_spglobal_value_for_month(pdf_path, ref_month):
     month_name = MONTH_FULL[ref_month]
-    reader = PdfReader(pdf_path)
-    text = "\n".join([(p.extract_text() or "") for p in reader.pages])
-    m = re.search(rf"(?:registered|recorded)\s+(\d{{2}}\.\d)\s+in\s+{month_name}", text, flags=re.I)
+    m, text = pdf_text.search_text(pdf_path, rf"(?:registered|recorded)\s+(\d{{2}}\.\d)\s+in\s+{month_name}", flags=re.I)
     if m:
         return float(m.group(1))
     idx = text.lower().find(month_name.lower())
@@ -65,41 +65,87 @@ def fit_ar1(values):
     return a, b, sigma
 
 
-def simulate_ar1(a, b, sigma, last_value, steps, n, rng):
-    s = np.full(n, float(last_value), dtype=float)
-    for _ in range(steps):
-        s = a * s + b + rng.normal(0, sigma, size=n)
-    return s
-
-
-def mixture_sample(components, weights, rng):
-    weights = np.asarray(weights, dtype=float)
-    weights = weights / weights.sum()
-    n = len(components[0])
-    u = rng.random(n)
-    out = np.empty(n, dtype=float)
-    cdf = np.cumsum(weights)
-    start = 0.0
-    for i, stop in enumerate(cdf):
-        mask = (u >= start) & (u < stop)
-        out[mask] = components[i][mask]
-        start = stop
-    out[u >= cdf[-1]] = components[-1][u >= cdf[-1]]
+def simulate_ar1(a, b, sigma, last_value, steps, n, rng, method="exact"):
+    return ar1.sample(a, b, sigma, last_value, steps, n, rng, method=method)
+
+
+def simulate(rng, n, p):
+    def ar_offset(rng, m):
+        ism_feb = simulate_ar1(p["a"], p["b"], p["sigma"], p["ism_last"], steps=2, n=m, rng=rng)
+        return ism_feb + rng.normal(p["off_mu"], p["off_sd"], size=m)
+
+    def persistence(rng, m):
+        ism_feb = simulate_ar1(p["a"], p["b"], p["sigma"], p["ism_last"], steps=2, n=m, rng=rng)
+        return p["sp_last"] + (ism_feb - p["ism_last"]) + rng.normal(0, 1.1, size=m)
+
+    def seasonal(rng, m):
+        return rng.normal(p["feb_mu"], p["feb_sd"], size=m) + rng.normal(p["off_mu"], p["off_sd"], size=m)
+
+    ensemble, start = montecarlo.sample_mixture(rng, n, [0.55, 0.30, 0.15], [ar_offset, persistence, seasonal])
+    out = {c: ensemble[start[i] : start[i + 1]] for i, c in enumerate(["ar_offset", "persistence", "seasonal"])}
+    out["ensemble"] = np.clip(ensemble, 30, 70)
+    if p.get("control_variates"):
+        # the unclipped mixture draw has a known mean
+        hits = [out["ensemble"] < t for t in TAILS_LT] + [out["ensemble"] > t for t in TAILS_GT]
+        for k, hit in zip(TAIL_KEYS, hits):
+            out[k] = variance.control_variate(hit, ensemble, p["mixture_mean"])
     return out
 
 
-def main():
-    folder = os.path.dirname(__file__)
-    rng = np.random.default_rng(42)
-    n = 300000
+def plot_forecast(folder, ism_rows, ism_values, hist, percentiles, component_means):
+    plt = plotting.pyplot()
+    years = np.array([y + (m - 1) / 12.0 for y, m, _ in ism_rows], dtype=float)
+    plt.figure(figsize=(10, 5))
+    plt.plot(years, ism_values, color="steelblue", linewidth=1)
+    plt.axhline(50, color="gray", linestyle="--", linewidth=1)
+    plt.title("ISM Manufacturing PMI (proxy) History")
+    plt.xlabel("Year")
+    plt.ylabel("PMI")
+    plt.tight_layout()
+    plt.savefig(os.path.join(folder, "ism_history.png"), dpi=150)
+    plt.close()
+
+    plt.figure(figsize=(9, 5))
+    hist.draw(plt, density=True, color="slateblue", alpha=0.85)
+    for x in percentiles.values():
+        plt.axvline(x, color="black", linestyle="--", linewidth=1)
+    plt.title("Forecast Distribution: S&P Global US Manufacturing PMI (Feb 2026)")
+    plt.xlabel("PMI")
+    plt.ylabel("Density")
+    plt.tight_layout()
+    plt.savefig(os.path.join(folder, "forecast_distribution.png"), dpi=150)
+    plt.close()
+
+    labels = ["AR(1)+offset", "Persistence", "Seasonal"]
+    plt.figure(figsize=(8, 4))
+    plt.bar(labels, component_means, color=["#4c78a8", "#f58518", "#54a24b"])
+    plt.axhline(50, color="gray", linestyle="--", linewidth=1)
+    plt.title("Component Means (PMI)")
+    plt.ylabel("PMI")
+    plt.tight_layout()
+    plt.savefig(os.path.join(folder, "component_means.png"), dpi=150)
+    plt.close()
+
 
-    ism_rows = load_ism_series(os.path.join(folder, "ism_pmi_history.csv"), start_year=2000)
+def load_inputs(folder):
+    return {
+        "ism_rows": load_ism_series(folder, start_year=2000),
+        "sp_nov": extract_spglobal_value_for_month(os.path.join(folder, "spglobal_us_mfg_pmi_2025_11_final.pdf"), 11),
+        "sp_dec": extract_spglobal_value_for_month(os.path.join(folder, "spglobal_us_mfg_pmi_2025_12_final.pdf"), 12),
+    }
+
+
+def run(folder=None, inputs=None, write=True, draws=None, chunk_size=None, workers=None, seed=42, sampling="plain", control_variates=False):
+    folder = folder or os.path.dirname(__file__)
+    inputs = inputs or load_inputs(folder)
+
+    ism_rows = inputs["ism_rows"]
     ism_values = np.array([v for _, _, v in ism_rows], dtype=float)
     ism_map = {(y, m): v for y, m, v in ism_rows}
     ism_last = float(ism_values[-1])
 
-    sp_nov = extract_spglobal_value_for_month(os.path.join(folder, "spglobal_us_mfg_pmi_2025_11_final.pdf"), 11)
-    sp_dec = extract_spglobal_value_for_month(os.path.join(folder, "spglobal_us_mfg_pmi_2025_12_final.pdf"), 12)
+    sp_nov = inputs["sp_nov"]
+    sp_dec = inputs["sp_dec"]
     sp_last = sp_dec if sp_dec is not None else (sp_nov if sp_nov is not None else 52.0)
 
     offsets = []
@@ -113,7 +159,7 @@ def main():
     off_sd = max(off_sd, 0.8)
 
     a, b, sigma = fit_ar1(ism_values)
-    ism_feb = simulate_ar1(a, b, sigma, ism_last, steps=2, n=n, rng=rng)
+    ism_feb_mean, ism_feb_sd = ar1.moments(a, b, sigma, ism_last, steps=2)
 
     feb_hist = np.array([v for y, m, v in ism_rows if m == 2], dtype=float)
     if len(feb_hist) < 10:
@@ -122,80 +168,84 @@ def main():
     feb_sd = float(feb_hist.std())
     feb_sd = max(feb_sd, 1.6)
 
-    comp_ar_offset = ism_feb + rng.normal(off_mu, off_sd, size=n)
-    comp_persist = sp_last + (ism_feb - ism_last) + rng.normal(0, 1.1, size=n)
-    comp_seasonal = rng.normal(feb_mu, feb_sd, size=n) + rng.normal(off_mu, off_sd, size=n)
-
-    ensemble = mixture_sample([comp_ar_offset, comp_persist, comp_seasonal], weights=[0.55, 0.30, 0.15], rng=rng)
-    ensemble = np.clip(ensemble, 30, 70)
-
-    percentiles = {
-        "p5": float(np.percentile(ensemble, 5)),
-        "p25": float(np.percentile(ensemble, 25)),
-        "p50": float(np.percentile(ensemble, 50)),
-        "p75": float(np.percentile(ensemble, 75)),
-        "p95": float(np.percentile(ensemble, 95)),
-    }
-    tail_probs = {
-        "p_lt_49": float(np.mean(ensemble < 49.0)),
-        "p_lt_50": float(np.mean(ensemble < 50.0)),
-        "p_gt_56": float(np.mean(ensemble > 56.0)),
+    mixture_mean = float(np.dot([0.55, 0.30, 0.15], [ism_feb_mean + off_mu, sp_last + ism_feb_mean - ism_last, feb_mu + off_mu]))
+
+    params = {
+        "a": a,
+        "b": b,
+        "sigma": sigma,
+        "ism_last": ism_last,
+        "sp_last": sp_last,
+        "off_mu": off_mu,
+        "off_sd": off_sd,
+        "feb_mu": feb_mu,
+        "feb_sd": feb_sd,
+        "mixture_mean": mixture_mean,
+        "control_variates": control_variates,
     }
+    components = ["ar_offset", "persistence", "seasonal"]
+    if sampling != "plain" or control_variates:
+        draws = draws or 300000
+    if draws:
+        specs = {"ensemble": {"lt": TAILS_LT, "gt": TAILS_GT}, **{c: {"sketch": False} for c in components}}
+        if control_variates:
+            specs.update({k: {"sketch": False} for k in TAIL_KEYS})
+        res = montecarlo.run_chunked(simulate, draws, params, specs, seed=seed, chunk_size=chunk_size, workers=workers, sampling=sampling)
+        summary = res["ensemble"]
+        percentiles = summary.percentiles()
+        component_means = [res[c].mean for c in components]
+    else:
+        sim = simulate(np.random.default_rng(seed), 300000, params)
+        ensemble = sim["ensemble"]
+        summary = montecarlo.Summary(lt=TAILS_LT, gt=TAILS_GT, sketch=False).add(ensemble)
+        percentiles = quantiles.percentiles(ensemble)
+        component_means = [float(sim[c].mean()) for c in components]
+    tail_probs = summary.tail_probs()
+    standard_errors = summary.standard_errors()
+    if control_variates:
+        tail_probs = {k: res[k].mean for k in TAIL_KEYS}
+        standard_errors.update({k: res[k].standard_errors()["mean"] for k in TAIL_KEYS})
+    forecast_mean = summary.mean
 
     out = {
         "as_of_utc": datetime.utcnow().isoformat(),
         "target": "S&P Global US Manufacturing PMI (Feb 2026 final)",
         "inputs": {"spglobal_known": {"2025-11": sp_nov, "2025-12": sp_dec}, "spglobal_last": sp_last, "ism_last": ism_last},
         "offset_assumption": {"mean": off_mu, "sd": off_sd, "raw": offsets.tolist()},
-        "ism_ar1": {"a": a, "b": b, "sigma": sigma},
+        "ism_ar1": {"a": a, "b": b, "sigma": sigma, "feb_2step": {"mean": ism_feb_mean, "sd": ism_feb_sd}},
         "ensemble_weights": {"ar_offset": 0.55, "persistence": 0.30, "seasonal": 0.15},
         "forecast_percentiles": percentiles,
         "tail_probs": tail_probs,
-        "forecast_mean": float(ensemble.mean()),
+        "forecast_mean": forecast_mean,
+        "standard_errors": {"forecast_mean": standard_errors.pop("mean"), **standard_errors},
     }
+    if draws:
+        out["simulation"] = montecarlo.layout(draws, chunk_size, seed, sampling, control_variates)
 
-    with open(os.path.join(folder, "forecast_output.json"), "w") as f:
-        json.dump(out, f, indent=2)
+    if write:
+        with open(os.path.join(folder, "forecast_output.json"), "w") as f:
+            json.dump(out, f, indent=2)
 
-    with open(os.path.join(folder, "forecast_percentiles.csv"), "w", newline="") as f:
-        w = csv.writer(f)
-        w.writerow(["percentile", "value"])
-        for k in ["p5", "p25", "p50", "p75", "p95"]:
-            w.writerow([k, percentiles[k]])
+        with open(os.path.join(folder, "forecast_percentiles.csv"), "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["percentile", "value"])
+            for k in ["p5", "p25", "p50", "p75", "p95"]:
+                w.writerow([k, percentiles[k]])
 
-    years = np.array([y + (m - 1) / 12.0 for y, m, _ in ism_rows], dtype=float)
-    plt.figure(figsize=(10, 5))
-    plt.plot(years, ism_values, color="steelblue", linewidth=1)
-    plt.axhline(50, color="gray", linestyle="--", linewidth=1)
-    plt.title("ISM Manufacturing PMI (proxy) History")
-    plt.xlabel("Year")
-    plt.ylabel("PMI")
-    plt.tight_layout()
-    plt.savefig(os.path.join(folder, "ism_history.png"), dpi=150)
-    plt.close()
+        hist = summary.histogram(75) if draws else plotting.Histogram.of(ensemble, 75)
+        plotting.render(plot_forecast, folder, ism_rows, ism_values, hist, percentiles, component_means)
 
-    plt.figure(figsize=(9, 5))
-    plt.hist(ensemble, bins=75, color="slateblue", alpha=0.85, density=True)
-    for x in percentiles.values():
-        plt.axvline(x, color="black", linestyle="--", linewidth=1)
-    plt.title("Forecast Distribution: S&P Global US Manufacturing PMI (Feb 2026)")
-    plt.xlabel("PMI")
-    plt.ylabel("Density")
-    plt.tight_layout()
-    plt.savefig(os.path.join(folder, "forecast_distribution.png"), dpi=150)
-    plt.close()
+    return out
 
-    labels = ["AR(1)+offset", "Persistence", "Seasonal"]
-    means = [float(comp_ar_offset.mean()), float(comp_persist.mean()), float(comp_seasonal.mean())]
-    plt.figure(figsize=(8, 4))
-    plt.bar(labels, means, color=["#4c78a8", "#f58518", "#54a24b"])
-    plt.axhline(50, color="gray", linestyle="--", linewidth=1)
-    plt.title("Component Means (PMI)")
-    plt.ylabel("PMI")
-    plt.tight_layout()
-    plt.savefig(os.path.join(folder, "component_means.png"), dpi=150)
-    plt.close()
 
+def main():
+    parser = argparse.ArgumentParser(description="Q09 model: S&P Global US manufacturing PMI (Feb 2026)")
+    plotting.add_arguments(parser)
+    montecarlo.add_arguments(parser, control_variates=True)
+    args = parser.parse_args()
+    plotting.configure(args)
+
+    out = run(**montecarlo.options(args))
     print(json.dumps(out, indent=2))
 
 
@@ -1,14 +1,16 @@
 import csv
-import io
 import json
 import os
 import re
+import sys
 import time
 from datetime import datetime
 
 import requests
 from bs4 import BeautifulSoup
-from pypdf import PdfReader
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import pdf_text
 
 UA = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 
@@ -45,11 +47,8 @@ def find_investor_presentation_pdf(fin_results_url):
 
 
 def extract_china_share_from_presentation_pdf(pdf_bytes):
-    reader = PdfReader(io.BytesIO(pdf_bytes))
-    text = "\n".join([(p.extract_text() or "") for p in reader.pages])
-    idx = text.lower().find("region (ship to location)")
-    if idx < 0:
-        idx = text.lower().find("ship to location")
+    m, text = pdf_text.search_text(pdf_bytes, r"region \(ship to location\)", flags=re.I, tail_chars=800)
+    idx = m.start() if m else text.lower().find("ship to location")
     if idx < 0:
         return None
     window = text[idx : idx + 800]
@@ -1,10 +1,14 @@
+import argparse
 import csv
 import json
 import os
+import sys
 from datetime import datetime
 
 import numpy as np
-import matplotlib.pyplot as plt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import plotting, quantiles
 
 
 def quarter_to_idx(year, quarter):
@@ -54,7 +58,46 @@ def merge_points(points):
     return out
 
 
+def plot_base_rate(folder, idx, y, mu):
+    plt = plotting.pyplot()
+    x = np.arange(len(y))
+    labels = [idx_to_label(int(i)) for i in idx]
+    plt.figure(figsize=(10, 4.5))
+    plt.plot(x, y, marker="o", color="steelblue")
+    plt.ylim(0, 60)
+    plt.xticks(x, labels, rotation=45, ha="right")
+    plt.ylabel("China share of net system sales (%)")
+    plt.title("ASML: Net system sales share to China (ship-to location)")
+    plt.tight_layout()
+    plt.savefig(os.path.join(folder, "china_share_history.png"), dpi=150)
+    plt.close()
+
+    plt.figure(figsize=(8, 4.5))
+    plt.hist(y, bins=max(6, len(y)), color="teal", alpha=0.85)
+    plt.axvline(mu, color="black", linestyle="--", linewidth=1)
+    plt.title("Historical distribution (limited sample)")
+    plt.xlabel("China share (%)")
+    plt.ylabel("Count")
+    plt.tight_layout()
+    plt.savefig(os.path.join(folder, "base_rate_distribution.png"), dpi=150)
+    plt.close()
+
+    if len(y) >= 2:
+        plt.figure(figsize=(6, 5))
+        plt.scatter(y[:-1], y[1:], color="slateblue", alpha=0.9)
+        plt.xlabel("Previous quarter China share (%)")
+        plt.ylabel("Next quarter China share (%)")
+        plt.title("Quarter-to-quarter transitions (limited sample)")
+        plt.tight_layout()
+        plt.savefig(os.path.join(folder, "transition_scatter.png"), dpi=150)
+        plt.close()
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Q10 base rate: ASML China share of net system sales")
+    plotting.add_arguments(parser)
+    plotting.configure(parser.parse_args())
+
     folder = os.path.dirname(__file__)
     scraped = load_scraped_points(os.path.join(folder, "asml_china_share_history.csv"))
     points = merge_points(load_manual_points() + scraped)
@@ -72,13 +115,7 @@ def main():
     recent = y[-4:] if len(y) >= 4 else y
     last = float(y[-1])
 
-    q = {
-        "p5": float(np.percentile(y, 5)),
-        "p25": float(np.percentile(y, 25)),
-        "p50": float(np.percentile(y, 50)),
-        "p75": float(np.percentile(y, 75)),
-        "p95": float(np.percentile(y, 95)),
-    }
+    q = quantiles.percentiles(y)
 
     mu = float(y.mean())
     sd = float(y.std(ddof=1)) if len(y) > 1 else 0.0
@@ -97,9 +134,7 @@ def main():
             "abs_prev_minus_last_leq": band,
             "n": int(len(next_vals)),
             "mean": float(next_vals.mean()),
-            "p25": float(np.percentile(next_vals, 25)),
-            "p50": float(np.percentile(next_vals, 50)),
-            "p75": float(np.percentile(next_vals, 75)),
+            **quantiles.percentiles(next_vals, (25, 50, 75)),
         }
 
     out = {
@@ -116,37 +151,7 @@ def main():
     with open(os.path.join(folder, "base_rate_output.json"), "w") as f:
         json.dump(out, f, indent=2)
 
-    x = np.arange(len(y))
-    labels = [idx_to_label(int(i)) for i in idx]
-    plt.figure(figsize=(10, 4.5))
-    plt.plot(x, y, marker="o", color="steelblue")
-    plt.ylim(0, 60)
-    plt.xticks(x, labels, rotation=45, ha="right")
-    plt.ylabel("China share of net system sales (%)")
-    plt.title("ASML: Net system sales share to China (ship-to location)")
-    plt.tight_layout()
-    plt.savefig(os.path.join(folder, "china_share_history.png"), dpi=150)
-    plt.close()
-
-    plt.figure(figsize=(8, 4.5))
-    plt.hist(y, bins=max(6, len(y)), color="teal", alpha=0.85)
-    plt.axvline(mu, color="black", linestyle="--", linewidth=1)
-    plt.title("Historical distribution (limited sample)")
-    plt.xlabel("China share (%)")
-    plt.ylabel("Count")
-    plt.tight_layout()
-    plt.savefig(os.path.join(folder, "base_rate_distribution.png"), dpi=150)
-    plt.close()
-
-    if len(y) >= 2:
-        plt.figure(figsize=(6, 5))
-        plt.scatter(y[:-1], y[1:], color="slateblue", alpha=0.9)
-        plt.xlabel("Previous quarter China share (%)")
-        plt.ylabel("Next quarter China share (%)")
-        plt.title("Quarter-to-quarter transitions (limited sample)")
-        plt.tight_layout()
-        plt.savefig(os.path.join(folder, "transition_scatter.png"), dpi=150)
-        plt.close()
+    plotting.render(plot_base_rate, folder, idx, y, mu)
 
     print(json.dumps(out, indent=2))
 
@@ -1,11 +1,13 @@
 import json
 import os
 import re
+import sys
 from datetime import datetime
 
 import requests
-from pypdf import PdfReader
-import io
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import pdf_text
 
 UA = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 
@@ -28,9 +30,7 @@ def find_presentation_pdf(fin_results_url):
 
 
 def extract_china_share(pdf_bytes):
-    reader = PdfReader(io.BytesIO(pdf_bytes))
-    text = "\n".join([(p.extract_text() or "") for p in reader.pages])
-    m = re.search(r"Region\s*\(ship\s*[- ]?to\s*[- ]?location\).*?China\s*(\d{1,2})\s*%", text, flags=re.I | re.S)
+    m, text = pdf_text.search_text(pdf_bytes, r"Region\s*\(ship\s*[- ]?to\s*[- ]?location\).*?China\s*(\d{1,2})\s*%", flags=re.I | re.S)
     if m:
         return int(m.group(1))
     idx = text.lower().find("ship to location")
@@ -1,11 +1,17 @@
+import argparse
 import csv
 import json
 import math
 import os
+import sys
 from datetime import datetime
 
 import numpy as np
-import matplotlib.pyplot as plt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import ar1, montecarlo, plotting, quantiles
+
+TARGET = (2025, 4)
 
 
 def load_points(path):
@@ -40,8 +46,58 @@ def fit_ar1(z):
     return a, b, sigma
 
 
-def main():
-    folder = os.path.dirname(__file__)
+def simulate_ar1(a, b, sigma, z_last, steps, n, rng, method="exact"):
+    # fit_ar1 returns (intercept, slope); propagate on the logit scale
+    return ar1.sample(b, a, sigma, z_last, steps, n, rng, method=method)
+
+
+def plot_forecast(folder, hist, pct, component_means):
+    plt = plotting.pyplot()
+    plt.figure(figsize=(9, 5))
+    hist.draw(plt, density=True, color="sienna", alpha=0.85)
+    for x in pct.values():
+        plt.axvline(x, color="black", linestyle="--", linewidth=1)
+    plt.title("Forecast distribution: ASML China share of net system sales (Q4 2025)")
+    plt.xlabel("China share (%)")
+    plt.ylabel("Density")
+    plt.tight_layout()
+    plt.savefig(os.path.join(folder, "forecast_distribution.png"), dpi=150)
+    plt.close()
+
+    labels = ["AR(1) logit", "Transitions", "Recent mean", "Import anchor"]
+    plt.figure(figsize=(8, 4))
+    plt.bar(labels, component_means, color=["#4c78a8", "#f58518", "#54a24b", "#e45756"])
+    plt.ylabel("Mean (%)")
+    plt.title("Component means")
+    plt.tight_layout()
+    plt.savefig(os.path.join(folder, "component_means.png"), dpi=150)
+    plt.close()
+
+
+def simulate(rng, n, p):
+    def logit_ar1(rng, m):
+        z_next = simulate_ar1(p["a"], p["b"], p["sigma"], p["z_last"], p["steps"], m, rng)
+        return 100.0 * inv_logit(z_next)
+
+    def nn(rng, m):
+        if len(p["next_vals"]) >= 2:
+            return rng.choice(p["next_vals"], size=m, replace=True) + rng.normal(0, 1.5, size=m)
+        return rng.normal(p["last"], 5.0, size=m)
+
+    def recent(rng, m):
+        return rng.normal(p["mu_recent"], p["sd_recent"], size=m)
+
+    def anchor(rng, m):
+        return rng.normal(p["import_mu"], p["import_sd"], size=m)
+
+    mixed, start = montecarlo.sample_mixture(rng, n, p["weights"], [logit_ar1, nn, recent, anchor])
+    out = {c: mixed[start[i] : start[i + 1]] for i, c in enumerate(["ar1", "nn", "recent", "import"])}
+    out["out"] = np.clip(mixed, 0.0, 100.0)
+    return out
+
+
+def run(folder=None, write=True, draws=None, chunk_size=None, workers=None, seed=42, sampling="plain"):
+    folder = folder or os.path.dirname(__file__)
     points_path = os.path.join(folder, "china_share_points.csv")
     if not os.path.exists(points_path):
         raise SystemExit("run base_rate_calc.py first")
@@ -50,14 +106,11 @@ def main():
     y = np.array([v for _, _, v in rows], dtype=float)
     last = float(y[-1])
 
-    rng = np.random.default_rng(42)
-    n = 300000
-
     z = logit(y / 100.0)
     a, b, sigma = fit_ar1(z)
     z_last = float(z[-1])
-    z_next = a + b * z_last + rng.normal(0, sigma, size=n)
-    comp_ar1 = 100.0 * inv_logit(z_next)
+    steps = max(1, (TARGET[0] * 4 + TARGET[1]) - (rows[-1][0] * 4 + rows[-1][1]))
+    z_mean, z_sd = ar1.moments(b, a, sigma, z_last, steps)
 
     band = 7.0
     next_vals = []
@@ -65,86 +118,87 @@ def main():
         if abs(y[i] - last) <= band:
             next_vals.append(y[i + 1])
     next_vals = np.array(next_vals, dtype=float)
-    if len(next_vals) >= 2:
-        comp_nn = rng.choice(next_vals, size=n, replace=True) + rng.normal(0, 1.5, size=n)
-    else:
-        comp_nn = rng.normal(last, 5.0, size=n)
 
     recent = y[-4:] if len(y) >= 4 else y
     mu_recent = float(recent.mean())
     sd_recent = float(recent.std(ddof=1)) if len(recent) > 1 else 3.5
     sd_recent = max(sd_recent, 4.0)
-    comp_recent = rng.normal(mu_recent, sd_recent, size=n)
 
     import_mu = 30.0
     import_sd = 2.5
-    comp_import = rng.normal(import_mu, import_sd, size=n)
 
     weights = np.array([0.25, 0.15, 0.35, 0.25], dtype=float)
     weights = weights / weights.sum()
-    u = rng.random(n)
-    cdf = np.cumsum(weights)
-    out = np.empty(n, dtype=float)
-    out[u < cdf[0]] = comp_ar1[u < cdf[0]]
-    m1 = (u >= cdf[0]) & (u < cdf[1])
-    out[m1] = comp_nn[m1]
-    m2 = (u >= cdf[1]) & (u < cdf[2])
-    out[m2] = comp_recent[m2]
-    out[u >= cdf[2]] = comp_import[u >= cdf[2]]
-
-    out = np.clip(out, 0.0, 100.0)
-
-    pct = {
-        "p5": float(np.percentile(out, 5)),
-        "p25": float(np.percentile(out, 25)),
-        "p50": float(np.percentile(out, 50)),
-        "p75": float(np.percentile(out, 75)),
-        "p95": float(np.percentile(out, 95)),
+
+    params = {
+        "a": a,
+        "b": b,
+        "sigma": sigma,
+        "z_last": z_last,
+        "steps": steps,
+        "last": last,
+        "next_vals": next_vals,
+        "mu_recent": mu_recent,
+        "sd_recent": sd_recent,
+        "import_mu": import_mu,
+        "import_sd": import_sd,
+        "weights": weights,
     }
+    components = ["ar1", "nn", "recent", "import"]
+    if sampling != "plain":
+        draws = draws or 300000
+    if draws:
+        specs = {"out": {}, **{c: {"sketch": False} for c in components}}
+        res = montecarlo.run_chunked(simulate, draws, params, specs, seed=seed, chunk_size=chunk_size, workers=workers, sampling=sampling)
+        summary = res["out"]
+        pct = summary.percentiles()
+        component_means = [res[c].mean for c in components]
+    else:
+        sim = simulate(np.random.default_rng(seed), 300000, params)
+        out = sim["out"]
+        summary = montecarlo.Summary(sketch=False).add(out)
+        pct = quantiles.percentiles(out)
+        component_means = [float(sim[c].mean()) for c in components]
 
     out_json = {
         "as_of_utc": datetime.utcnow().isoformat(),
         "target": "ASML net system sales share to China in Q4 2025 (%)",
         "last_observed": {"period": f"{rows[-1][0]}Q{rows[-1][1]}", "china_share_pct": last},
-        "ar1_logit_fit": {"a": a, "b": b, "sigma": sigma, "n_points": int(len(y))},
+        "ar1_logit_fit": {"a": a, "b": b, "sigma": sigma, "n_points": int(len(y)), "steps": steps, "z_mean": z_mean, "z_sd": z_sd, "share_median": float(100.0 * inv_logit(z_mean))},
         "nearest_neighbor_transitions": {"band": band, "n_hist_transitions": int(len(next_vals))},
         "import_anchor": {"mean": import_mu, "sd": import_sd},
         "ensemble_weights": {"ar1_logit": float(weights[0]), "nearest_neighbor": float(weights[1]), "recent_mean": float(weights[2]), "import_anchor": float(weights[3])},
         "forecast_percentiles": pct,
-        "forecast_mean": float(out.mean()),
+        "forecast_mean": summary.mean,
+        "standard_errors": {"forecast_mean": summary.standard_errors()["mean"]},
     }
+    if draws:
+        out_json["simulation"] = montecarlo.layout(draws, chunk_size, seed, sampling)
 
-    with open(os.path.join(folder, "forecast_output.json"), "w") as f:
-        json.dump(out_json, f, indent=2)
+    if write:
+        with open(os.path.join(folder, "forecast_output.json"), "w") as f:
+            json.dump(out_json, f, indent=2)
 
-    with open(os.path.join(folder, "forecast_percentiles.csv"), "w", newline="") as f:
-        w = csv.writer(f)
-        w.writerow(["percentile", "value"])
-        for k in ["p5", "p25", "p50", "p75", "p95"]:
-            w.writerow([k, pct[k]])
+        with open(os.path.join(folder, "forecast_percentiles.csv"), "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["percentile", "value"])
+            for k in ["p5", "p25", "p50", "p75", "p95"]:
+                w.writerow([k, pct[k]])
 
-    plt.figure(figsize=(9, 5))
-    plt.hist(out, bins=60, color="sienna", alpha=0.85, density=True)
-    for x in pct.values():
-        plt.axvline(x, color="black", linestyle="--", linewidth=1)
-    plt.title("Forecast distribution: ASML China share of net system sales (Q4 2025)")
-    plt.xlabel("China share (%)")
-    plt.ylabel("Density")
-    plt.tight_layout()
-    plt.savefig(os.path.join(folder, "forecast_distribution.png"), dpi=150)
-    plt.close()
+        hist = summary.histogram(60) if draws else plotting.Histogram.of(out, 60)
+        plotting.render(plot_forecast, folder, hist, pct, component_means)
 
-    comps = [comp_ar1, comp_nn, comp_recent, comp_import]
-    labels = ["AR(1) logit", "Transitions", "Recent mean", "Import anchor"]
-    means = [float(c.mean()) for c in comps]
-    plt.figure(figsize=(8, 4))
-    plt.bar(labels, means, color=["#4c78a8", "#f58518", "#54a24b", "#e45756"])
-    plt.ylabel("Mean (%)")
-    plt.title("Component means")
-    plt.tight_layout()
-    plt.savefig(os.path.join(folder, "component_means.png"), dpi=150)
-    plt.close()
+    return out_json
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Q10 model: ASML China share of net system sales (Q4 2025)")
+    plotting.add_arguments(parser)
+    montecarlo.add_arguments(parser)
+    args = parser.parse_args()
+    plotting.configure(args)
 
+    out_json = run(**montecarlo.options(args))
     print(json.dumps(out_json, indent=2))
 
 
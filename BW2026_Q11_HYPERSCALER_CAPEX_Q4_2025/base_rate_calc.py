@@ -1,10 +1,14 @@
+import argparse
 import csv
 import json
 import os
+import sys
 from datetime import datetime
 
 import numpy as np
-import matplotlib.pyplot as plt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import plotting, quantiles
 
 
 def load_series(path):
@@ -43,9 +47,37 @@ def to_b(val_usd):
     return val_usd / 1e9
 
 
-def main():
-    folder = os.path.dirname(__file__)
-    rows = load_series(os.path.join(folder, "capex_history_quarterly.csv"))
+def plot_base_rate(folder, totals, hist, out):
+    plt = plotting.pyplot()
+    if totals:
+        xs = np.arange(len(totals))
+        labels = [f"{y}Q{q}" for y, q, _ in totals]
+        ys = [v for _, _, v in totals]
+        plt.figure(figsize=(11, 4.5))
+        plt.plot(xs, ys, marker="o", color="steelblue")
+        plt.xticks(xs, labels, rotation=60, ha="right")
+        plt.ylabel("Capex (USD billions)")
+        plt.title("Combined capex (historical, reconstructed)")
+        plt.tight_layout()
+        plt.savefig(os.path.join(folder, "capex_history.png"), dpi=150)
+        plt.close()
+
+    plt.figure(figsize=(9, 5))
+    hist.draw(plt, density=True, color="teal", alpha=0.85)
+    for x in [out["base_rate_total_q4_2025_b"]["p25"], out["base_rate_total_q4_2025_b"]["p50"], out["base_rate_total_q4_2025_b"]["p75"]]:
+        plt.axvline(x, color="black", linestyle="--", linewidth=1)
+    plt.title("Base rate distribution: Q4 total from Q4/Q3 seasonal ratios")
+    plt.xlabel("Total capex (USD billions)")
+    plt.ylabel("Density")
+    plt.tight_layout()
+    plt.savefig(os.path.join(folder, "base_rate_distribution.png"), dpi=150)
+    plt.close()
+
+
+def run(folder=None, rows=None, write=True):
+    folder = folder or os.path.dirname(__file__)
+    if rows is None:
+        rows = load_series(os.path.join(folder, "capex_history_quarterly.csv"))
     qmap, annual_map = build_maps(rows)
 
     tickers = ["MSFT", "GOOG", "AMZN"]
@@ -110,41 +142,25 @@ def main():
         "q4_over_q3_history": ratios,
         "base_rate_total_q4_2025_b": {
             "mean": float(base_total.mean()),
-            "p5": float(np.percentile(base_total, 5)),
-            "p25": float(np.percentile(base_total, 25)),
-            "p50": float(np.percentile(base_total, 50)),
-            "p75": float(np.percentile(base_total, 75)),
-            "p95": float(np.percentile(base_total, 95)),
+            **quantiles.percentiles(base_total),
         },
     }
 
-    with open(os.path.join(folder, "base_rate_output.json"), "w") as f:
-        json.dump(out, f, indent=2)
+    if write:
+        with open(os.path.join(folder, "base_rate_output.json"), "w") as f:
+            json.dump(out, f, indent=2)
 
-    if totals:
-        xs = np.arange(len(totals))
-        labels = [f"{y}Q{q}" for y, q, _ in totals]
-        ys = [v for _, _, v in totals]
-        plt.figure(figsize=(11, 4.5))
-        plt.plot(xs, ys, marker="o", color="steelblue")
-        plt.xticks(xs, labels, rotation=60, ha="right")
-        plt.ylabel("Capex (USD billions)")
-        plt.title("Combined capex (historical, reconstructed)")
-        plt.tight_layout()
-        plt.savefig(os.path.join(folder, "capex_history.png"), dpi=150)
-        plt.close()
+        plotting.render(plot_base_rate, folder, totals, plotting.Histogram.of(base_total, 60), out)
 
-    plt.figure(figsize=(9, 5))
-    plt.hist(base_total, bins=60, color="teal", alpha=0.85, density=True)
-    for x in [out["base_rate_total_q4_2025_b"]["p25"], out["base_rate_total_q4_2025_b"]["p50"], out["base_rate_total_q4_2025_b"]["p75"]]:
-        plt.axvline(x, color="black", linestyle="--", linewidth=1)
-    plt.title("Base rate distribution: Q4 total from Q4/Q3 seasonal ratios")
-    plt.xlabel("Total capex (USD billions)")
-    plt.ylabel("Density")
-    plt.tight_layout()
-    plt.savefig(os.path.join(folder, "base_rate_distribution.png"), dpi=150)
-    plt.close()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Q11 base rate: Q4 hyperscaler capex from Q4/Q3 ratios")
+    plotting.add_arguments(parser)
+    plotting.configure(parser.parse_args())
 
+    out = run()
     print(json.dumps(out, indent=2))
 
 
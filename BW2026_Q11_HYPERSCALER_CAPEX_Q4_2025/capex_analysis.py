@@ -1,13 +1,57 @@
+import argparse
+import json
 import os
 import subprocess
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import plotting
+
+STAGES = ["capex_data_fetch.py", "base_rate_calc.py", "quant_model.py"]
+
+
+def run_subprocess(folder, skip_fetch=False):
+    for name in STAGES:
+        if skip_fetch and name == "capex_data_fetch.py":
+            continue
+        subprocess.check_call([sys.executable, os.path.join(folder, name)])
+
+
+def run_in_process(folder, skip_fetch=False, checkpoint=True):
+    # The fetched quarterly rows go straight to both models instead of being
+    # re-read from capex_history_quarterly.csv by each stage
+    import base_rate_calc
+    import quant_model
+
+    if skip_fetch:
+        rows = base_rate_calc.load_series(os.path.join(folder, "capex_history_quarterly.csv"))
+    else:
+        import capex_data_fetch
+
+        fetched = capex_data_fetch.run(folder)
+        rows = [(r["ticker"], r["year"], r["quarter"], r["payments_usd"]) for r in fetched]
+        print(json.dumps({"rows": len(fetched), "min": fetched[0] if fetched else None, "max": fetched[-1] if fetched else None}, indent=2))
+    base = base_rate_calc.run(folder, rows=rows, write=checkpoint)
+    print(json.dumps(base, indent=2))
+    out = quant_model.run(folder, rows=rows)
+    print(json.dumps(out, indent=2))
+    return out
+
 
 def main():
-    folder = os.path.dirname(__file__)
-    subprocess.check_call([sys.executable, os.path.join(folder, "capex_data_fetch.py")])
-    subprocess.check_call([sys.executable, os.path.join(folder, "base_rate_calc.py")])
-    subprocess.check_call([sys.executable, os.path.join(folder, "quant_model.py")])
+    parser = argparse.ArgumentParser(description="Run the Q11 fetch, base-rate and model stages")
+    parser.add_argument("--subprocess", action="store_true", help="run each stage as a separate script")
+    parser.add_argument("--skip-fetch", action="store_true", help="use the existing capex_history_quarterly.csv")
+    parser.add_argument("--no-checkpoint", action="store_true", help="do not write base_rate_output.json and its plots")
+    plotting.add_arguments(parser)
+    args = parser.parse_args()
+    plotting.configure(args)
+
+    folder = os.path.dirname(os.path.abspath(__file__))
+    if args.subprocess:
+        run_subprocess(folder, skip_fetch=args.skip_fetch)
+    else:
+        run_in_process(folder, skip_fetch=args.skip_fetch, checkpoint=not args.no_checkpoint)
 
 
 if __name__ == "__main__":
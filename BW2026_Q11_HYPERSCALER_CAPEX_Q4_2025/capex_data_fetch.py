@@ -2,9 +2,11 @@ import csv
 import json
 import os
 import re
+import sys
 from datetime import datetime
 
-import requests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import sec_fetch
 
 UA = "bridgewater-forecasting (SEC XBRL fetch; contact: research@example.com)"
 
@@ -30,13 +32,6 @@ def q_from_end_date(end):
     return y, q
 
 
-def fetch_companyfacts(cik):
-    url = f"https://data.sec.gov/api/xbrl/companyfacts/CIK{cik}.json"
-    r = requests.get(url, headers={"User-Agent": UA, "Accept-Encoding": "gzip, deflate"}, timeout=60)
-    r.raise_for_status()
-    return r.json()
-
-
 def extract_quarterly_payments(facts, tag):
     us = facts.get("facts", {}).get("us-gaap", {})
     if tag not in us:
@@ -101,22 +96,26 @@ def derive_quarters_from_ytd(qmap):
     return out
 
 
-def main():
-    folder = os.path.dirname(__file__)
+def run(folder=None):
+    folder = folder or os.path.dirname(__file__)
     out_csv = os.path.join(folder, "capex_history_quarterly.csv")
     out_json = os.path.join(folder, "research_snapshot.json")
 
     all_rows = []
     snap = {"as_of_utc": datetime.utcnow().isoformat(), "sources": {}}
 
+    downloaded = sec_fetch.download_many([meta["cik"] for meta in COMPANIES.values()], UA)
+
     for ticker, meta in COMPANIES.items():
-        facts = fetch_companyfacts(meta["cik"])
+        path, status = downloaded[meta["cik"]]
+        facts = sec_fetch.load_tag_facts(path, [meta["payments_tag"]])
         qmap = extract_quarterly_payments(facts, meta["payments_tag"])
         qvals = derive_quarters_from_ytd(qmap)
 
         snap["sources"][ticker] = {
             "cik": meta["cik"],
             "payments_tag": meta["payments_tag"],
+            "http_status": status,
             "n_quarters_extracted": len(qvals),
         }
 
@@ -132,6 +131,11 @@ def main():
     with open(out_json, "w") as f:
         json.dump(snap, f, indent=2)
 
+    return all_rows
+
+
+def main():
+    all_rows = run()
     print(json.dumps({"rows": len(all_rows), "min": all_rows[0] if all_rows else None, "max": all_rows[-1] if all_rows else None}, indent=2))
 
 
@@ -1,9 +1,11 @@
 import json
 import os
 import re
+import sys
 from datetime import datetime
 
-import requests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import sec_fetch
 
 UA = "bridgewater-forecasting (monitor; contact: research@example.com)"
 
@@ -14,13 +16,6 @@ COMPANIES = {
 }
 
 
-def fetch_companyfacts(cik):
-    url = f"https://data.sec.gov/api/xbrl/companyfacts/CIK{cik}.json"
-    r = requests.get(url, headers={"User-Agent": UA, "Accept-Encoding": "gzip, deflate"}, timeout=60)
-    r.raise_for_status()
-    return r.json()
-
-
 def find_fact(facts, tag, frame=None, end=None, start=None, fp=None):
     us = facts.get("facts", {}).get("us-gaap", {})
     if tag not in us:
@@ -67,8 +62,11 @@ def main():
     frame_q4 = f"CY{target_year}Q{target_q}"
     end_q4 = "2025-12-31"
 
+    downloaded = sec_fetch.download_many([meta["cik"] for meta in COMPANIES.values()], UA)
+
     for ticker, meta in COMPANIES.items():
-        facts = fetch_companyfacts(meta["cik"])
+        path, _ = downloaded[meta["cik"]]
+        facts = sec_fetch.load_tag_facts(path, [meta["tag"]])
         tag = meta["tag"]
 
         q4 = find_fact(facts, tag, frame=frame_q4)
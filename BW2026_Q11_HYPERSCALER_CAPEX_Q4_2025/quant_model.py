@@ -1,11 +1,15 @@
+import argparse
 import csv
 import json
 import math
 import os
+import sys
 from datetime import datetime
 
 import numpy as np
-import matplotlib.pyplot as plt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import montecarlo, plotting, quantiles
 
 
 def load_series(path):
@@ -50,9 +54,63 @@ def fit_lognormal_from_p25_p50_p75(p25, p50, p75):
     return mu, sigma
 
 
-def main():
-    folder = os.path.dirname(__file__)
-    rows = load_series(os.path.join(folder, "capex_history_quarterly.csv"))
+def simulate(rng, n, p):
+    q3_current = p["q3_current"]
+
+    def total_ratio(rng, m):
+        ratio_total_s = rng.choice(p["ratio_total"], size=m, replace=True)
+        ratio_total_s = ratio_total_s * np.clip(rng.normal(1.03, 0.02, size=m), 0.95, 1.12)
+        return p["q3_total"] * ratio_total_s
+
+    def company_ratio_sum(rng, m):
+        ms_q4 = q3_current["MSFT"] * rng.choice(p["ratios_ms"], size=m, replace=True) * np.clip(rng.normal(1.02, 0.02, size=m), 0.95, 1.10)
+        gg_q4 = q3_current["GOOG"] * rng.choice(p["ratios_gg"], size=m, replace=True) * np.clip(rng.normal(1.05, 0.03, size=m), 0.90, 1.18)
+        az_gross_q4 = q3_current["AMZN_gross"] * rng.choice(p["ratios_az"], size=m, replace=True) * np.clip(rng.normal(1.03, 0.025, size=m), 0.92, 1.14)
+        inflow_q4 = np.clip(rng.normal(p["inflow_mu"], p["inflow_sd"], size=m), 0.0, None)
+        return ms_q4 + gg_q4 + az_gross_q4 - inflow_q4
+
+    def crowd(rng, m):
+        return np.exp(rng.normal(p["mu_c"], p["sigma_c"], size=m))
+
+    def accel_tail(rng, m):
+        accel = rng.random(m) < 0.20
+        return np.clip(company_ratio_sum(rng, m) + accel * rng.normal(7.0, 3.0, size=m), 0.0, None)
+
+    components = [total_ratio, company_ratio_sum, crowd, accel_tail]
+    mixed, start = montecarlo.sample_mixture(rng, n, p["weights"], components)
+    out = {f.__name__: mixed[start[i] : start[i + 1]] for i, f in enumerate(components)}
+    out["out"] = np.clip(mixed, 0.0, None)
+    return out
+
+
+def plot_forecast(folder, hist, pct, out_json):
+    plt = plotting.pyplot()
+    plt.figure(figsize=(9, 5))
+    hist.draw(plt, density=True, color="sienna", alpha=0.85)
+    for x in pct.values():
+        plt.axvline(x, color="black", linestyle="--", linewidth=1)
+    plt.title("Forecast distribution: combined hyperscaler capex (Q4 2025)")
+    plt.xlabel("Capex (USD billions)")
+    plt.ylabel("Density")
+    plt.tight_layout()
+    plt.savefig(os.path.join(folder, "forecast_distribution.png"), dpi=150)
+    plt.close()
+
+    plt.figure(figsize=(8, 4))
+    comp_labels = ["Total ratio", "Company sum", "Crowd", "Accel tail"]
+    comp_means = [out_json["components_mean_b"]["total_ratio"], out_json["components_mean_b"]["company_ratio_sum"], out_json["components_mean_b"]["crowd"], out_json["components_mean_b"]["accel_tail"]]
+    plt.bar(comp_labels, comp_means, color=["#4c78a8", "#f58518", "#54a24b", "#e45756"])
+    plt.ylabel("Mean (USD billions)")
+    plt.title("Component means")
+    plt.tight_layout()
+    plt.savefig(os.path.join(folder, "company_forecast_bars.png"), dpi=150)
+    plt.close()
+
+
+def run(folder=None, rows=None, write=True, draws=None, chunk_size=None, workers=None, seed=42, sampling="plain"):
+    folder = folder or os.path.dirname(__file__)
+    if rows is None:
+        rows = load_series(os.path.join(folder, "capex_history_quarterly.csv"))
     qmap, annual_map = build_maps(rows)
 
     def get_payments(t, y, q):
@@ -104,52 +162,46 @@ def main():
     inflow_sd = float(np.std(inflow_hist, ddof=1)) if len(inflow_hist) > 1 else 0.3
     inflow_sd = max(inflow_sd, 0.25)
 
-    rng = np.random.default_rng(42)
-    n = 300000
-
     if len(ratio_total) == 0:
         ratio_total = np.array([1.12], dtype=float)
-    ratio_total_s = rng.choice(ratio_total, size=n, replace=True)
-    ratio_total_s = ratio_total_s * np.clip(rng.normal(1.03, 0.02, size=n), 0.95, 1.12)
-    comp_total = q3_total * ratio_total_s
 
     ratios_ms = ratio_company["MSFT"] if len(ratio_company["MSFT"]) else np.array([1.05])
     ratios_gg = ratio_company["GOOG"] if len(ratio_company["GOOG"]) else np.array([1.10])
     ratios_az = ratio_company["AMZN"] if len(ratio_company["AMZN"]) else np.array([1.15])
 
-    ms_q4 = q3_current["MSFT"] * rng.choice(ratios_ms, size=n, replace=True) * np.clip(rng.normal(1.02, 0.02, size=n), 0.95, 1.10)
-    gg_q4 = q3_current["GOOG"] * rng.choice(ratios_gg, size=n, replace=True) * np.clip(rng.normal(1.05, 0.03, size=n), 0.90, 1.18)
-    az_gross_q4 = q3_current["AMZN_gross"] * rng.choice(ratios_az, size=n, replace=True) * np.clip(rng.normal(1.03, 0.025, size=n), 0.92, 1.14)
-    inflow_q4 = np.clip(rng.normal(inflow_mu, inflow_sd, size=n), 0.0, None)
-    comp_company = ms_q4 + gg_q4 + az_gross_q4 - inflow_q4
-
     mu_c, sigma_c = fit_lognormal_from_p25_p50_p75(84.76, 89.45, 95.07)
-    comp_crowd = np.exp(rng.normal(mu_c, sigma_c, size=n))
-
-    accel = rng.random(n) < 0.20
-    comp_accel = np.clip(comp_company + accel * rng.normal(7.0, 3.0, size=n), 0.0, None)
 
     weights = np.array([0.15, 0.25, 0.50, 0.10], dtype=float)
     weights = weights / weights.sum()
-    u = rng.random(n)
-    cdf = np.cumsum(weights)
-    out = np.empty(n, dtype=float)
-    out[u < cdf[0]] = comp_total[u < cdf[0]]
-    m1 = (u >= cdf[0]) & (u < cdf[1])
-    out[m1] = comp_company[m1]
-    m2 = (u >= cdf[1]) & (u < cdf[2])
-    out[m2] = comp_crowd[m2]
-    out[u >= cdf[2]] = comp_accel[u >= cdf[2]]
-
-    out = np.clip(out, 0.0, None)
-
-    pct = {
-        "p5": float(np.percentile(out, 5)),
-        "p25": float(np.percentile(out, 25)),
-        "p50": float(np.percentile(out, 50)),
-        "p75": float(np.percentile(out, 75)),
-        "p95": float(np.percentile(out, 95)),
+
+    params = {
+        "q3_current": q3_current,
+        "q3_total": q3_total,
+        "ratio_total": ratio_total,
+        "ratios_ms": ratios_ms,
+        "ratios_gg": ratios_gg,
+        "ratios_az": ratios_az,
+        "inflow_mu": inflow_mu,
+        "inflow_sd": inflow_sd,
+        "mu_c": mu_c,
+        "sigma_c": sigma_c,
+        "weights": weights,
     }
+    components = ["total_ratio", "company_ratio_sum", "crowd", "accel_tail"]
+    if sampling != "plain":
+        draws = draws or 300000
+    if draws:
+        specs = {"out": {}, **{c: {"sketch": False} for c in components}}
+        res = montecarlo.run_chunked(simulate, draws, params, specs, seed=seed, chunk_size=chunk_size, workers=workers, sampling=sampling)
+        summary = res["out"]
+        pct = summary.percentiles()
+        component_means = {c: res[c].mean for c in components}
+    else:
+        sim = simulate(np.random.default_rng(seed), 300000, params)
+        out = sim["out"]
+        summary = montecarlo.Summary(sketch=False).add(out)
+        pct = quantiles.percentiles(out)
+        component_means = {c: float(sim[c].mean()) for c in components}
 
     out_json = {
         "as_of_utc": datetime.utcnow().isoformat(),
@@ -160,40 +212,37 @@ def main():
         "crowd_anchor": {"p25": 84.76, "p50": 89.45, "p75": 95.07, "lognormal_mu": mu_c, "lognormal_sigma": sigma_c},
         "ensemble_weights": {"total_ratio": float(weights[0]), "company_ratio_sum": float(weights[1]), "crowd_lognormal": float(weights[2]), "acceleration_tail": float(weights[3])},
         "forecast_percentiles_b": pct,
-        "forecast_mean_b": float(out.mean()),
-        "components_mean_b": {"total_ratio": float(comp_total.mean()), "company_ratio_sum": float(comp_company.mean()), "crowd": float(comp_crowd.mean()), "accel_tail": float(comp_accel.mean())},
+        "forecast_mean_b": summary.mean,
+        "components_mean_b": component_means,
+        "standard_errors": {"forecast_mean_b": summary.standard_errors()["mean"]},
     }
+    if draws:
+        out_json["simulation"] = montecarlo.layout(draws, chunk_size, seed, sampling)
 
-    with open(os.path.join(folder, "forecast_output.json"), "w") as f:
-        json.dump(out_json, f, indent=2)
+    if write:
+        with open(os.path.join(folder, "forecast_output.json"), "w") as f:
+            json.dump(out_json, f, indent=2)
 
-    with open(os.path.join(folder, "forecast_percentiles.csv"), "w", newline="") as f:
-        w = csv.writer(f)
-        w.writerow(["percentile", "value_b"])
-        for k in ["p5", "p25", "p50", "p75", "p95"]:
-            w.writerow([k, pct[k]])
+        with open(os.path.join(folder, "forecast_percentiles.csv"), "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["percentile", "value_b"])
+            for k in ["p5", "p25", "p50", "p75", "p95"]:
+                w.writerow([k, pct[k]])
 
-    plt.figure(figsize=(9, 5))
-    plt.hist(out, bins=70, color="sienna", alpha=0.85, density=True)
-    for x in pct.values():
-        plt.axvline(x, color="black", linestyle="--", linewidth=1)
-    plt.title("Forecast distribution: combined hyperscaler capex (Q4 2025)")
-    plt.xlabel("Capex (USD billions)")
-    plt.ylabel("Density")
-    plt.tight_layout()
-    plt.savefig(os.path.join(folder, "forecast_distribution.png"), dpi=150)
-    plt.close()
+        hist = summary.histogram(70) if draws else plotting.Histogram.of(out, 70)
+        plotting.render(plot_forecast, folder, hist, pct, out_json)
 
-    plt.figure(figsize=(8, 4))
-    comp_labels = ["Total ratio", "Company sum", "Crowd", "Accel tail"]
-    comp_means = [out_json["components_mean_b"]["total_ratio"], out_json["components_mean_b"]["company_ratio_sum"], out_json["components_mean_b"]["crowd"], out_json["components_mean_b"]["accel_tail"]]
-    plt.bar(comp_labels, comp_means, color=["#4c78a8", "#f58518", "#54a24b", "#e45756"])
-    plt.ylabel("Mean (USD billions)")
-    plt.title("Component means")
-    plt.tight_layout()
-    plt.savefig(os.path.join(folder, "company_forecast_bars.png"), dpi=150)
-    plt.close()
+    return out_json
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Q11 model: combined hyperscaler capex for Q4 2025")
+    plotting.add_arguments(parser)
+    montecarlo.add_arguments(parser)
+    args = parser.parse_args()
+    plotting.configure(args)
 
+    out_json = run(**montecarlo.options(args))
     print(json.dumps(out_json, indent=2))
 
 
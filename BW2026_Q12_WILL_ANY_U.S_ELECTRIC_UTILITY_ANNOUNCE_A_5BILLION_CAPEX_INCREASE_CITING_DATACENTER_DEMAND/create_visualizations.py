@@ -29,17 +29,28 @@ utilities_data = {
     "Other": {"prob_low": 0.08, "prob_mid": 0.15, "prob_high": 0.22, "earnings": "Various"}
 }
 
+def utility_prob_bounds():
+    lows = np.array([data['prob_low'] for data in utilities_data.values()])
+    mids = np.array([data['prob_mid'] for data in utilities_data.values()])
+    highs = np.array([data['prob_high'] for data in utilities_data.values()])
+    return lows, mids, highs
+
 def run_simulation(n_sims=100000):
-    results = []
-    for _ in range(n_sims):
-        any_announced = False
-        for name, data in utilities_data.items():
-            prob = np.random.triangular(data['prob_low'], data['prob_mid'], data['prob_high'])
-            if np.random.random() < prob:
-                any_announced = True
-                break
-        results.append(1 if any_announced else 0)
-    return np.array(results)
+    lows, mids, highs = utility_prob_bounds()
+    probs = np.random.triangular(lows, mids, highs, size=(n_sims, len(utilities_data)))
+    announced = np.random.random((n_sims, len(utilities_data))) < probs
+    return announced.any(axis=1).astype(int)
+
+def p_any_announcement():
+    # Each simulated utility fires with probability E[triangular] = (low + mid + high) / 3,
+    # independently of the others, so a single run is Bernoulli(1 - prod(1 - mean_i))
+    lows, mids, highs = utility_prob_bounds()
+    return 1 - np.prod(1 - (lows + mids + highs) / 3)
+
+def bootstrap_means(n_bootstrap=10000, batch_size=1000):
+    # The mean of run_simulation(batch_size) is Binomial(batch_size, p_any) / batch_size,
+    # so replicate means are drawn directly instead of re-simulating every batch
+    return np.random.binomial(batch_size, p_any_announcement(), size=n_bootstrap) / batch_size * 100
 
 fig = plt.figure(figsize=(16, 12))
 fig.suptitle('Bridgewater Forecasting Tournament: Utility $5B+ Capex Announcement\n(January 13 - March 12, 2026)', 
@@ -124,10 +135,7 @@ for i, (bar, count) in enumerate(zip(bars3, announcements_per_month)):
 ax4 = plt.subplot(2, 2, 4)
 
 n_bootstrap = 10000
-bootstrap_results = []
-for _ in range(n_bootstrap):
-    sim = run_simulation(1000)
-    bootstrap_results.append(np.mean(sim) * 100)
+bootstrap_results = bootstrap_means(n_bootstrap, 1000)
 
 ax4.hist(bootstrap_results, bins=50, color='#9b59b6', edgecolor='#00d4ff', 
          alpha=0.7, density=True)
@@ -1,7 +1,11 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from scipy import stats
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import sweep
 
 np.random.seed(42)
 
@@ -128,21 +132,39 @@ utilities_data = {
     }
 }
 
-def monte_carlo_any_announcement(utilities, n_simulations=100000):
-    results = []
-    utility_triggers = {name: 0 for name in utilities.keys()}
-    
-    for _ in range(n_simulations):
-        any_announced = False
-        for name, data in utilities.items():
-            prob = np.random.triangular(data['prob_low'], data['prob_mid'], data['prob_high'])
-            if np.random.random() < prob:
-                any_announced = True
-                utility_triggers[name] += 1
-        results.append(1 if any_announced else 0)
-    
-    results = np.array(results)
-    trigger_probs = {name: count / n_simulations for name, count in utility_triggers.items()}
+def triangular_ppf(q, low, mid, high):
+    span = high - low
+    split = (mid - low) / span
+    left = low + np.sqrt(q * span * (mid - low))
+    right = high - np.sqrt((1 - q) * span * (high - mid))
+    return np.where(q < split, left, right)
+
+def draw_announcement_uniforms(n_simulations, n_utilities):
+    # One (n_sims x n_utilities) matrix for the triangular quantile, one for the trigger
+    prob_quantiles = np.random.random((n_simulations, n_utilities))
+    trigger_uniforms = np.random.random((n_simulations, n_utilities))
+    return prob_quantiles, trigger_uniforms
+
+def utility_prob_bounds(utilities):
+    lows = np.array([data['prob_low'] for data in utilities.values()], dtype=float)
+    mids = np.array([data['prob_mid'] for data in utilities.values()], dtype=float)
+    highs = np.array([data['prob_high'] for data in utilities.values()], dtype=float)
+    return lows, mids, highs
+
+def announcement_triggers(utilities, draws):
+    prob_quantiles, trigger_uniforms = draws
+    lows, mids, highs = utility_prob_bounds(utilities)
+    probs = triangular_ppf(prob_quantiles, lows, mids, highs)
+    return trigger_uniforms < probs
+
+def monte_carlo_any_announcement(utilities, n_simulations=100000, draws=None):
+    if draws is None:
+        draws = draw_announcement_uniforms(n_simulations, len(utilities))
+    n_simulations = draws[0].shape[0]
+
+    triggered = announcement_triggers(utilities, draws)
+    results = triggered.any(axis=1).astype(int)
+    trigger_probs = dict(zip(utilities.keys(), triggered.mean(axis=0)))
     
     return {
         'probability': np.mean(results),
@@ -153,24 +175,34 @@ def monte_carlo_any_announcement(utilities, n_simulations=100000):
         'n_simulations': n_simulations
     }
 
-def sensitivity_analysis(utilities, n_simulations=50000):
-    sensitivities = {}
-    
-    base_result = monte_carlo_any_announcement(utilities, n_simulations)
-    base_prob = base_result['probability']
-    
-    for target_utility in utilities.keys():
-        modified_utilities = {}
-        for name, data in utilities.items():
-            if name == target_utility:
-                modified_utilities[name] = {**data, 'prob_low': 0, 'prob_mid': 0.001, 'prob_high': 0.001}
-            else:
-                modified_utilities[name] = data.copy()
-        
-        result = monte_carlo_any_announcement(modified_utilities, n_simulations)
-        sensitivities[target_utility] = base_prob - result['probability']
-    
-    return sensitivities
+def any_announcement_probability(params, draws):
+    # Vectorised over the knocked-out utilities: the triggers are computed once
+    # and each point only recomputes the knocked-out column
+    prob_quantiles, trigger_uniforms = draws
+    utilities = params['utilities']
+    names = list(utilities)
+    triggered = announcement_triggers(utilities, draws)
+    trigger_counts = triggered.sum(axis=1)
+
+    probs = []
+    for knocked_out in params['knocked_out']:
+        if knocked_out is None:
+            probs.append(np.mean(trigger_counts > 0))
+            continue
+        idx = names.index(knocked_out)
+        knocked = trigger_uniforms[:, idx] < triangular_ppf(prob_quantiles[:, idx], 0, 0.001, 0.001)
+        others = (trigger_counts - triggered[:, idx]) > 0
+        probs.append(np.mean(others | knocked))
+    return np.array(probs)
+
+def sensitivity_analysis(utilities, n_simulations=50000, draws=None):
+    # Leave-one-out runs share the base draws (common random numbers), so each
+    # sensitivity is the exact change from knocking out a single utility
+    if draws is None:
+        draws = draw_announcement_uniforms(n_simulations, len(utilities))
+    rows = sweep.run_batched(any_announcement_probability, sweep.grid(knocked_out=[None, *utilities]), draws=draws, base={'utilities': utilities})
+    base_prob = rows[0]['value']
+    return {row['knocked_out']: base_prob - row['value'] for row in rows[1:]}
 
 def calculate_base_rate():
     announcements_2025 = [
@@ -1,6 +1,11 @@
 import numpy as np
 from scipy import stats
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import sweep
 
 wpi_index_data = {
     'Dec-23': 154.0,
@@ -246,6 +251,26 @@ print("\n  Final Distribution Percentiles:")
 for p in percentiles:
     print(f"    {p}th percentile: {np.percentile(final_sim, p):.3f}%")
 
+def adjusted_forecast(params, draws=None):
+    # A shift only moves the normal forecast, so its percentiles and P(<0) are closed-form
+    loc = params['center'] + params['shift']
+    scale = params['scale']
+    z5, z95 = stats.norm.ppf([0.05, 0.95])
+    return {'p5': loc + scale * z5, 'median': loc, 'p95': loc + scale * z95, 'p_negative': stats.norm.cdf(-loc / scale)}
+
+# Each evidence adjustment applied on its own to the ensemble forecast,
+# evaluated for every row at once
+adjustment_points = [{'adjustment': 'none', 'shift': 0.0}]
+adjustment_points += [{'adjustment': name, 'shift': float(delta.rstrip('%'))} for name, delta, _ in adjustments]
+adjustment_points += [{'adjustment': 'net', 'shift': net_adjustment}]
+adjustment_rows = sweep.run_batched(
+    adjusted_forecast,
+    adjustment_points,
+    base={'center': ensemble_estimate, 'scale': jan_std * 0.9},
+)
+print("\n  Sensitivity to evidence adjustments:")
+print("    " + sweep.format_table(adjustment_rows, ".3f").replace("\n", "\n    "))
+
 widening_factor = 1.3
 widened_std = jan_std * widening_factor
 
@@ -311,6 +336,7 @@ forecast_output = {
         'p95': p95,
         'widening_factor': widening_factor
     },
+    'adjustment_sensitivity': adjustment_rows,
     'key_uncertainties': [
         'December 2025 WPI index level (base for calculation)',
         'Food price trajectory in January',
@@ -1,13 +1,57 @@
+import argparse
+import json
 import os
 import subprocess
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import plotting
+
+STAGES = ["data_fetch.py", "base_rate_calc.py", "quant_model.py"]
+
+
+def run_subprocess(folder, skip_fetch=False, full=False):
+    for name in STAGES:
+        if name == "data_fetch.py":
+            if skip_fetch:
+                continue
+            subprocess.check_call([sys.executable, os.path.join(folder, name)] + (["--full"] if full else []))
+        else:
+            subprocess.check_call([sys.executable, os.path.join(folder, name)])
+
+
+def run_in_process(folder, skip_fetch=False, full=False, checkpoint=True):
+    # Stages share one interpreter: numpy/matplotlib are imported once and the
+    # series and base-rate dict are handed over directly instead of via disk
+    import base_rate_calc
+    import data_fetch
+    import quant_model
+
+    if not skip_fetch:
+        print(json.dumps(data_fetch.run(folder, full=full), indent=2))
+    inputs = base_rate_calc.load_inputs(folder)
+    base = base_rate_calc.run(folder, inputs=inputs, write=checkpoint)
+    print(json.dumps(base, indent=2))
+    out = quant_model.run(folder, base=base, inputs=inputs)
+    print(json.dumps(out, indent=2))
+    return out
+
 
 def main():
-    folder = os.path.dirname(__file__)
-    subprocess.check_call([sys.executable, os.path.join(folder, "data_fetch.py")])
-    subprocess.check_call([sys.executable, os.path.join(folder, "base_rate_calc.py")])
-    subprocess.check_call([sys.executable, os.path.join(folder, "quant_model.py")])
+    parser = argparse.ArgumentParser(description="Run the Q15 fetch, base-rate and model stages")
+    parser.add_argument("--subprocess", action="store_true", help="run each stage as a separate script")
+    parser.add_argument("--skip-fetch", action="store_true", help="use the series already in the local store")
+    parser.add_argument("--full", action="store_true", help="re-download full histories and rewrite the CSV snapshots")
+    parser.add_argument("--no-checkpoint", action="store_true", help="do not write base_rate_output.json and its plots")
+    plotting.add_arguments(parser)
+    args = parser.parse_args()
+    plotting.configure(args)
+
+    folder = os.path.dirname(os.path.abspath(__file__))
+    if args.subprocess:
+        run_subprocess(folder, skip_fetch=args.skip_fetch, full=args.full)
+    else:
+        run_in_process(folder, skip_fetch=args.skip_fetch, full=args.full, checkpoint=not args.no_checkpoint)
 
 
 if __name__ == "__main__":
@@ -1,111 +1,89 @@
-import csv
+import argparse
 import json
 import os
-from bisect import bisect_left
-from datetime import datetime, date, timedelta
+import sys
+from datetime import datetime
 
 import numpy as np
-import matplotlib.pyplot as plt
-
-
-def read_fred_csv(path):
-    with open(path) as f:
-        r = csv.DictReader(f)
-        fns = r.fieldnames or []
-        date_key = "DATE" if "DATE" in fns else ("observation_date" if "observation_date" in fns else fns[0])
-        val_key = [k for k in fns if k != date_key][0]
-        rows = []
-        for row in r:
-            d = row.get(date_key)
-            v = row.get(val_key)
-            if d is None or v is None:
-                continue
-            v = v.strip()
-            if v == "" or v == ".":
-                continue
-            rows.append((d, float(v)))
-    return rows
-
-
-def read_stooq_close(path):
-    rows = []
-    with open(path) as f:
-        r = csv.DictReader(f)
-        for row in r:
-            d = row.get("Date")
-            c = row.get("Close")
-            if d is None or c is None:
-                continue
-            c = c.strip()
-            if c == "" or c == "0":
-                continue
-            rows.append((d, float(c)))
-    rows.sort()
-    return rows
-
-
-def month_key(date_str):
-    y, m, _ = date_str.split("-")
-    return int(y) * 12 + int(m)
-
-
-def ym_from_key(k):
-    y = k // 12
-    m = k % 12
-    if m == 0:
-        y -= 1
-        m = 12
-    return y, m
-
-
-def monthly_series_from_daily(daily_rows):
-    out = {}
-    for d, v in daily_rows:
-        y, m, _ = d.split("-")
-        out[(int(y), int(m))] = v
-    ks = sorted(out.keys())
-    return [(f"{y:04d}-{m:02d}", out[(y, m)]) for (y, m) in ks]
-
-
-def compute_payroll_2m_changes(payems_rows):
-    ks = [month_key(d) for d, _ in payems_rows]
-    vals = np.array([v for _, v in payems_rows], dtype=float)
-    out = []
-    for i in range(2, len(vals)):
-        out.append((ks[i], float(vals[i] - vals[i - 2])))
-    return out
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import plotting, tsstore
 
-def first_friday(y, m):
-    d = date(y, m, 1)
-    while d.weekday() != 4:
-        d += timedelta(days=1)
-    return d
+PAYEMS_ID = "FRED/PAYEMS"
+SPX_ID = "STOOQ/^SPX"
 
+EPOCH_MONTH_KEY = 1970 * 12 + 1
 
-def log_return_on_k_trading_days(dates, closes, start_date, k):
-    i = bisect_left(dates, start_date)
-    if i >= len(dates):
-        return None
-    j = i + k
-    if j >= len(dates):
-        return None
-    return float(np.log(closes[j] / closes[i]))
 
+def month_keys(dates):
+    # year * 12 + month, matching the month_key convention used for payroll months
+    return dates.astype("datetime64[M]").astype(np.int64) + EPOCH_MONTH_KEY
 
-def main():
-    folder = os.path.dirname(__file__)
-    payems = read_fred_csv(os.path.join(folder, "payems_fred.csv"))
-    spx_daily = read_stooq_close(os.path.join(folder, "sp500_stooq.csv"))
 
-    payroll_2m = compute_payroll_2m_changes(payems)
-    payroll_vals = np.array([c for _, c in payroll_2m], dtype=float)
+def monthly_series_from_daily(dates, closes):
+    months = dates.astype("datetime64[M]")
+    last_in_month = np.flatnonzero(np.r_[months[1:] != months[:-1], True])
+    return month_keys(dates[last_in_month]), closes[last_in_month]
+
+
+def compute_payroll_2m_changes(payems_dates, payems_vals):
+    return month_keys(payems_dates[2:]), payems_vals[2:] - payems_vals[:-2]
+
+
+def first_friday(month_key_arr):
+    first_day = (np.asarray(month_key_arr) - EPOCH_MONTH_KEY).astype("datetime64[M]").astype("datetime64[D]")
+    return np.busday_offset(first_day, 0, roll="forward", weekmask="Fri")
+
+
+def log_return_on_k_trading_days(dates, closes, start_dates, k):
+    i = np.searchsorted(dates, start_dates, side="left")
+    ok = i + k < len(dates)
+    i = i[ok]
+    return ok, np.log(closes[i + k] / closes[i])
+
+
+def plot_base_rate(folder, payroll_vals, means):
+    plt = plotting.pyplot()
+    plt.figure(figsize=(9, 5))
+    plt.hist(payroll_vals, bins=90, color="steelblue", alpha=0.85)
+    plt.axvline(100.0, color="red", linewidth=2)
+    plt.title("PAYEMS 2-month change distribution (thousands)")
+    plt.xlabel("2-month change (k jobs)")
+    plt.ylabel("Count")
+    plt.tight_layout()
+    plt.savefig(os.path.join(folder, "payroll_change_dist.png"), dpi=150)
+    plt.close()
+
+    xs = ["All", "YES (<100k)", "NO (>=100k)"]
+    plt.figure(figsize=(8, 4))
+    plt.bar(xs, means, color=["#4c78a8", "#e45756", "#54a24b"])
+    plt.title("S&P 500 7-trading-day log return: conditional means")
+    plt.ylabel("Mean log return")
+    plt.tight_layout()
+    plt.savefig(os.path.join(folder, "sp500_return_conditional.png"), dpi=150)
+    plt.close()
+
+
+def load_inputs(folder):
+    return {
+        "payems": tsstore.load_or_import(PAYEMS_ID, os.path.join(folder, "payems_fred.csv"), tsstore.parse_fred_csv),
+        "spx": tsstore.load_or_import(SPX_ID, os.path.join(folder, "sp500_stooq.csv"), tsstore.parse_stooq_csv),
+    }
+
+
+def run(folder=None, inputs=None, write=True):
+    folder = folder or os.path.dirname(__file__)
+    inputs = inputs or load_inputs(folder)
+    payems_dates, payems_vals = inputs["payems"]
+    spx_dates, spx_closes = inputs["spx"]
+
+    payroll_keys, payroll_vals = compute_payroll_2m_changes(payems_dates, payems_vals)
 
     p0 = float(np.mean(payroll_vals < 100.0))
     last_10y = payroll_vals[-120:] if len(payroll_vals) >= 120 else payroll_vals
     p1 = float(np.mean(last_10y < 100.0))
 
-    monthly_changes = np.diff(np.array([v for _, v in payems], dtype=float))
+    monthly_changes = np.diff(payems_vals)
     recent = monthly_changes[-36:] if len(monthly_changes) >= 36 else monthly_changes
     mu = float(np.mean(recent))
     sd = float(np.std(recent, ddof=1)) if len(recent) > 1 else 40.0
@@ -117,23 +95,14 @@ def main():
 
     parent_p = 0.30 * p0 + 0.30 * p1 + 0.40 * p2
 
-    spx_monthly = monthly_series_from_daily(spx_daily)
-    sp_m = np.array([v for _, v in spx_monthly], dtype=float)
+    months, sp_m = monthly_series_from_daily(spx_dates, spx_closes)
     sp_r_1m = np.diff(np.log(sp_m))
 
-    pay_map = {k: v for k, v in payroll_2m}
-    months = [month_key(d + "-01") for d, _ in spx_monthly]
-    ind_1m = []
-    aligned_1m = []
-    for i in range(len(months) - 1):
-        k_m = months[i]
-        if k_m not in pay_map:
-            continue
-        ind_1m.append(pay_map[k_m] < 100.0)
-        aligned_1m.append(float(sp_r_1m[i]))
-
-    ind_1m = np.array(ind_1m, dtype=bool)
-    aligned_1m = np.array(aligned_1m, dtype=float)
+    # Payroll month keys are unique and ascending, so membership is a sorted lookup
+    pos = np.clip(np.searchsorted(payroll_keys, months[:-1]), 0, len(payroll_keys) - 1)
+    has_pay = payroll_keys[pos] == months[:-1]
+    ind_1m = payroll_vals[pos[has_pay]] < 100.0
+    aligned_1m = sp_r_1m[has_pay]
     mu_all_1m = float(np.mean(aligned_1m))
     sd_all_1m = float(np.std(aligned_1m, ddof=1)) if len(aligned_1m) > 1 else 0.05
     mu_yes_1m = float(np.mean(aligned_1m[ind_1m])) if np.any(ind_1m) else mu_all_1m
@@ -141,27 +110,10 @@ def main():
     mu_no_1m = float(np.mean(aligned_1m[~ind_1m])) if np.any(~ind_1m) else mu_all_1m
     sd_no_1m = float(np.std(aligned_1m[~ind_1m], ddof=1)) if np.sum(~ind_1m) > 2 else sd_all_1m
 
-    dates = [date.fromisoformat(d) for d, _ in spx_daily]
-    closes = np.array([v for _, v in spx_daily], dtype=float)
-
-    ind_7d = []
-    aligned_7d = []
-    for k_m, chg in payroll_2m:
-        y, mth = ym_from_key(k_m)
-        yy = y
-        mm = mth + 1
-        if mm == 13:
-            yy += 1
-            mm = 1
-        start = first_friday(yy, mm)
-        r7 = log_return_on_k_trading_days(dates, closes, start, 7)
-        if r7 is None:
-            continue
-        ind_7d.append(chg < 100.0)
-        aligned_7d.append(r7)
-
-    ind_7d = np.array(ind_7d, dtype=bool)
-    aligned_7d = np.array(aligned_7d, dtype=float)
+    # Release proxy: first Friday of the month after the payroll reference month
+    starts = first_friday(payroll_keys + 1)
+    ok_7d, aligned_7d = log_return_on_k_trading_days(spx_dates, spx_closes, starts, 7)
+    ind_7d = payroll_vals[ok_7d] < 100.0
     mu_all_7d = float(np.mean(aligned_7d))
     sd_all_7d = float(np.std(aligned_7d, ddof=1)) if len(aligned_7d) > 1 else 0.02
     mu_yes_7d = float(np.mean(aligned_7d[ind_7d])) if np.any(ind_7d) else mu_all_7d
@@ -204,29 +156,21 @@ def main():
         },
     }
 
-    with open(os.path.join(folder, "base_rate_output.json"), "w") as f:
-        json.dump(out, f, indent=2)
+    if write:
+        with open(os.path.join(folder, "base_rate_output.json"), "w") as f:
+            json.dump(out, f, indent=2)
 
-    plt.figure(figsize=(9, 5))
-    plt.hist(payroll_vals, bins=90, color="steelblue", alpha=0.85)
-    plt.axvline(100.0, color="red", linewidth=2)
-    plt.title("PAYEMS 2-month change distribution (thousands)")
-    plt.xlabel("2-month change (k jobs)")
-    plt.ylabel("Count")
-    plt.tight_layout()
-    plt.savefig(os.path.join(folder, "payroll_change_dist.png"), dpi=150)
-    plt.close()
+        plotting.render(plot_base_rate, folder, payroll_vals, [mu_all_7d, mu_yes_7d, mu_no_7d])
 
-    xs = ["All", "YES (<100k)", "NO (>=100k)"]
-    means = [mu_all_7d, mu_yes_7d, mu_no_7d]
-    plt.figure(figsize=(8, 4))
-    plt.bar(xs, means, color=["#4c78a8", "#e45756", "#54a24b"])
-    plt.title("S&P 500 7-trading-day log return: conditional means")
-    plt.ylabel("Mean log return")
-    plt.tight_layout()
-    plt.savefig(os.path.join(folder, "sp500_return_conditional.png"), dpi=150)
-    plt.close()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Q15 base rates: payroll misses and conditional S&P 500 returns")
+    plotting.add_arguments(parser)
+    plotting.configure(parser.parse_args())
 
+    out = run()
     print(json.dumps(out, indent=2))
 
 
@@ -1,23 +1,14 @@
-import csv
+import argparse
 import json
 import os
+import sys
 from datetime import datetime
 
-import requests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import series_fetch, tsstore
 
-
-def fetch_text(url):
-    r = requests.get(url, timeout=60, headers={"User-Agent": "Mozilla/5.0"})
-    r.raise_for_status()
-    return r.text
-
-
-def fetch_payems_fred():
-    return fetch_text("https://fred.stlouisfed.org/graph/fredgraph.csv?id=PAYEMS")
-
-
-def fetch_spx_stooq():
-    return fetch_text("https://stooq.com/q/d/l/?s=^spx&i=d")
+PAYEMS_ID = "FRED/PAYEMS"
+SPX_ID = "STOOQ/^SPX"
 
 
 def write_text(path, s):
@@ -25,60 +16,41 @@ def write_text(path, s):
         f.write(s)
 
 
-def parse_fred_csv(text):
-    reader = csv.DictReader(text.splitlines())
-    fns = reader.fieldnames or []
-    if not fns:
-        return []
-    date_key = "DATE" if "DATE" in fns else ("observation_date" if "observation_date" in fns else fns[0])
-    val_key = [k for k in fns if k != date_key][0]
-    rows = []
-    for row in reader:
-        d = row.get(date_key)
-        v = row.get(val_key)
-        if d is None or v is None:
-            continue
-        v = v.strip()
-        if v == "" or v == ".":
-            continue
-        rows.append((d, float(v)))
-    return rows
-
-
-def parse_stooq_csv(text):
-    reader = csv.DictReader(text.splitlines())
-    rows = []
-    for row in reader:
-        d = row.get("Date")
-        c = row.get("Close")
-        if d is None or c is None:
-            continue
-        c = c.strip()
-        if c == "" or c == "0":
-            continue
-        rows.append((d, float(c)))
-    return rows
+def run(folder=None, full=False):
+    folder = folder or os.path.dirname(__file__)
+    if not full:
+        # Seed an empty store from the committed snapshots so only the tail is fetched
+        tsstore.load_or_import(PAYEMS_ID, os.path.join(folder, "payems_fred.csv"), tsstore.parse_fred_csv)
+        tsstore.load_or_import(SPX_ID, os.path.join(folder, "sp500_stooq.csv"), tsstore.parse_stooq_csv)
 
+    pay_added, pay_txt = series_fetch.update_fred("PAYEMS", full=full)
+    spx_added, spx_txt = series_fetch.update_stooq("^spx", full=full)
 
-def main():
-    folder = os.path.dirname(__file__)
-    pay_txt = fetch_payems_fred()
-    spx_txt = fetch_spx_stooq()
+    if full:
+        write_text(os.path.join(folder, "payems_fred.csv"), pay_txt)
+        write_text(os.path.join(folder, "sp500_stooq.csv"), spx_txt)
 
-    write_text(os.path.join(folder, "payems_fred.csv"), pay_txt)
-    write_text(os.path.join(folder, "sp500_stooq.csv"), spx_txt)
-
-    pay = parse_fred_csv(pay_txt)
-    spx = parse_stooq_csv(spx_txt)
+    pay_last = tsstore.last_observation(PAYEMS_ID)
+    spx_last = tsstore.last_observation(SPX_ID)
 
     snap = {
         "as_of_utc": datetime.utcnow().isoformat(),
-        "payems_last": pay[-1] if pay else None,
-        "spx_last": spx[-1] if spx else None,
+        "payems_last": list(pay_last) if pay_last else None,
+        "spx_last": list(spx_last) if spx_last else None,
+        "new_observations": {"payems": pay_added, "spx": spx_added},
     }
     with open(os.path.join(folder, "research_snapshot.json"), "w") as f:
         json.dump(snap, f, indent=2)
 
+    return snap
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update PAYEMS and S&P 500 histories")
+    parser.add_argument("--full", action="store_true", help="re-download full histories and rewrite the CSV snapshots")
+    args = parser.parse_args()
+
+    snap = run(full=args.full)
     print(json.dumps(snap, indent=2))
 
 
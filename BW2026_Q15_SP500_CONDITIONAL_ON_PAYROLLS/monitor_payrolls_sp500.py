@@ -1,22 +1,13 @@
 import json
 import os
+import sys
 from datetime import datetime
 
-import requests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import series_fetch, tsstore
 
-
-def fetch_text(url):
-    r = requests.get(url, timeout=60, headers={"User-Agent": "Mozilla/5.0"})
-    r.raise_for_status()
-    return r.text
-
-
-def fetch_payems_fred():
-    return fetch_text("https://fred.stlouisfed.org/graph/fredgraph.csv?id=PAYEMS")
-
-
-def fetch_spx_stooq():
-    return fetch_text("https://stooq.com/q/d/l/?s=^spx&i=d")
+PAYEMS_ID = "FRED/PAYEMS"
+SPX_ID = "STOOQ/^SPX"
 
 
 def load_state(path):
@@ -26,14 +17,19 @@ def load_state(path):
         return {"last_payems_last": None, "last_spx_last": None, "last_run_utc": None}
 
 
-def last_nonempty_line(txt):
-    lines = [x for x in txt.strip().splitlines() if x]
-    if len(lines) < 2:
+def last_obs(series_id):
+    last = tsstore.last_observation(series_id)
+    return list(last) if last is not None else None
+
+
+def as_obs(entry):
+    """(date, value) for a stored state entry; older states hold the raw CSV line (Stooq: Date,Open,High,Low,Close,Volume)."""
+    if entry is None:
         return None
-    for line in reversed(lines[1:]):
-        if "," in line and not line.endswith(","):
-            return line
-    return None
+    if isinstance(entry, str):
+        parts = entry.split(",")
+        return parts[0], float(parts[4] if len(parts) >= 5 else parts[1])
+    return entry[0], float(entry[1])
 
 
 def main():
@@ -41,17 +37,19 @@ def main():
     state_path = os.path.join(folder, "monitor_state.json")
     state = load_state(state_path)
 
-    pay_txt = fetch_payems_fred()
-    spx_txt = fetch_spx_stooq()
+    tsstore.load_or_import(PAYEMS_ID, os.path.join(folder, "payems_fred.csv"), tsstore.parse_fred_csv)
+    tsstore.load_or_import(SPX_ID, os.path.join(folder, "sp500_stooq.csv"), tsstore.parse_stooq_csv)
+    series_fetch.update_fred("PAYEMS")
+    series_fetch.update_stooq("^spx")
 
-    pay_last = last_nonempty_line(pay_txt)
-    spx_last = last_nonempty_line(spx_txt)
+    pay_last = last_obs(PAYEMS_ID)
+    spx_last = last_obs(SPX_ID)
 
     report = {"timestamp_utc": datetime.utcnow().isoformat(), "alerts": [], "payems_last": pay_last, "spx_last": spx_last}
 
-    if state.get("last_payems_last") != pay_last:
+    if as_obs(state.get("last_payems_last")) != as_obs(pay_last):
         report["alerts"].append({"type": "payems_update", "prev": state.get("last_payems_last"), "new": pay_last})
-    if state.get("last_spx_last") != spx_last:
+    if as_obs(state.get("last_spx_last")) != as_obs(spx_last):
         report["alerts"].append({"type": "spx_update", "prev": state.get("last_spx_last"), "new": spx_last})
 
     state["last_payems_last"] = pay_last
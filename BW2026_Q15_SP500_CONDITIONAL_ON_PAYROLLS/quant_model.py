@@ -1,28 +1,17 @@
+import argparse
 import csv
 import json
 import math
 import os
+import sys
 from datetime import datetime, date
 
 import numpy as np
-import matplotlib.pyplot as plt
-
-
-def read_stooq_close(path):
-    rows = []
-    with open(path) as f:
-        r = csv.DictReader(f)
-        for row in r:
-            d = row.get("Date")
-            c = row.get("Close")
-            if d is None or c is None:
-                continue
-            c = c.strip()
-            if c == "" or c == "0":
-                continue
-            rows.append((d, float(c)))
-    rows.sort()
-    return rows
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bw_common import montecarlo, plotting, quantiles, tsstore, variance
+
+SPX_ID = "STOOQ/^SPX"
 
 
 def busdays_between(d0, d1):
@@ -31,27 +20,55 @@ def busdays_between(d0, d1):
     return int(np.busday_count(a, b))
 
 
-def pct(x):
-    return {
-        "p5": float(np.percentile(x, 5)),
-        "p25": float(np.percentile(x, 25)),
-        "p50": float(np.percentile(x, 50)),
-        "p75": float(np.percentile(x, 75)),
-        "p95": float(np.percentile(x, 95)),
-    }
+def simulate(rng, n, p):
+    d_pay = rng.normal(p["m"], p["s"], size=(n, 2)).sum(axis=1)
+    is_yes = d_pay < 100.0
 
+    base_lr = rng.normal(p["mu_d"] * p["days"], p["sd_d"] * math.sqrt(p["days"]), size=n)
+
+    r_all = rng.normal(p["mu_all"], p["sd_all"], size=n)
+    r_group = np.empty(n, dtype=float)
+    r_group[is_yes] = rng.normal(p["mu_yes"], p["sd_yes"], size=int(np.sum(is_yes)))
+    r_group[~is_yes] = rng.normal(p["mu_no"], p["sd_no"], size=int(np.sum(~is_yes)))
+    delta = r_group - r_all
+
+    lr = base_lr + delta
+    st = p["s0"] * np.exp(lr)
+    out = {"is_yes": is_yes, "yes": st[is_yes], "no": st[~is_yes]}
+    if p.get("control_variates"):
+        # the simulated payroll sum has a known mean, 2 * m
+        out["is_yes"] = variance.control_variate(is_yes, d_pay, 2 * p["m"])
+    return out
+
+
+def plot_forecast(folder, hist_yes, hist_no):
+    plt = plotting.pyplot()
+    plt.figure(figsize=(10, 5))
+    hist_no.draw(plt, density=True, alpha=0.45, label="NO (>=100k jobs)", color="#54a24b")
+    hist_yes.draw(plt, density=True, alpha=0.45, label="YES (<100k jobs)", color="#e45756")
+    plt.title("S&P 500 close on 2026-03-13 (conditional on payrolls)")
+    plt.xlabel("S&P 500")
+    plt.ylabel("Density")
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(os.path.join(folder, "sp500_forecast_conditional.png"), dpi=150)
+    plt.close()
 
-def main():
-    folder = os.path.dirname(__file__)
-    base = json.load(open(os.path.join(folder, "base_rate_output.json")))
 
-    spx = read_stooq_close(os.path.join(folder, "sp500_stooq.csv"))
-    s0 = float(spx[-1][1])
-    today = date.fromisoformat(spx[-1][0])
+def run(folder=None, base=None, inputs=None, write=True, draws=None, chunk_size=None, workers=None, seed=42, sampling="plain", control_variates=False):
+    folder = folder or os.path.dirname(__file__)
+    if base is None:
+        base = json.load(open(os.path.join(folder, "base_rate_output.json")))
+
+    if inputs is not None:
+        spx_dates, prices = inputs["spx"]
+    else:
+        spx_dates, prices = tsstore.load_or_import(SPX_ID, os.path.join(folder, "sp500_stooq.csv"), tsstore.parse_stooq_csv)
+    s0 = float(prices[-1])
+    today = date.fromisoformat(str(spx_dates[-1]))
     target = date(2026, 3, 13)
     days = max(1, busdays_between(today.isoformat(), target.isoformat()))
 
-    prices = np.array([v for _, v in spx], dtype=float)
     rets = np.diff(np.log(prices))
     rets = rets[-1260:] if len(rets) > 1260 else rets
     mu_d = float(np.mean(rets))
@@ -69,69 +86,88 @@ def main():
     mu_no = cond["mu_no"]
     sd_no = cond["sd_no"]
 
-    rng = np.random.default_rng(42)
-    n = 500000
-
-    d_pay = rng.normal(m, s, size=(n, 2)).sum(axis=1)
-    is_yes = d_pay < 100.0
-
-    base_lr = rng.normal(mu_d * days, sd_d * math.sqrt(days), size=n)
-
-    r_all = rng.normal(mu_all, sd_all, size=n)
-    r_group = np.empty(n, dtype=float)
-    r_group[is_yes] = rng.normal(mu_yes, sd_yes, size=int(np.sum(is_yes)))
-    r_group[~is_yes] = rng.normal(mu_no, sd_no, size=int(np.sum(~is_yes)))
-    delta = r_group - r_all
-
-    lr = base_lr + delta
-    st = s0 * np.exp(lr)
-
-    st_yes = st[is_yes]
-    st_no = st[~is_yes]
+    params = {
+        "s0": s0,
+        "days": days,
+        "mu_d": mu_d,
+        "sd_d": sd_d,
+        "m": m,
+        "s": s,
+        "mu_all": mu_all,
+        "sd_all": sd_all,
+        "mu_yes": mu_yes,
+        "sd_yes": sd_yes,
+        "mu_no": mu_no,
+        "sd_no": sd_no,
+        "control_variates": control_variates,
+    }
+    if sampling != "plain" or control_variates:
+        draws = draws or 500000
+    if draws:
+        specs = {"is_yes": {"sketch": False}, "yes": {}, "no": {}}
+        res = montecarlo.run_chunked(simulate, draws, params, specs, seed=seed, chunk_size=chunk_size, workers=workers, sampling=sampling)
+        parent = res["is_yes"]
+        pct_yes = res["yes"].percentiles()
+        pct_no = res["no"].percentiles()
+    else:
+        sim = simulate(np.random.default_rng(seed), 500000, params)
+        parent = montecarlo.Summary(sketch=False).add(sim["is_yes"])
+        pct_yes = quantiles.percentiles(sim["yes"])
+        pct_no = quantiles.percentiles(sim["no"])
 
     out = {
         "as_of_utc": datetime.utcnow().isoformat(),
-        "spx_last": {"date": spx[-1][0], "value": s0},
+        "spx_last": {"date": today.isoformat(), "value": s0},
         "target_date": target.isoformat(),
         "horizon_busdays": days,
         "daily_log_return": {"mu": mu_d, "sd": sd_d, "n": int(len(rets))},
         "payroll_sim": {"mu_monthly": m, "sd_monthly": s},
         "conditional_shock": {"type": "7_trading_day_return", "mu_all": mu_all, "sd_all": sd_all, "mu_yes": mu_yes, "sd_yes": sd_yes, "mu_no": mu_no, "sd_no": sd_no},
-        "parent_prob_yes_sim": float(np.mean(is_yes)),
-        "child_percentiles_yes": pct(st_yes),
-        "child_percentiles_no": pct(st_no),
+        "parent_prob_yes_sim": parent.mean,
+        "child_percentiles_yes": pct_yes,
+        "child_percentiles_no": pct_no,
+        "standard_errors": {"parent_prob_yes_sim": parent.standard_errors()["mean"]},
     }
+    if draws:
+        out["simulation"] = montecarlo.layout(draws, chunk_size, seed, sampling, control_variates)
+
+    if write:
+        with open(os.path.join(folder, "forecast_output.json"), "w") as f:
+            json.dump(out, f, indent=2)
+
+        out_cond = {
+            "parent_prob_yes": out["parent_prob_yes_sim"],
+            "sp500_on_2026_03_13_given_yes": out["child_percentiles_yes"],
+            "sp500_on_2026_03_13_given_no": out["child_percentiles_no"],
+        }
+        with open(os.path.join(folder, "conditional_forecasts.json"), "w") as f:
+            json.dump(out_cond, f, indent=2)
+
+        with open(os.path.join(folder, "forecast_percentiles.csv"), "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["branch", "p5", "p25", "p50", "p75", "p95"])
+            y = out["child_percentiles_yes"]
+            n0 = out["child_percentiles_no"]
+            w.writerow(["YES"] + [y[k] for k in ["p5", "p25", "p50", "p75", "p95"]])
+            w.writerow(["NO"] + [n0[k] for k in ["p5", "p25", "p50", "p75", "p95"]])
+
+        if draws:
+            hists = (res["yes"].histogram(90), res["no"].histogram(90))
+        else:
+            hists = (plotting.Histogram.of(sim["yes"], 90), plotting.Histogram.of(sim["no"], 90))
+        plotting.render(plot_forecast, folder, *hists)
+
+    return out
 
-    with open(os.path.join(folder, "forecast_output.json"), "w") as f:
-        json.dump(out, f, indent=2)
-
-    out_cond = {
-        "parent_prob_yes": out["parent_prob_yes_sim"],
-        "sp500_on_2026_03_13_given_yes": out["child_percentiles_yes"],
-        "sp500_on_2026_03_13_given_no": out["child_percentiles_no"],
-    }
-    with open(os.path.join(folder, "conditional_forecasts.json"), "w") as f:
-        json.dump(out_cond, f, indent=2)
 
-    with open(os.path.join(folder, "forecast_percentiles.csv"), "w", newline="") as f:
-        w = csv.writer(f)
-        w.writerow(["branch", "p5", "p25", "p50", "p75", "p95"])
-        y = out["child_percentiles_yes"]
-        n0 = out["child_percentiles_no"]
-        w.writerow(["YES"] + [y[k] for k in ["p5", "p25", "p50", "p75", "p95"]])
-        w.writerow(["NO"] + [n0[k] for k in ["p5", "p25", "p50", "p75", "p95"]])
-
-    plt.figure(figsize=(10, 5))
-    plt.hist(st_no, bins=90, alpha=0.45, density=True, label="NO (>=100k jobs)", color="#54a24b")
-    plt.hist(st_yes, bins=90, alpha=0.45, density=True, label="YES (<100k jobs)", color="#e45756")
-    plt.title("S&P 500 close on 2026-03-13 (conditional on payrolls)")
-    plt.xlabel("S&P 500")
-    plt.ylabel("Density")
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(os.path.join(folder, "sp500_forecast_conditional.png"), dpi=150)
-    plt.close()
+def main():
+    parser = argparse.ArgumentParser(description="Q15 model: S&P 500 on 2026-03-13 conditional on payrolls")
+    plotting.add_arguments(parser)
+    montecarlo.add_arguments(parser, control_variates=True)
+    args = parser.parse_args()
+    plotting.configure(args)
 
+    out = run(**montecarlo.options(args))
     print(json.dumps(out, indent=2))
 
 
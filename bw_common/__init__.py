@@ -0,0 +1 @@
+"""Shared helpers used by the BW2026_Q* question folders."""
@@ -0,0 +1,66 @@
+"""
+Closed-form summaries for normals clipped to [0, 1].
+
+Probability inputs are often given as a normal belief clipped to [0, 1].
+moments() returns the first two moments of such a variable analytically: the
+mass below 0 sits at 0, the mass above 1 sits at 1, and the interior is a
+truncated normal.
+
+The combined_* functions summarise the OpenAI price-change model
+
+    combined = 1 - (1 - cut)^2 * (1 - launch_cut_prob * launch)
+
+with cut and launch independent clipped normals. The mean follows from the
+moments. Quantiles invert the CDF
+
+    P(combined <= t) = E_launch[ P(cut <= 1 - sqrt((1 - t) / (1 - launch_cut_prob * launch))) ]
+
+by bisection, with the outer expectation taken over an equal-weight quantile
+grid of launch. This replaces sampling the model, and the summary has no
+Monte Carlo noise.
+"""
+
+import numpy as np
+
+
+def moments(mean, sd):
+    """(E[X], E[X^2]) for X = clip(N(mean, sd^2), 0, 1)."""
+    from scipy.special import ndtr
+
+    a = -mean / sd
+    b = (1 - mean) / sd
+    pdf_a = np.exp(-0.5 * a * a) / np.sqrt(2 * np.pi)
+    pdf_b = np.exp(-0.5 * b * b) / np.sqrt(2 * np.pi)
+    inside = ndtr(b) - ndtr(a)
+    m1 = mean * inside + sd * (pdf_a - pdf_b) + (1 - ndtr(b))
+    m2 = (mean**2 + sd**2) * inside + sd * (mean * pdf_a - (1 + mean) * pdf_b) + (1 - ndtr(b))
+    return float(m1), float(m2)
+
+
+def combined_cdf(t, cut_mean, cut_sd, launch_mean, launch_sd, launch_cut_prob, grid=4000):
+    from scipy.special import ndtr, ndtri
+
+    launch = np.clip(launch_mean + launch_sd * ndtri((np.arange(grid) + 0.5) / grid), 0, 1)
+    t = np.asarray(t, dtype=float)[..., None]
+    cut = 1 - np.sqrt((1 - t) / (1 - launch_cut_prob * launch))
+    f_cut = np.where(cut < 0, 0.0, np.where(cut >= 1, 1.0, ndtr((cut - cut_mean) / cut_sd)))
+    return f_cut.mean(axis=-1)
+
+
+def combined_quantiles(qs, *params, iters=50):
+    lo = np.zeros(len(qs))
+    hi = np.ones(len(qs))
+    for _ in range(iters):
+        mid = 0.5 * (lo + hi)
+        below = combined_cdf(mid, *params) < np.asarray(qs)
+        lo = np.where(below, mid, lo)
+        hi = np.where(below, hi, mid)
+    return hi
+
+
+def combined_summary(cut_mean, cut_sd, launch_mean, launch_sd, launch_cut_prob):
+    c1, c2 = moments(cut_mean, cut_sd)
+    l1, _ = moments(launch_mean, launch_sd)
+    mean = 1 - (1 - 2 * c1 + c2) * (1 - launch_cut_prob * l1)
+    median, p5, p95 = combined_quantiles([0.5, 0.05, 0.95], cut_mean, cut_sd, launch_mean, launch_sd, launch_cut_prob)
+    return {"mean": float(mean), "median": float(median), "p5": float(p5), "p95": float(p95)}
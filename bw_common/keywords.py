@@ -0,0 +1,80 @@
+"""
+Multi-term keyword matching for the monitor fallbacks.
+
+A KeywordMatcher compiles a keyword or entity list once into a single
+case-insensitive regular expression. The terms are merged into a character
+trie first ("ai lab", "ai firm" -> "ai (?:firm|lab)"), so the cost of a scan
+grows with the length of the text and the depth of the trie, not with the
+number of terms. Watchlists can therefore grow to thousands of entities.
+
+Terms match as whole words, with an optional plural "s"/"es" ("layoff"
+matches "layoffs" but not "layoffed"; "Pika" does not match "pikachu"). The
+pattern is a lookahead anchored at every word start, so terms that overlap
+or nest ("Meta AI company" -> "Meta AI", "AI company") are all reported.
+At a given start the longest term wins. findall() returns the matched terms
+in their original spelling, in order of first appearance.
+
+Spaces and hyphens between words are interchangeable, in the terms and in the
+text: "AI lab" matches "AI-lab" and "AI  lab", and "non-profit" matches
+"non profit". The plural suffix attaches to the last word of a term, so
+"let go" also matches "let goes".
+"""
+
+import re
+
+_SEPARATOR = re.compile(r"[\s-]+")
+
+
+def _normalize(term):
+    return _SEPARATOR.sub(" ", term.strip().lower())
+
+
+def _trie(terms):
+    root = {}
+    for term in terms:
+        node = root
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return root
+
+
+def _pattern(node):
+    alts = [(r"[\s-]+" if ch == " " else re.escape(ch)) + _pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not alts:
+        return ""
+    body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+    # the greedy optional tries the longer term first
+    return f"(?:{body})?" if "" in node else body
+
+
+class KeywordMatcher:
+    def __init__(self, terms):
+        self.terms = {}
+        for term in terms:
+            self.terms.setdefault(_normalize(term), term)
+        if self.terms:
+            trie = _pattern(_trie(self.terms))
+            self.regex = re.compile(rf"(?<!\w)(?=({trie})(?:e?s)?(?!\w))", re.IGNORECASE)
+        else:
+            self.regex = None
+
+    def __len__(self):
+        return len(self.terms)
+
+    def finditer(self, text):
+        """Yield (position, term) for every match, overlaps included."""
+        if self.regex is None:
+            return
+        for m in self.regex.finditer(text):
+            yield m.start(), self.terms[_normalize(m.group(1))]
+
+    def findall(self, text):
+        return list(dict.fromkeys(term for _, term in self.finditer(text)))
+
+    def search(self, text):
+        """First matched term, or None."""
+        return next((term for _, term in self.finditer(text)), None)
+
+    def matches(self, text):
+        return self.search(text) is not None
@@ -0,0 +1,185 @@
+"""
+Batched, cached relevance scoring of monitor items with an LLM.
+
+A monitor describes its question once, as a prompt template holding an
+{items} placeholder, and hands every new item to Scorer.score(). The scorer:
+
+    - looks each item up in a verdict cache keyed by a digest of the
+      template, the backend's model and the item's title and description,
+      so a headline already scored costs nothing, whichever feed or run it
+      came from;
+    - splits the misses into batches of at most `batch_size` items and
+      `max_chars` characters of item text;
+    - scores the batches concurrently on a thread pool;
+    - stores the new verdicts and returns one verdict dict (or None) per
+      input item, in order.
+
+The cache is SQLite (data/llm_verdicts.sqlite, or BW_LLM_CACHE) and is only
+touched from the calling thread. A backend exposes `name` and
+score(template, items) -> list of verdict dicts. AnthropicBackend calls the
+Messages API. StubBackend wraps a local function item -> verdict, for tests
+and offline runs. When a batch fails, the scorer's `fallback` backend, if
+given, scores it instead. Stub and fallback verdicts are not cached, so the
+items are tried again with the real backend next time.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "llm_verdicts.sqlite")
+DEFAULT_MODEL = "claude-sonnet-4-20250514"
+DEFAULT_BATCH_SIZE = 10
+DEFAULT_MAX_CHARS = 8000
+DEFAULT_WORKERS = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    key TEXT PRIMARY KEY,
+    backend TEXT NOT NULL,
+    verdict TEXT NOT NULL,
+    created REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def cache_path(path=None):
+    return path or os.environ.get("BW_LLM_CACHE") or DEFAULT_PATH
+
+
+def item_text(item):
+    return f"Source: {item.get('source', 'N/A')}\nTitle: {item.get('title', '')}\nDescription: {item.get('description') or 'N/A'}"
+
+
+def format_items(items):
+    return "\n\n".join(f"ITEM {i + 1}:\n{item_text(item)}" for i, item in enumerate(items))
+
+
+class AnthropicBackend:
+    """Scores a batch with one Messages API call; the template must ask for {"analyses": [{"item": n, ...}]}."""
+
+    def __init__(self, api_key, model=DEFAULT_MODEL, max_tokens=2000):
+        import anthropic
+
+        self.client = anthropic.Anthropic(api_key=api_key)
+        self.model = model
+        self.max_tokens = max_tokens
+        self.name = f"anthropic:{model}"
+
+    def score(self, template, items):
+        prompt = template.replace("{items}", format_items(items))
+        response = self.client.messages.create(model=self.model, max_tokens=self.max_tokens, messages=[{"role": "user", "content": prompt}])
+        match = re.search(r"\{[\s\S]*\}", response.content[0].text)
+        if not match:
+            raise ValueError("no JSON object in model response")
+        verdicts = [None] * len(items)
+        for analysis in json.loads(match.group()).get("analyses", []):
+            # skip malformed entries rather than caching them
+            if not isinstance(analysis, dict) or not isinstance(analysis.get("item"), int):
+                continue
+            idx = analysis.pop("item") - 1
+            if 0 <= idx < len(items):
+                verdicts[idx] = analysis
+        return verdicts
+
+
+class StubBackend:
+    """Local backend: verdict(item) -> dict or None, no network. Its verdicts are not cached."""
+
+    cacheable = False
+
+    def __init__(self, verdict, name="stub"):
+        self.verdict = verdict
+        self.name = name
+
+    def score(self, template, items):
+        return [self.verdict(item) for item in items]
+
+
+def batches(items, batch_size=DEFAULT_BATCH_SIZE, max_chars=DEFAULT_MAX_CHARS):
+    """Split (index, item) pairs into batches bounded by count and text length."""
+    out, cur, size = [], [], 0
+    for pair in items:
+        n = len(item_text(pair[1]))
+        if cur and (len(cur) >= batch_size or size + n > max_chars):
+            out.append(cur)
+            cur, size = [], 0
+        cur.append(pair)
+        size += n
+    if cur:
+        out.append(cur)
+    return out
+
+
+class Scorer:
+    def __init__(self, backend, template, fallback=None, path=None, batch_size=DEFAULT_BATCH_SIZE, max_chars=DEFAULT_MAX_CHARS, workers=DEFAULT_WORKERS):
+        self.backend = backend
+        self.template = template
+        self.fallback = fallback
+        self.batch_size = batch_size
+        self.max_chars = max_chars
+        self.workers = workers
+        self.path = cache_path(path)
+        self.stats = {"cached": 0, "scored": 0, "batches": 0}
+
+    def key(self, item):
+        text = f"{item.get('title', '')}\n{item.get('description') or ''}"
+        return hashlib.sha256(f"{self.backend.name}\0{self.template}\0{text}".encode()).hexdigest()[:32]
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        db = sqlite3.connect(self.path, timeout=30)
+        db.executescript(_SCHEMA)
+        return db
+
+    def _score_batch(self, batch):
+        items = [item for _, item in batch]
+        try:
+            return self.backend.score(self.template, items), getattr(self.backend, "cacheable", True)
+        except Exception as e:
+            if self.fallback is None:
+                print(f"✗ LLM batch of {len(items)} failed: {e}")
+                return [None] * len(items), False
+            print(f"✗ LLM batch of {len(items)} failed ({e}), using {self.fallback.name}")
+            return self.fallback.score(self.template, items), False
+
+    def score(self, items):
+        items = list(items)
+        keys = [self.key(item) for item in items]
+        verdicts = [None] * len(items)
+        db = self._connect()
+        try:
+            todo = {}
+            for i, k in enumerate(keys):
+                row = db.execute("SELECT verdict FROM verdicts WHERE key = ?", (k,)).fetchone()
+                if row is not None:
+                    verdicts[i] = json.loads(row[0])
+                    self.stats["cached"] += 1
+                else:
+                    # identical items in one run are scored once
+                    todo.setdefault(k, []).append(i)
+
+            work = batches([(idxs[0], items[idxs[0]]) for idxs in todo.values()], self.batch_size, self.max_chars)
+            self.stats["batches"] += len(work)
+            if work:
+                with ThreadPoolExecutor(max_workers=min(self.workers, len(work))) as pool:
+                    results = list(pool.map(self._score_batch, work))
+                now = time.time()
+                for batch, (scored, cacheable) in zip(work, results):
+                    for (i, _), verdict in zip(batch, scored):
+                        for j in todo[keys[i]]:
+                            verdicts[j] = verdict
+                        self.stats["scored"] += 1
+                        if cacheable and verdict is not None:
+                            db.execute(
+                                "INSERT OR REPLACE INTO verdicts (key, backend, verdict, created) VALUES (?, ?, ?, ?)",
+                                (keys[i], self.backend.name, json.dumps(verdict), now),
+                            )
+                db.commit()
+        finally:
+            db.close()
+        return verdicts
@@ -0,0 +1,220 @@
+"""
+Chunked, multi-process Monte Carlo driver for the question models.
+
+A model exposes its sampler as simulate(rng, n, params) returning a dict of
+named 1-D arrays (conditional subsets may be shorter than n; boolean arrays
+give probabilities through their mean). run_chunked() splits the requested
+draws into chunks, seeds each chunk from SeedSequence(seed).spawn(), runs the
+chunks on a process pool and folds every named output into a Summary:
+
+    count / mean / sd        merged with the parallel-variance update
+    tail_probs()             exact counts below/above fixed thresholds
+    percentiles()            from a mergeable quantiles.QuantileSketch
+    histogram(bins)          rebuilt from the sketch for plotting
+    standard_errors()        batch means over the chunks (i.i.d. formula
+                             for a single pass)
+
+sample_mixture() draws from a weighted mixture by fixing the component
+counts with one multinomial draw and then generating only the draws each
+component needs, instead of simulating every component for all n draws and
+masking.
+
+Chunk summaries are merged in chunk order, so results are bit-reproducible
+for a given (seed, draws, chunk_size, sampling) whatever the worker count;
+only the chunk layout changes the numbers. sampling picks the chunk
+generators from bw_common.variance (plain, antithetic or sobol); the
+variance-reduced methods are not i.i.d. within a chunk, so their standard
+errors rely on having several chunks. Workers are forked, so simulate may be a
+function defined in the calling script. The worker count defaults to
+BW_WORKERS, then the CPU count.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bw_common import plotting, quantiles, variance
+
+DEFAULT_CHUNK_SIZE = 250000
+MIN_CHUNKS = 16
+
+
+class Summary:
+    def __init__(self, lt=(), gt=(), sketch=True, k=4096, seed=None):
+        self.lt = tuple(lt)
+        self.gt = tuple(gt)
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.n_lt = np.zeros(len(self.lt), dtype=np.int64)
+        self.n_gt = np.zeros(len(self.gt), dtype=np.int64)
+        # (n, mean, tail probabilities) per add(), the replicates behind standard_errors()
+        self.parts = []
+        self.sketch = quantiles.QuantileSketch(k=k, seed=seed) if sketch else None
+
+    def add(self, samples):
+        x = np.asarray(samples, dtype=float).ravel()
+        if x.size == 0:
+            return self
+        other = Summary(self.lt, self.gt, sketch=False)
+        other.n = x.size
+        other.mean = float(x.mean())
+        other.m2 = float(np.sum((x - other.mean) ** 2))
+        other.n_lt = np.array([np.count_nonzero(x < t) for t in self.lt], dtype=np.int64)
+        other.n_gt = np.array([np.count_nonzero(x > t) for t in self.gt], dtype=np.int64)
+        self._merge_moments(other)
+        self.parts.append((other.n, other.mean, np.concatenate([other.n_lt, other.n_gt]) / other.n))
+        if self.sketch is not None:
+            self.sketch.add(x)
+        return self
+
+    def merge(self, other):
+        if (self.lt, self.gt) != (other.lt, other.gt):
+            raise ValueError("cannot merge summaries with different thresholds")
+        self._merge_moments(other)
+        self.parts.extend(other.parts)
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+        return self
+
+    def _merge_moments(self, other):
+        n = self.n + other.n
+        if n == 0:
+            return
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        self.n_lt += other.n_lt
+        self.n_gt += other.n_gt
+
+    @property
+    def sd(self):
+        return float(np.sqrt(self.m2 / self.n)) if self.n else float("nan")
+
+    def tail_probs(self):
+        out = {f"p_lt_{t:g}": float(c / self.n) for t, c in zip(self.lt, self.n_lt)}
+        out.update({f"p_gt_{t:g}": float(c / self.n) for t, c in zip(self.gt, self.n_gt)})
+        return out
+
+    def standard_errors(self):
+        """Standard errors of mean and tail_probs(), keyed like them."""
+        keys = ["mean"] + list(self.tail_probs())
+        if len(self.parts) > 1:
+            w = np.array([p[0] for p in self.parts], dtype=float) / self.n
+            est = np.array([[p[1], *p[2]] for p in self.parts], dtype=float)
+            dev = est - w @ est
+            r = len(self.parts)
+            se = np.sqrt(r / (r - 1) * (w**2) @ (dev**2))
+        else:
+            probs = np.array(list(self.tail_probs().values()), dtype=float)
+            se = np.concatenate([[self.sd], np.sqrt(probs * (1.0 - probs))]) / np.sqrt(max(self.n, 1))
+        return {k: float(v) for k, v in zip(keys, se)}
+
+    def percentiles(self, ps=quantiles.DEFAULT_PERCENTILES):
+        return self.sketch.percentiles(ps)
+
+    def histogram(self, bins=50):
+        items, weights = self.sketch.items()
+        counts, edges = np.histogram(items, bins=bins, range=(self.sketch.min, self.sketch.max), weights=weights)
+        h = plotting.Histogram(edges)
+        h.counts += np.rint(counts).astype(np.int64)
+        return h
+
+
+def sample_mixture(rng, n, weights, samplers, out=None):
+    """
+    Draw n samples from the mixture of samplers[i](rng, size) with the given
+    weights. Draws come back grouped by component: component i fills
+    out[start[i]:start[i + 1]]. Returns (out, start).
+    """
+    weights = np.asarray(weights, dtype=float)
+    counts = rng.multinomial(n, weights / weights.sum())
+    start = np.concatenate([[0], np.cumsum(counts)])
+    if out is None:
+        out = np.empty(n, dtype=float)
+    for i, sampler in enumerate(samplers):
+        if counts[i]:
+            out[start[i] : start[i + 1]] = sampler(rng, int(counts[i]))
+    return out, start
+
+
+def chunk_sizes(n, chunk_size=DEFAULT_CHUNK_SIZE):
+    chunk_size = max(1, int(chunk_size))
+    full, rest = divmod(int(n), chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+
+def resolve_chunk_size(n, chunk_size=None):
+    # by default keep at least MIN_CHUNKS replicates for the standard errors
+    return int(chunk_size or min(DEFAULT_CHUNK_SIZE, -(-int(n) // MIN_CHUNKS)))
+
+
+def layout(n, chunk_size=None, seed=42, sampling="plain", control_variates=False):
+    chunk_size = resolve_chunk_size(n, chunk_size)
+    out = {"draws": int(n), "chunk_size": chunk_size, "chunks": len(chunk_sizes(n, chunk_size)), "seed": seed, "variance_reduction": sampling}
+    if control_variates:
+        out["control_variates"] = True
+    return out
+
+
+def _run_chunk(task):
+    simulate, size, seq, params, specs, method = task
+    sim_seq, sketch_seq = seq.spawn(2)
+    draws = simulate(variance.generator(sim_seq, method, size), size, params)
+    sketch_seeds = sketch_seq.spawn(len(specs))
+    out = {}
+    for (name, spec), ss in zip(specs.items(), sketch_seeds):
+        out[name] = Summary(seed=ss, **spec).add(draws[name])
+    return out
+
+
+def run_chunked(simulate, n, params=None, specs=None, seed=42, chunk_size=None, workers=None, sampling="plain"):
+    """
+    Draw n samples from simulate(rng, size, params) in chunks and return
+    {name: Summary} for each output named in specs ({name: Summary kwargs}).
+    """
+    sizes = chunk_sizes(n, resolve_chunk_size(n, chunk_size))
+    if sampling != "plain" and len(sizes) < 2:
+        raise ValueError(f"{sampling} sampling needs at least two chunks to estimate standard errors")
+    seqs = np.random.SeedSequence(seed).spawn(len(sizes))
+    specs = specs or {}
+    tasks = [(simulate, size, seq, params, specs, sampling) for size, seq in zip(sizes, seqs)]
+    workers = min(workers or int(os.environ.get("BW_WORKERS") or 0) or os.cpu_count() or 1, len(tasks))
+
+    if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as pool:
+            return _merge_parts(pool.map(_run_chunk, tasks))
+    return _merge_parts(map(_run_chunk, tasks))
+
+
+def _merge_parts(parts):
+    # parts arrive in chunk order, which keeps sketch compaction deterministic
+    merged = None
+    for part in parts:
+        if merged is None:
+            merged = part
+            continue
+        for name, summary in part.items():
+            merged[name].merge(summary)
+    return merged
+
+
+def add_arguments(parser, control_variates=False):
+    group = parser.add_argument_group("Monte Carlo")
+    group.add_argument("--draws", type=int, default=None, help="run a chunked simulation with this many draws instead of the default single pass")
+    group.add_argument("--chunk-size", type=int, default=None, help=f"draws per chunk (default: up to {DEFAULT_CHUNK_SIZE}, at least {MIN_CHUNKS} chunks)")
+    group.add_argument("--workers", type=int, default=None, help="worker processes for chunked runs (default: BW_WORKERS or CPU count)")
+    group.add_argument("--seed", type=int, default=42, help="random seed (the root seed for chunked runs)")
+    group.add_argument("--variance-reduction", dest="sampling", choices=variance.METHODS, default="plain", help="sampling scheme for chunked runs (implies a chunked run)")
+    if control_variates:
+        group.add_argument("--control-variates", action="store_true", help="adjust probability estimates with control variates (implies a chunked run)")
+
+
+def options(args):
+    out = {"draws": args.draws, "chunk_size": args.chunk_size, "workers": args.workers, "seed": args.seed, "sampling": args.sampling}
+    if hasattr(args, "control_variates"):
+        out["control_variates"] = args.control_variates
+    return out
@@ -0,0 +1,102 @@
+"""
+Content-addressed cache of per-page PDF text.
+
+Extracted page text is stored under data/pdf_text/<sha256 of the PDF>.json,
+so an unchanged PDF is never handed to PdfReader twice, whichever script
+or path it is read from. search_text walks pages in order and stops at the
+first page where the pattern matches, extracting (and caching) only as many
+pages as it needed.
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+
+from pypdf import PdfReader
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "pdf_text")
+
+
+def _read_bytes(source):
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    with open(source, "rb") as f:
+        return f.read()
+
+
+class PageTextCache:
+    def __init__(self, source, cache_dir=None):
+        self.data = _read_bytes(source)
+        digest = hashlib.sha256(self.data).hexdigest()
+        self.path = os.path.join(cache_dir or CACHE_DIR, f"{digest}.json")
+        self.reader = None
+        self.dirty = False
+        try:
+            with open(self.path) as f:
+                cached = json.load(f)
+            self.n_pages = cached["n_pages"]
+            self.pages = cached["pages"]
+        except (FileNotFoundError, ValueError, KeyError):
+            self.n_pages = None
+            self.pages = []
+
+    def _open(self):
+        if self.reader is None:
+            self.reader = PdfReader(io.BytesIO(self.data))
+            self.n_pages = len(self.reader.pages)
+        return self.reader
+
+    def page_count(self):
+        if self.n_pages is None:
+            self._open()
+        return self.n_pages
+
+    def page(self, i):
+        while len(self.pages) <= i:
+            reader = self._open()
+            self.pages.append(reader.pages[len(self.pages)].extract_text() or "")
+            self.dirty = True
+        return self.pages[i]
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"n_pages": self.page_count(), "pages": self.pages}, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+def search_text(source, pattern, flags=0, tail_chars=0, cache_dir=None):
+    """
+    Return (match, text) where text is the "\\n"-joined page text up to the first
+    page on which `pattern` matches, extended page by page until at least
+    `tail_chars` characters follow the match start, and match is the pattern's
+    first match in that text. Without a match, returns (None, full_text).
+    """
+    cache = PageTextCache(source, cache_dir)
+    rx = re.compile(pattern, flags)
+    text = ""
+    match = None
+    try:
+        for i in range(cache.page_count()):
+            text = cache.page(i) if i == 0 else text + "\n" + cache.page(i)
+            if match is None:
+                match = rx.search(text)
+            if match is not None and len(text) - match.start() >= tail_chars:
+                break
+    finally:
+        cache.save()
+    return match, text
+
+
+def full_text(source, cache_dir=None):
+    cache = PageTextCache(source, cache_dir)
+    try:
+        return "\n".join(cache.page(i) for i in range(cache.page_count()))
+    finally:
+        cache.save()
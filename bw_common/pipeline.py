@@ -0,0 +1,270 @@
+"""
+Portfolio pipeline runner for the BW2026_Q* question folders.
+
+Stages are discovered from the scripts in each folder and ordered by role
+(fetch -> base_rate -> analysis -> model -> plots); each stage depends on
+the stages of the previous role in the same folder, and folders are
+independent of each other. Ready stages run as subprocesses on a worker
+pool, so a full refresh takes about as long as the slowest question. Each
+stage gets BW_WORKERS = CPU count // jobs, which caps the process pools that
+montecarlo and sweep start inside it, so parallel stages do not oversubscribe
+the machine.
+
+A stage is skipped when the sha256 digest of its inputs matches the last
+successful run and its recorded outputs still exist. Inputs are the script
+itself, any bw_common modules it imports (plus the shared data they read),
+the folder's static data files and the outputs of upstream stages. Outputs
+are learned by watching which files in the folder a run creates or changes.
+Fetch stages touch the network and only run with --fetch; drivers and
+monitors are not pipeline stages.
+
+    python -m bw_common.pipeline                 # every question
+    python -m bw_common.pipeline Q09 Q15 --list  # show the DAG for a subset
+    python -m bw_common.pipeline --fetch --force
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_DIR = os.path.join(REPO_ROOT, "data", "pipeline")
+STATE_PATH = os.path.join(STATE_DIR, "state.json")
+LOG_DIR = os.path.join(STATE_DIR, "logs")
+
+ROLE_ORDER = ["fetch", "base_rate", "analysis", "model", "plots"]
+DRIVERS = {"analysis_runner.py", "pmi_analysis.py", "capex_analysis.py"}
+DATA_EXTS = {".csv", ".json", ".pdf", ".txt", ".xlsx"}
+SHARED_INPUTS = {
+    "tsstore": os.path.join(REPO_ROOT, "data", "timeseries", "*.json"),
+    "series_fetch": os.path.join(REPO_ROOT, "data", "timeseries", "*.json"),
+    "sec_fetch": os.path.join(REPO_ROOT, "data", "http_cache", "sec", "*.meta.json"),
+}
+
+
+def stage_role(name):
+    if "monitor" in name or name == "quick_check.py" or name in DRIVERS:
+        return None
+    if name.endswith("_fetch.py"):
+        return "fetch"
+    if name == "base_rate_calc.py":
+        return "base_rate"
+    if name == "quant_model.py":
+        return "model"
+    if name.startswith("create_"):
+        return "plots"
+    return "analysis"
+
+
+def question_dirs(selectors=None):
+    dirs = sorted(d for d in glob.glob(os.path.join(REPO_ROOT, "BW2026_Q*")) if os.path.isdir(d))
+    if selectors:
+        dirs = [d for d in dirs if any(os.path.basename(d).startswith(f"BW2026_{s}") or os.path.basename(d) == s for s in selectors)]
+    return dirs
+
+
+def discover_stages(selectors=None):
+    stages = {}
+    for folder in question_dirs(selectors):
+        qname = os.path.basename(folder)
+        by_role = {}
+        for path in sorted(glob.glob(os.path.join(folder, "*.py"))):
+            role = stage_role(os.path.basename(path))
+            if role is not None:
+                by_role.setdefault(role, []).append(path)
+        prev = []
+        for role in ROLE_ORDER:
+            ids = []
+            for path in by_role.get(role, []):
+                sid = f"{qname}/{os.path.basename(path)}"
+                stages[sid] = {"id": sid, "question": qname, "folder": folder, "script": path, "role": role, "deps": list(prev)}
+                ids.append(sid)
+            if ids:
+                prev = ids
+    return stages
+
+
+def upstream(stages, sid):
+    seen = set()
+    todo = list(stages[sid]["deps"])
+    while todo:
+        d = todo.pop()
+        if d not in seen:
+            seen.add(d)
+            todo.extend(stages[d]["deps"])
+    return seen
+
+
+def load_state():
+    try:
+        with open(STATE_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_state(state):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    tmp = STATE_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, STATE_PATH)
+
+
+def stage_inputs(stages, sid, state):
+    st = stages[sid]
+    with open(st["script"], encoding="utf-8", errors="replace") as f:
+        source = f.read()
+    paths = [st["script"]]
+    if "bw_common" in source:
+        paths += sorted(glob.glob(os.path.join(REPO_ROOT, "bw_common", "*.py")))
+        for module, pattern in SHARED_INPUTS.items():
+            if module in source:
+                paths += sorted(glob.glob(pattern))
+
+    ups = upstream(stages, sid)
+    produced = {}
+    for other in stages:
+        if stages[other]["question"] == st["question"]:
+            for p in state.get(other, {}).get("outputs", []):
+                produced[p] = other
+    for path in sorted(glob.glob(os.path.join(st["folder"], "*"))):
+        if os.path.splitext(path)[1].lower() not in DATA_EXTS:
+            continue
+        rel = os.path.relpath(path, REPO_ROOT)
+        owner = produced.get(rel)
+        if owner is None or owner in ups:
+            paths.append(path)
+    return sorted(set(paths))
+
+
+def digest_files(paths):
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(os.path.relpath(path, REPO_ROOT).encode())
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+        except FileNotFoundError:
+            h.update(b"\0missing")
+    return h.hexdigest()
+
+
+def snapshot(folder):
+    out = {}
+    for path in glob.glob(os.path.join(folder, "*")):
+        if os.path.isfile(path):
+            s = os.stat(path)
+            out[os.path.relpath(path, REPO_ROOT)] = (s.st_mtime_ns, s.st_size)
+    return out
+
+
+def is_fresh(stages, sid, state):
+    prev = state.get(sid)
+    if not prev or prev.get("status") != "ok":
+        return False
+    if any(not os.path.exists(os.path.join(REPO_ROOT, p)) for p in prev.get("outputs", [])):
+        return False
+    return prev.get("digest") == digest_files(stage_inputs(stages, sid, state))
+
+
+def run_stage(stage, workers=1):
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_path = os.path.join(LOG_DIR, stage["id"].replace("/", "__").replace("?", "") + ".log")
+    env = dict(os.environ, MPLBACKEND="Agg", PYTHONUNBUFFERED="1", BW_WORKERS=str(workers))
+    before = snapshot(stage["folder"])
+    t0 = time.perf_counter()
+    with open(log_path, "w") as log:
+        rc = subprocess.call([sys.executable, stage["script"]], cwd=stage["folder"], env=env, stdout=log, stderr=subprocess.STDOUT)
+    seconds = time.perf_counter() - t0
+    after = snapshot(stage["folder"])
+    outputs = sorted(p for p, sig in after.items() if before.get(p) != sig)
+    return {"status": "ok" if rc == 0 else "failed", "returncode": rc, "seconds": round(seconds, 3), "outputs": outputs, "log": os.path.relpath(log_path, REPO_ROOT)}
+
+
+def run_pipeline(selectors=None, jobs=None, force=False, fetch=False, verbose=True):
+    stages = discover_stages(selectors)
+    state = load_state()
+    jobs = jobs or os.cpu_count() or 1
+    stage_workers = max(1, (os.cpu_count() or 1) // jobs)
+    results = {}
+    pending = dict(stages)
+    running = {}
+    t0 = time.perf_counter()
+
+    def report(sid, status, detail=""):
+        results[sid] = status
+        if verbose:
+            print(f"[{time.perf_counter() - t0:7.1f}s] {status:<8} {sid}{' ' + detail if detail else ''}", flush=True)
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for sid in list(pending):
+                deps = stages[sid]["deps"]
+                if any(d not in results for d in deps):
+                    continue
+                del pending[sid]
+                if any(results[d] in ("failed", "blocked") for d in deps):
+                    report(sid, "blocked")
+                elif stages[sid]["role"] == "fetch" and not fetch:
+                    report(sid, "skipped", "(network stage; pass --fetch)")
+                elif not force and is_fresh(stages, sid, state):
+                    report(sid, "fresh")
+                else:
+                    running[pool.submit(run_stage, stages[sid], stage_workers)] = sid
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                sid = running.pop(fut)
+                res = fut.result()
+                res["finished_utc"] = datetime.utcnow().isoformat()
+                state[sid] = res
+                report(sid, res["status"], f"{res['seconds']:.1f}s" + ("" if res["status"] == "ok" else f" (see {res['log']})"))
+
+    # Record input digests once every stage has run, so that outputs learned
+    # during this run are already classified when the inputs are hashed.
+    for sid, status in results.items():
+        if status == "ok" and sid in state:
+            state[sid]["digest"] = digest_files(stage_inputs(stages, sid, state))
+    save_state(state)
+    if verbose:
+        counts = {}
+        for status in results.values():
+            counts[status] = counts.get(status, 0) + 1
+        print(f"done in {time.perf_counter() - t0:.1f}s: " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+    return results
+
+
+def print_dag(selectors=None):
+    stages = discover_stages(selectors)
+    for sid, st in stages.items():
+        deps = ", ".join(d.split("/", 1)[1] for d in st["deps"]) or "-"
+        print(f"{sid}  [{st['role']}]  <- {deps}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the BW2026 question pipelines")
+    parser.add_argument("questions", nargs="*", help="question prefixes to run, e.g. Q09 Q15 (default: all)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="parallel stages (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="rerun stages even when their inputs are unchanged")
+    parser.add_argument("--fetch", action="store_true", help="also run network fetch stages")
+    parser.add_argument("--list", action="store_true", help="print the stage DAG and exit")
+    args = parser.parse_args()
+    if args.list:
+        print_dag(args.questions)
+        return
+    results = run_pipeline(args.questions, jobs=args.jobs, force=args.force, fetch=args.fetch)
+    sys.exit(1 if any(s == "failed" for s in results.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Lazy, optional chart rendering for the model scripts.
+
+matplotlib is imported only when a chart is actually drawn, using the
+non-interactive Agg backend unless MPLBACKEND is set. The plot mode decides
+what render() does:
+
+    on          draw inline, after the caller has written its JSON (default)
+    off         skip charts entirely
+    background  draw in a forked worker process while the caller carries on
+
+The mode comes from set_mode() / the --no-plots and --background-plots
+flags, falling back to the BW_PLOTS environment variable; set_mode() also
+exports it so child stage processes follow the same mode.
+
+Histogram carries pre-binned counts to the plot functions, so chart time and
+memory depend on the number of bins rather than the number of draws.
+"""
+
+import multiprocessing
+import os
+
+import numpy as np
+
+MODES = ("on", "off", "background")
+
+_mode = None
+_plt = None
+
+
+def set_mode(mode):
+    global _mode
+    if mode is not None and mode not in MODES:
+        raise ValueError(f"unknown plot mode {mode!r}; expected one of {MODES}")
+    _mode = mode
+    if mode is not None:
+        # Stage scripts launched as subprocesses inherit the choice
+        os.environ["BW_PLOTS"] = mode
+
+
+def mode():
+    if _mode is not None:
+        return _mode
+    env = os.environ.get("BW_PLOTS", "on").strip().lower()
+    return env if env in MODES else "on"
+
+
+def enabled():
+    return mode() != "off"
+
+
+def add_arguments(parser):
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--no-plots", dest="plot_mode", action="store_const", const="off", help="skip rendering charts")
+    group.add_argument("--background-plots", dest="plot_mode", action="store_const", const="background", help="render charts in a worker process")
+
+
+def configure(args):
+    if getattr(args, "plot_mode", None):
+        set_mode(args.plot_mode)
+
+
+def pyplot():
+    global _plt
+    if _plt is None:
+        import matplotlib
+
+        if not os.environ.get("MPLBACKEND"):
+            matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        _plt = plt
+    return _plt
+
+
+def render(fn, *args, **kwargs):
+    """Call fn(*args, **kwargs) according to the plot mode; returns the worker process in background mode."""
+    m = mode()
+    if m == "off":
+        return None
+    if m == "background" and "fork" in multiprocessing.get_all_start_methods():
+        # fork hands the sample arrays to the child without pickling them
+        proc = multiprocessing.get_context("fork").Process(target=fn, args=args, kwargs=kwargs)
+        proc.start()
+        return proc
+    fn(*args, **kwargs)
+    return None
+
+
+class Histogram:
+    """
+    Bin counts over fixed edges. Build one from a sample array with a single
+    np.histogram pass (Histogram.of), or create it with fixed edges and add()
+    chunks of draws as they are simulated; histograms with equal edges merge.
+    Samples outside the edges are dropped by add().
+    """
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+
+    @classmethod
+    def of(cls, samples, bins=50, range=None):
+        counts, edges = np.histogram(samples, bins=bins, range=range)
+        h = cls(edges)
+        h.counts += counts
+        return h
+
+    @classmethod
+    def linear(cls, low, high, bins):
+        return cls(np.linspace(low, high, bins + 1))
+
+    def add(self, samples):
+        counts, _ = np.histogram(samples, bins=self.edges)
+        self.counts += counts
+        return self
+
+    def merge(self, other):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("cannot merge histograms with different bin edges")
+        self.counts += other.counts
+        return self
+
+    def draw(self, ax, density=False, **kwargs):
+        # ax may be an Axes or pyplot itself; bars match ax.hist on the raw samples
+        return ax.hist(self.edges[:-1], bins=self.edges, weights=self.counts, density=density, **kwargs)
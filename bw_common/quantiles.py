@@ -0,0 +1,94 @@
+"""
+Percentile summaries for Monte Carlo outputs.
+
+percentiles() returns the usual {"p5": ..., "p95": ...} dict from a single
+np.percentile call, which partitions the sample once for all requested
+quantiles instead of once per quantile; values are identical to separate
+np.percentile calls.
+
+QuantileSketch is a mergeable KLL-style sketch for draws that are produced in
+chunks or in several processes: each chunk is add()ed (or sketched separately
+and merge()d) and memory stays at a few times `k` values regardless of how
+many draws went in. Rank error is roughly log2(n / k) / k.
+"""
+
+import numpy as np
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def percentiles(samples, ps=DEFAULT_PERCENTILES):
+    values = np.percentile(samples, ps)
+    return {f"p{p:g}": float(v) for p, v in zip(ps, values)}
+
+
+class QuantileSketch:
+    def __init__(self, k=4096, seed=None):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+        self.min = np.inf
+        self.max = -np.inf
+
+    def add(self, samples):
+        x = np.asarray(samples, dtype=float).ravel()
+        if x.size == 0:
+            return self
+        self.n += x.size
+        self.min = min(self.min, float(x.min()))
+        self.max = max(self.max, float(x.max()))
+        self.levels[0] = np.concatenate([self.levels[0], x])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _compress(self):
+        # A full level keeps every other item (random offset) at twice the weight
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if items.size > self.k:
+                items = np.sort(items)
+                keep = items[-1:] if items.size % 2 else items[:0]
+                pairs = items[: items.size - keep.size]
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], pairs[self.rng.integers(2) :: 2]])
+                self.levels[h] = keep
+            h += 1
+
+    def items(self):
+        """Retained values in ascending order and the number of draws each one stands for."""
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(items_h.size, 2.0**h) for h, items_h in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], weights[order]
+
+    def quantile(self, q):
+        if self.n == 0:
+            raise ValueError("empty sketch")
+        items, weights = self.items()
+        # Each retained item stands for `weight` draws centred on its cumulative rank
+        centre = np.cumsum(weights) - weights / 2.0
+        ranks = np.asarray(q, dtype=float) * self.n
+        xp = np.concatenate([[0.0], centre, [float(self.n)]])
+        fp = np.concatenate([[self.min], items, [self.max]])
+        return np.interp(ranks, xp, fp)
+
+    def percentiles(self, ps=DEFAULT_PERCENTILES):
+        values = self.quantile(np.asarray(ps, dtype=float) / 100.0)
+        return {f"p{p:g}": float(v) for p, v in zip(ps, values)}
+
+    def __len__(self):
+        return self.n
@@ -0,0 +1,165 @@
+"""
+Pooled, concurrent fetcher for SEC XBRL companyfacts with an on-disk HTTP cache.
+
+Responses are streamed to disk still gzip-compressed and stored next to the
+ETag / Last-Modified validators the server returned. Later fetches send
+If-None-Match / If-Modified-Since, so an unchanged filing costs a 304 and is
+read back from the cache. Requests share one connection pool and are spaced
+to stay under SEC's fair-access limit of 10 requests per second.
+
+load_tag_facts pulls only the requested us-gaap tags out of a cached
+document. With ijson installed the gzip stream is parsed incrementally and
+only the wanted tags are materialized; either way the extracted tags are
+written to small per-tag slice files, so later runs against an unchanged
+filing skip the big document entirely.
+"""
+
+import gzip
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from bw_common.webfetch import RateLimiter
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+COMPANYFACTS_URL = "https://data.sec.gov/api/xbrl/companyfacts/CIK{cik}.json"
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "http_cache", "sec")
+MAX_REQUESTS_PER_SEC = 10
+DEFAULT_WORKERS = 4
+
+
+_limiter = RateLimiter(MAX_REQUESTS_PER_SEC)
+
+
+def make_session(user_agent, pool_size=DEFAULT_WORKERS):
+    s = requests.Session()
+    s.headers.update({"User-Agent": user_agent, "Accept-Encoding": "gzip"})
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    s.mount("https://", adapter)
+    return s
+
+
+def cache_paths(cik, cache_dir=None):
+    base = os.path.join(cache_dir or CACHE_DIR, f"CIK{cik}")
+    return base + ".json.gz", base + ".meta.json"
+
+
+def _load_meta(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _stream_to_gzip(r, path):
+    tmp = path + ".tmp"
+    encoding = r.headers.get("Content-Encoding", "").lower()
+    with open(tmp, "wb") as f:
+        if encoding == "gzip":
+            # Already gzip on the wire: copy the compressed stream as-is
+            shutil.copyfileobj(r.raw, f, 1 << 20)
+        else:
+            with gzip.GzipFile(fileobj=f, mode="wb") as gz:
+                for chunk in r.iter_content(1 << 20):
+                    gz.write(chunk)
+    os.replace(tmp, path)
+
+
+def download_companyfacts(cik, session, cache_dir=None):
+    """Refresh the cached companyfacts file for `cik`; returns (path, http_status)."""
+    data_path, meta_path = cache_paths(cik, cache_dir)
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    meta = _load_meta(meta_path) if os.path.exists(data_path) else {}
+
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    _limiter.wait()
+    with session.get(COMPANYFACTS_URL.format(cik=cik), headers=headers, timeout=60, stream=True) as r:
+        if r.status_code == 304:
+            return data_path, 304
+        r.raise_for_status()
+        r.raw.decode_content = False
+        _stream_to_gzip(r, data_path)
+        meta = {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified"), "fetched_at": time.time()}
+
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    return data_path, r.status_code
+
+
+def load_companyfacts(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def download_many(ciks, user_agent, max_workers=DEFAULT_WORKERS, cache_dir=None):
+    """Refresh every cik concurrently; returns {cik: (path, http_status)}."""
+    ciks = list(dict.fromkeys(ciks))
+    with make_session(user_agent, pool_size=max_workers) as session:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = pool.map(lambda c: download_companyfacts(c, session, cache_dir), ciks)
+            return dict(zip(ciks, results))
+
+
+def _slice_path(data_path, taxonomy, tag):
+    return data_path[: -len(".json.gz")] + f".{taxonomy}.{tag}.json"
+
+
+def _extract_tags(data_path, tags, taxonomy):
+    wanted = set(tags)
+    found = {}
+    with gzip.open(data_path, "rb") as f:
+        if ijson is not None:
+            for tag, obj in ijson.kvitems(f, f"facts.{taxonomy}", use_float=True):
+                if tag in wanted:
+                    found[tag] = obj
+                    if len(found) == len(wanted):
+                        break
+        else:
+            facts = json.load(f).get("facts", {}).get(taxonomy, {})
+            found = {t: facts[t] for t in wanted if t in facts}
+    return found
+
+
+def load_tag_facts(data_path, tags, taxonomy="us-gaap"):
+    """
+    Return a companyfacts-shaped dict holding only `tags`.
+
+    Slices newer than the cached document are reused; a tag missing from the
+    filing is cached as null so it does not trigger a re-parse either.
+    """
+    data_mtime = os.path.getmtime(data_path)
+    out = {}
+    missing = []
+    for tag in tags:
+        sp = _slice_path(data_path, taxonomy, tag)
+        if os.path.exists(sp) and os.path.getmtime(sp) >= data_mtime:
+            with open(sp) as f:
+                obj = json.load(f)
+            if obj is not None:
+                out[tag] = obj
+        else:
+            missing.append(tag)
+
+    if missing:
+        found = _extract_tags(data_path, missing, taxonomy)
+        for tag in missing:
+            with open(_slice_path(data_path, taxonomy, tag), "w") as f:
+                json.dump(found.get(tag), f)
+        out.update(found)
+
+    return {"facts": {taxonomy: out}}
@@ -0,0 +1,116 @@
+"""
+Persistent seen-item index for the monitor scripts.
+
+Monitors remember which items they have already reported so that a story
+does not trigger a second analysis or alert. A SeenStore keeps those keys in
+one SQLite database shared by every monitor (data/monitor_seen.sqlite, or
+BW_SEEN_DB). Each monitor uses its own namespace, and (namespace, key) is the
+primary key of a WITHOUT ROWID table, so a membership check is a single index
+probe. The file grows with the number of keys rather than being rewritten on
+every run.
+
+Every key records when it was first and last seen. filter_new() refreshes
+last_seen for keys it finds again, and expire() drops keys not seen for
+`ttl_days`. A story that keeps appearing in the feeds is therefore never
+forgotten, while stale keys eventually age out instead of being cut off by
+list position.
+
+Lookups are plain reads, so they never hold a lock. The keys that add() and
+filter_new() mark seen are queued in memory and written by commit() in one
+short transaction, typically at the end of a run. Other monitors sharing the
+file are therefore never blocked while a run is scoring or alerting, and a
+run that fails before committing leaves its items unseen for the next run.
+"""
+
+import os
+import sqlite3
+import time
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "monitor_seen.sqlite")
+DEFAULT_TTL_DAYS = 180
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS seen_last ON seen (namespace, last_seen);
+"""
+
+
+def store_path(path=None):
+    return path or os.environ.get("BW_SEEN_DB") or DEFAULT_PATH
+
+
+class SeenStore:
+    def __init__(self, namespace, path=None, ttl_days=DEFAULT_TTL_DAYS):
+        self.namespace = namespace
+        self.ttl_days = ttl_days
+        self.path = store_path(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(_SCHEMA)
+        self.pending = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        self.close()
+
+    def __contains__(self, key):
+        return key in self.pending or self._stored(key)
+
+    def __len__(self):
+        stored = self.db.execute("SELECT COUNT(*) FROM seen WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+        return stored + sum(1 for key in self.pending if not self._stored(key))
+
+    def _stored(self, key):
+        row = self.db.execute("SELECT 1 FROM seen WHERE namespace = ? AND key = ?", (self.namespace, key)).fetchone()
+        return row is not None
+
+    def add(self, key, now=None):
+        """Mark key as seen (written at commit()); returns True if it was not seen before."""
+        new = key not in self
+        self.pending[key] = time.time() if now is None else now
+        return new
+
+    def filter_new(self, items, key):
+        """Return the items whose key(item) has not been seen, marking all of them seen."""
+        now = time.time()
+        return [item for item in items if self.add(key(item), now)]
+
+    def import_keys(self, keys):
+        """Seed the store from a legacy seen-hash list; returns how many were new."""
+        now = time.time()
+        return sum(self.add(k, now) for k in keys)
+
+    def expire(self, ttl_days=None):
+        # write the queued keys first so that keys seen this run are refreshed, not dropped
+        self._flush()
+        ttl_days = self.ttl_days if ttl_days is None else ttl_days
+        cutoff = time.time() - ttl_days * 86400
+        cur = self.db.execute("DELETE FROM seen WHERE namespace = ? AND last_seen < ?", (self.namespace, cutoff))
+        return cur.rowcount
+
+    def _flush(self):
+        if self.pending:
+            self.db.executemany(
+                "INSERT INTO seen (namespace, key, first_seen, last_seen) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET last_seen = excluded.last_seen",
+                [(self.namespace, key, now, now) for key, now in self.pending.items()],
+            )
+            self.pending = {}
+
+    def commit(self):
+        self._flush()
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
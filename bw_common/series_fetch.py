@@ -0,0 +1,84 @@
+"""
+Delta fetchers for FRED and Stooq series backed by bw_common.tsstore.
+
+When a series is already in the store only the tail is requested (FRED
+`cosd`, Stooq `d1`/`d2`), starting a revision look-back before the last
+stored observation: FRED_LOOKBACK_MONTHS months for FRED, whose monthly
+releases revise the prior two months, and STOOQ_LOOKBACK_DAYS days for Stooq,
+to settle a partial last bar. The response replaces the stored rows from
+that date on; full=True downloads and replaces the whole series. A routine
+update therefore costs one small response, and when the source has not
+changed the store is not written at all.
+"""
+
+from datetime import datetime, timezone
+
+import requests
+
+from bw_common import tsstore
+
+FRED_URL = "https://fred.stlouisfed.org/graph/fredgraph.csv"
+STOOQ_URL = "https://stooq.com/q/d/l/"
+FRED_LOOKBACK_MONTHS = 3
+STOOQ_LOOKBACK_DAYS = 7
+
+
+def fetch_text(url, params=None):
+    r = requests.get(url, params=params, timeout=60, headers={"User-Agent": "Mozilla/5.0"})
+    r.raise_for_status()
+    return r.text
+
+
+def fred_series_id(series):
+    return f"FRED/{series}"
+
+
+def stooq_series_id(symbol):
+    return f"STOOQ/{symbol.upper()}"
+
+
+def fred_params(series, start=None):
+    params = {"id": series}
+    if start is not None:
+        params["cosd"] = str(start)
+    return params
+
+
+def stooq_params(symbol, start=None):
+    params = {"s": symbol, "i": "d"}
+    if start is not None:
+        params["d1"] = str(start).replace("-", "")
+        params["d2"] = datetime.now(timezone.utc).strftime("%Y%m%d")
+    return params
+
+
+def fred_start(series_id, root=None):
+    last = tsstore.last_date(series_id, root)
+    if last is None:
+        return None
+    return (last.astype("datetime64[M]") - FRED_LOOKBACK_MONTHS).astype("datetime64[D]")
+
+
+def stooq_start(series_id, root=None):
+    last = tsstore.last_date(series_id, root)
+    if last is None:
+        return None
+    return last - STOOQ_LOOKBACK_DAYS
+
+
+def update_fred(series, full=False, root=None):
+    series_id = fred_series_id(series)
+    start = None if full else fred_start(series_id, root)
+    text = fetch_text(FRED_URL, fred_params(series, start))
+    dates, values = tsstore.parse_fred_csv(text)
+    added = tsstore.append_series(series_id, dates, values, source="fred", root=root, start=start, replace=full)
+    return added, text
+
+
+def update_stooq(symbol, full=False, root=None):
+    series_id = stooq_series_id(symbol)
+    start = None if full else stooq_start(series_id, root)
+    text = fetch_text(STOOQ_URL, stooq_params(symbol, start))
+    dates, values = tsstore.parse_stooq_csv(text)
+    added = tsstore.append_series(series_id, dates, values, source="stooq", root=root, start=start, replace=full)
+    return added, text
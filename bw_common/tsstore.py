@@ -0,0 +1,235 @@
+"""
+Local columnar store for the FRED / Stooq / ISM series used across question folders.
+
+Each series lives in three files under the store root, keyed by series id
+(e.g. "FRED/PAYEMS" -> FRED__PAYEMS.*):
+
+    <key>.<version>.dates.i8   int64 days since 1970-01-01, ascending
+    <key>.<version>.values.f8  float64 observations
+    <key>.json                 metadata (n, version, first/last date, source, updated_utc)
+
+The data files are headerless, so loads are memory-mapped straight into
+NumPy arrays without parsing. Writes are upserts: the rows dated before the
+incoming batch are kept and the batch replaces everything from its first
+date on, which keeps revised observations (FRED revisions, a partial
+same-day bar) in step with the source. A batch that changes nothing writes
+nothing.
+
+Data files are never modified in place, because other processes may have
+them mapped. A write puts the new rows in data files under a fresh version,
+then atomically replaces the meta file that names the version, then unlinks
+the old version. Readers holding a map of the old files keep a valid view,
+and a crash at any point leaves the previous version intact.
+"""
+
+import csv
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "timeseries")
+
+
+def store_root(root=None):
+    return root or os.environ.get("BW_TSSTORE_DIR") or DEFAULT_ROOT
+
+
+def _paths(series_id, root=None, version=None):
+    base = os.path.join(store_root(root), series_id.replace("/", "__"))
+    data = f"{base}.{version}" if version else base
+    return data + ".dates.i8", data + ".values.f8", base + ".json"
+
+
+def load_meta(series_id, root=None):
+    _, _, meta_path = _paths(series_id, root)
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _save_meta(series_id, meta, root=None):
+    _, _, meta_path = _paths(series_id, root)
+    tmp = meta_path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, meta_path)
+
+
+def _map(path, dtype, n):
+    if n == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(n,))
+
+
+def load_series(series_id, root=None):
+    for attempt in range(3):
+        meta = load_meta(series_id, root)
+        if meta is None:
+            return np.empty(0, dtype="datetime64[D]"), np.empty(0, dtype=float)
+        dates_path, values_path, _ = _paths(series_id, root, meta.get("version"))
+        n = int(meta["n"])
+        try:
+            days = _map(dates_path, np.int64, n)
+            values = _map(values_path, np.float64, n)
+        except FileNotFoundError:
+            # a writer replaced this version between reading meta and mapping
+            if attempt == 2:
+                raise
+            continue
+        return days.view("datetime64[D]"), values
+
+
+def last_date(series_id, root=None):
+    meta = load_meta(series_id, root)
+    if meta is None or not meta.get("last_date"):
+        return None
+    return np.datetime64(meta["last_date"], "D")
+
+
+def append_series(series_id, dates, values, source=None, root=None, start=None, replace=False, keep_newer=False):
+    """
+    Upsert observations; returns how many rows are new or changed.
+
+    Stored rows dated on or after the first incoming date (or `start`, if
+    earlier) are replaced by the incoming rows, so revisions and a partial
+    last bar are picked up. replace=True rewrites the whole series;
+    keep_newer=True keeps stored rows dated after the last incoming one. An
+    empty batch, or one that matches what is stored, writes nothing.
+    """
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    values = np.asarray(values, dtype=np.float64)
+    if not len(dates):
+        return 0
+    order = np.argsort(dates, kind="stable")
+    dates = dates[order]
+    values = values[order]
+    # Duplicate dates inside one batch: the last occurrence wins
+    last_of_run = np.r_[dates[1:] != dates[:-1], True]
+    dates = dates[last_of_run]
+    values = values[last_of_run]
+
+    meta = load_meta(series_id, root) or {"series_id": series_id, "n": 0, "first_date": None, "last_date": None}
+    old_dates, old_values = load_series(series_id, root)
+    cut = dates[0] if start is None else min(dates[0], np.datetime64(start, "D"))
+    keep = 0 if replace else int(np.searchsorted(old_dates, cut, side="left"))
+    stop = int(np.searchsorted(old_dates, dates[-1], side="right")) if keep_newer else len(old_dates)
+    stop = max(stop, keep)
+
+    # rows that differ from what was stored under the same date
+    old = dict(zip(old_dates[keep:stop].astype(np.int64).tolist(), old_values[keep:stop].tolist()))
+    new_days = dates.astype(np.int64).tolist()
+    changed = sum(old.get(d) != v for d, v in zip(new_days, values.tolist()))
+    changed += len(set(old) - set(new_days))
+    if not changed:
+        return 0
+
+    all_dates = np.concatenate([old_dates[:keep], dates, old_dates[stop:]]).astype("datetime64[D]")
+    all_values = np.concatenate([old_values[:keep], values, old_values[stop:]])
+    del old_dates, old_values
+
+    os.makedirs(store_root(root), exist_ok=True)
+    old_version, had_rows = meta.get("version"), int(meta["n"]) > 0
+    version = uuid.uuid4().hex[:12]
+    dates_path, values_path, _ = _paths(series_id, root, version)
+    with open(dates_path, "wb") as f:
+        f.write(all_dates.astype(np.int64).tobytes())
+    with open(values_path, "wb") as f:
+        f.write(all_values.tobytes())
+
+    meta["version"] = version
+    meta["n"] = len(all_dates)
+    meta["first_date"] = str(all_dates[0])
+    meta["last_date"] = str(all_dates[-1])
+    if source:
+        meta["source"] = source
+    meta["updated_utc"] = datetime.now(timezone.utc).isoformat()
+    _save_meta(series_id, meta, root)
+
+    if had_rows:
+        for path in _paths(series_id, root, old_version)[:2]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    return int(changed)
+
+
+def parse_csv_columns(text, date_col, value_col, skip_values=("", ".")):
+    reader = csv.reader(text.splitlines())
+    header = next(reader, None)
+    if not header:
+        return np.empty(0, dtype="datetime64[D]"), np.empty(0, dtype=float)
+    if any(isinstance(c, str) and c not in header for c in (date_col, value_col)):
+        # e.g. a Stooq "No data" body
+        return np.empty(0, dtype="datetime64[D]"), np.empty(0, dtype=float)
+    di = header.index(date_col) if isinstance(date_col, str) else date_col
+    vi = header.index(value_col) if isinstance(value_col, str) else value_col
+    dates = []
+    values = []
+    for row in reader:
+        if len(row) <= max(di, vi):
+            continue
+        v = row[vi].strip()
+        if v in skip_values:
+            continue
+        dates.append(row[di][:10])
+        values.append(v)
+    return np.array(dates, dtype="datetime64[D]"), np.array(values, dtype=float)
+
+
+def parse_fred_csv(text):
+    header = next(csv.reader(text.splitlines()), None) or []
+    if not header:
+        return np.empty(0, dtype="datetime64[D]"), np.empty(0, dtype=float)
+    date_key = "DATE" if "DATE" in header else ("observation_date" if "observation_date" in header else header[0])
+    val_key = [k for k in header if k != date_key][0]
+    return parse_csv_columns(text, date_key, val_key)
+
+
+def parse_stooq_csv(text):
+    return parse_csv_columns(text, "Date", "Close", skip_values=("", "0"))
+
+
+def parse_ref_month_csv(text, value_col="value"):
+    reader = csv.DictReader(text.splitlines())
+    dates = []
+    values = []
+    for row in reader:
+        v = (row.get(value_col) or "").strip()
+        if v == "":
+            continue
+        dates.append(f"{int(row['ref_year']):04d}-{int(row['ref_month']):02d}-01")
+        values.append(v)
+    return np.array(dates, dtype="datetime64[D]"), np.array(values, dtype=float)
+
+
+def load_or_import(series_id, csv_path, parser, root=None):
+    """
+    Load a series, importing the local CSV snapshot when the store is missing
+    or the snapshot changed since it was last imported. The snapshot replaces
+    the stored rows up to its last date; rows fetched after that are kept.
+    """
+    if os.path.exists(csv_path):
+        meta = load_meta(series_id, root)
+        mtime = os.path.getmtime(csv_path)
+        if meta is None or meta.get("csv_mtime") != mtime:
+            with open(csv_path) as f:
+                dates, values = parser(f.read())
+            append_series(series_id, dates, values, source=os.path.basename(csv_path), root=root, replace=True, keep_newer=True)
+            meta = load_meta(series_id, root)
+            if meta is not None:
+                meta["csv_mtime"] = mtime
+                _save_meta(series_id, meta, root)
+    return load_series(series_id, root)
+
+
+def last_observation(series_id, root=None):
+    dates, values = load_series(series_id, root)
+    if not len(dates):
+        return None
+    return str(dates[-1]), float(values[-1])
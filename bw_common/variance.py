@@ -0,0 +1,134 @@
+"""
+Variance reduction for the model samplers.
+
+generator(seed, method, n) returns something that can stand in for the
+np.random.Generator a model's simulate(rng, n, params) receives:
+
+    plain       np.random.default_rng(seed), unchanged
+    antithetic  every normal/lognormal/uniform draw is half fresh values and
+                half their mirror image (z, -z and u, 1 - u)
+    sobol       randomized quasi-Monte Carlo: draws of the full path count n
+                take successive dimensions of one scrambled Sobol' point set;
+                draws of any other size (conditional subsets, mixture blocks)
+                get a scrambled one-dimensional Sobol' sequence in random
+                order, i.e. stratified Latin-hypercube style draws
+
+Only standard_normal/normal/lognormal/random are affected; choice,
+multinomial, integers and the rest come from the underlying PCG64 stream.
+Sobol' points come from scipy.stats.qmc, imported on first use.
+
+These estimators are not i.i.d., so standard errors come from the spread of
+independent replicates (the chunks of montecarlo.run_chunked) rather than
+from the per-draw variance.
+
+control_variate() adjusts per-draw values y with a control g of known mean;
+the mean of the returned array is the control-variate estimate of E[y].
+"""
+
+import numpy as np
+
+METHODS = ("plain", "antithetic", "sobol")
+SOBOL_DIMS = 8
+
+_EPS = 2.0**-53
+
+
+def generator(seed, method="plain", n=None):
+    if method == "plain":
+        return np.random.default_rng(seed)
+    if method == "antithetic":
+        return AntitheticGenerator(np.random.default_rng(seed))
+    if method == "sobol":
+        return SobolGenerator(np.random.default_rng(seed), n)
+    raise ValueError(f"unknown variance reduction {method!r}; expected one of {METHODS}")
+
+
+def _shape(size):
+    if size is None:
+        return (1,)
+    return tuple(size) if isinstance(size, (tuple, list)) else (int(size),)
+
+
+def _ndtri(u):
+    from scipy.special import ndtri
+
+    return ndtri(np.clip(u, _EPS, 1.0 - _EPS))
+
+
+class _Generator:
+    """Routes normal/lognormal/random through _uniform/_standard_normal; everything else goes to rng."""
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def __getattr__(self, name):
+        return getattr(self.rng, name)
+
+    def standard_normal(self, size=None):
+        z = self._standard_normal(_shape(size))
+        return z if size is not None else float(z[0])
+
+    def normal(self, loc=0.0, scale=1.0, size=None):
+        z = self._standard_normal(_shape(size))
+        out = loc + scale * z
+        return out if size is not None else float(out[0])
+
+    def lognormal(self, mean=0.0, sigma=1.0, size=None):
+        return np.exp(self.normal(mean, sigma, size))
+
+    def random(self, size=None):
+        u = self._uniform(_shape(size))
+        return u if size is not None else float(u[0])
+
+    def _standard_normal(self, shape):
+        return _ndtri(self._uniform(shape))
+
+
+class AntitheticGenerator(_Generator):
+    def _mirror(self, shape, draw, flip):
+        half = (shape[0] + 1) // 2
+        x = draw((half,) + shape[1:])
+        return np.concatenate([x, flip(x)])[: shape[0]]
+
+    def _uniform(self, shape):
+        return self._mirror(shape, self.rng.random, lambda u: 1.0 - u)
+
+    def _standard_normal(self, shape):
+        return self._mirror(shape, self.rng.standard_normal, np.negative)
+
+
+class SobolGenerator(_Generator):
+    def __init__(self, rng, n, dims=SOBOL_DIMS):
+        super().__init__(rng)
+        self.n = n
+        self.dims = dims
+        self.points = None
+        self.next_dim = 0
+
+    def _sobol(self, d, m):
+        from scipy.stats import qmc
+
+        engine = qmc.Sobol(d=d, scramble=True, seed=self.rng)
+        # draw a power-of-two block to keep the net balanced, then trim
+        return engine.random_base2(max(0, int(np.ceil(np.log2(max(m, 1))))))[:m]
+
+    def _uniform(self, shape):
+        m = shape[0]
+        k = int(np.prod(shape[1:], dtype=np.int64))
+        if m == self.n and self.next_dim + k <= self.dims:
+            if self.points is None:
+                self.points = self._sobol(self.dims, m)
+            u = self.points[:, self.next_dim : self.next_dim + k]
+            self.next_dim += k
+            return u.reshape(shape)
+        cols = [self.rng.permutation(self._sobol(1, m)[:, 0]) for _ in range(k)]
+        return np.stack(cols, axis=1).reshape(shape)
+
+
+def control_variate(y, g, g_mean):
+    y = np.asarray(y, dtype=float)
+    gc = np.asarray(g, dtype=float) - g_mean
+    dg = gc - gc.mean()
+    var = float(np.dot(dg, dg))
+    beta = float(np.dot(y - y.mean(), dg) / var) if var > 0 else 0.0
+    return y - beta * gc
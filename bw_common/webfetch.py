@@ -0,0 +1,250 @@
+"""
+Concurrent source fetching for the monitor scripts.
+
+Monitors poll a handful of independent sources (official pages, RSS
+searches, news APIs). fan_out() runs them on a thread pool and returns their
+results in task order, so a run takes about as long as its slowest source
+rather than the sum of all of them. Every task has its own timeout, counted
+from when it starts running, so tasks queued behind busy workers are not
+charged for the wait, and the whole call has an overall deadline. A source
+that misses either is reported and replaced by its default, and fan_out
+returns without waiting for it. The workers are daemon threads, so a source
+that is still trickling bytes holds up neither the run nor interpreter exit.
+
+get() is the HTTP entry point for those sources. All calls share one
+requests.Session, and so one keep-alive connection pool. Before each request
+the caller waits on a per-host RateLimiter (HOST_RATES, falling back to
+DEFAULT_RATE requests per second). Queries against the same host are spaced
+out, and different hosts never wait on each other. This replaces the fixed
+sleeps between queries.
+
+fetch() adds a shared on-disk cache in front of get(). For each URL it keeps
+the body and the ETag / Last-Modified validators the server returned. Within
+`ttl` seconds of the last check (BW_HTTP_CACHE_TTL, default 600) the cached
+copy is used without a request, so monitors run in the same cron window share
+one download. After that, a conditional request is sent. With parse=fn the
+parsed result is cached as well, keyed by a digest of the body it came from:
+a 304, or a 200 with an unchanged body, returns it without parsing again.
+Parsed results must be JSON-serializable.
+
+When the request fails (connection error, timeout or a 5xx response) and a
+cached copy exists, fetch() returns the cached copy and the next call tries
+again. It raises only when nothing is cached, or on a 4xx response.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+DEFAULT_TIMEOUT = 30
+DEFAULT_WORKERS = 16
+DEFAULT_RATE = 2.0
+DEFAULT_TTL = 600
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "http_cache", "web")
+HOST_RATES = {
+    "news.google.com": 1.0,
+    "newsapi.org": 1.0,
+}
+
+
+class RateLimiter:
+    def __init__(self, per_sec):
+        self.interval = 1.0 / per_sec
+        self.lock = threading.Lock()
+        self.next_at = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            at = max(now, self.next_at)
+            self.next_at = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+
+_lock = threading.Lock()
+_limiters = {}
+_session = None
+
+
+def host_limiter(url):
+    host = urlsplit(url).hostname or ""
+    with _lock:
+        if host not in _limiters:
+            _limiters[host] = RateLimiter(HOST_RATES.get(host, DEFAULT_RATE))
+        return _limiters[host]
+
+
+def session():
+    global _session
+    with _lock:
+        if _session is None:
+            s = requests.Session()
+            s.headers.update({"User-Agent": USER_AGENT})
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=DEFAULT_WORKERS)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+        return _session
+
+
+def get(url, params=None, headers=None, timeout=DEFAULT_TIMEOUT, **kwargs):
+    host_limiter(url).wait()
+    return session().get(url, params=params, headers=headers, timeout=timeout, **kwargs)
+
+
+def cache_dir(root=None):
+    return root or os.environ.get("BW_HTTP_CACHE_DIR") or CACHE_DIR
+
+
+def cache_ttl(ttl=None):
+    return float(ttl if ttl is not None else os.environ.get("BW_HTTP_CACHE_TTL", DEFAULT_TTL))
+
+
+def _cache_base(url, params, root):
+    key = url + ("?" + json.dumps(params, sort_keys=True) if params else "")
+    return os.path.join(cache_dir(root), hashlib.sha256(key.encode()).hexdigest()[:32])
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write(path, data):
+    # several monitors may share the cache, so write then rename
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    if isinstance(data, bytes):
+        with open(tmp, "wb") as f:
+            f.write(data)
+    else:
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def fetch(url, params=None, parse=None, name=None, ttl=None, root=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Return the body of url (bytes) or, with parse, parse(body) for it.
+    `name` keys the parsed result (default: the parser's qualified name).
+    """
+    base = _cache_base(url, params, root)
+    meta_path, body_path = base + ".meta.json", base + ".body"
+    meta = (_read_json(meta_path) if os.path.exists(body_path) else None) or {}
+
+    if not meta or time.time() - meta.get("checked_at", 0) >= cache_ttl(ttl):
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        try:
+            r = get(url, params=params, headers=headers, timeout=timeout)
+            if r.status_code >= 500:
+                r.raise_for_status()
+        except requests.RequestException as e:
+            if not meta:
+                raise
+            # serve the stale copy; checked_at is left alone so the next call retries
+            print(f"✗ {url} failed ({e}), using the cached copy")
+            r = None
+        if r is not None:
+            if r.status_code != 304:
+                r.raise_for_status()
+                os.makedirs(cache_dir(root), exist_ok=True)
+                _write(body_path, r.content)
+                meta = {
+                    "url": url,
+                    "etag": r.headers.get("ETag"),
+                    "last_modified": r.headers.get("Last-Modified"),
+                    "digest": hashlib.sha256(r.content).hexdigest()[:16],
+                }
+            meta["checked_at"] = time.time()
+            meta["status"] = r.status_code
+            _write(meta_path, meta)
+
+    if parse is None:
+        with open(body_path, "rb") as f:
+            return f.read()
+
+    name = name or f"{parse.__module__}.{parse.__qualname__}"
+    parsed_path = f"{base}.{hashlib.sha256(name.encode()).hexdigest()[:12]}.json"
+    cached = _read_json(parsed_path)
+    if cached is not None and cached.get("digest") == meta["digest"]:
+        return cached["value"]
+    with open(body_path, "rb") as f:
+        value = parse(f.read())
+    _write(parsed_path, {"name": name, "digest": meta["digest"], "value": value})
+    return value
+
+
+def fan_out(tasks, timeout=DEFAULT_TIMEOUT * 2, workers=DEFAULT_WORKERS, default=list, deadline=None):
+    """
+    Run tasks, a list of (label, fn, *args), concurrently and return their
+    results in task order. A task that raises, is still running `timeout`
+    seconds after it started, or has not finished when `deadline` seconds
+    (default: twice the timeout) have passed since the call, yields default()
+    instead.
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return []
+    deadline = 2 * timeout if deadline is None else deadline
+    end = time.monotonic() + deadline
+    todo = queue.SimpleQueue()
+    for i in range(len(tasks)):
+        todo.put(i)
+    started = [None] * len(tasks)
+    outcomes = [None] * len(tasks)
+    finished = [threading.Event() for _ in tasks]
+
+    def worker():
+        while time.monotonic() < end:
+            try:
+                i = todo.get_nowait()
+            except queue.Empty:
+                return
+            started[i] = time.monotonic()
+            _, fn, *args = tasks[i]
+            try:
+                outcomes[i] = (True, fn(*args))
+            except Exception as e:
+                outcomes[i] = (False, e)
+            finished[i].set()
+
+    for _ in range(min(workers, len(tasks))):
+        threading.Thread(target=worker, daemon=True).start()
+
+    results = []
+    for i, (label, *_) in enumerate(tasks):
+        while not finished[i].is_set():
+            now = time.monotonic()
+            limit = end if started[i] is None else min(started[i] + timeout, end)
+            if now >= limit:
+                break
+            # until the task starts its limit is only the overall deadline, so re-check it shortly
+            finished[i].wait(limit - now if started[i] is not None else min(limit - now, 0.1))
+        if not finished[i].is_set():
+            if started[i] is not None and started[i] + timeout <= end:
+                print(f"✗ {label} timed out after {timeout:g}s, skipping")
+            else:
+                print(f"✗ {label} did not finish within the {deadline:g}s deadline, skipping")
+            results.append(default())
+            continue
+        ok, value = outcomes[i]
+        if not ok:
+            print(f"✗ {label} failed: {value}")
+            value = default()
+        results.append(value)
+    return results